@@ -0,0 +1,286 @@
+"""
+Нагрузочный тест API бронирования.
+
+Заполняет БД набором столиков и бронирований, после чего выполняет запросы
+к приложению в том же процессе (httpx + ASGI) от множества параллельных
+клиентов. Для каждого сценария выводятся пропускная способность и
+перцентили задержки, результаты сохраняются в JSON.
+
+Пример::
+
+    python -m benchmarks.api --tables 200 --reservations 20000 --clients 50
+
+Данные запуска удаляются после завершения (если не указан --keep).
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List
+
+from httpx import AsyncClient, Response
+from sqlalchemy import Integer, bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from benchmarks.results import print_results, summarize, write_results
+from integrations.db.session import database
+from main import app
+from services.free_slot_cache import availability_cache
+from services.table_cache import table_cache
+
+#: интервал между засеянными бронированиями одного столика
+SEED_STEP = timedelta(hours=2)
+#: длительность засеянных бронирований и бронирований сценария создания
+DURATION_MINUTES = 60
+
+SEED_TABLES = text(
+    """
+    INSERT INTO "table" (name, seats, location, created_at, updated_at)
+    SELECT CAST(:prefix AS text) || n, 2 + n % 6, 'Зал ' || n % 5, now(), now()
+    FROM generate_series(1, CAST(:count AS integer)) AS n
+    RETURNING id
+    """
+)
+SEED_RESERVATIONS = text(
+    """
+    INSERT INTO reservation
+        (customer_name, table_id, reservation_time, duration_minutes,
+         created_at, updated_at)
+    SELECT
+        CAST(:prefix AS text) || n,
+        (:table_ids)[n % cardinality(:table_ids) + 1],
+        CAST(:start AS timestamptz)
+            + (n / cardinality(:table_ids)) * CAST(:step AS interval),
+        CAST(:duration AS integer),
+        now(),
+        now()
+    FROM generate_series(0, CAST(:count AS integer) - 1) AS n
+    """
+).bindparams(bindparam("table_ids", type_=ARRAY(Integer)))
+CLEANUP = [
+    text("DELETE FROM reservation WHERE table_id = ANY(:table_ids)"),
+    text('DELETE FROM "table" WHERE id = ANY(:table_ids)'),
+]
+
+
+async def seed(
+    db_engine: AsyncEngine, prefix: str, tables: int, reservations: int
+) -> List[int]:
+    """
+    Заполнение БД столиками и непересекающимися бронированиями.
+
+    :param db_engine: движок БД
+    :param prefix: префикс названий, по которому отличаются данные запуска
+    :param tables: количество столиков
+    :param reservations: количество бронирований
+    :return: идентификаторы созданных столиков
+    """
+
+    start = datetime.now(timezone.utc).replace(
+        minute=0, second=0, microsecond=0
+    ) + timedelta(days=1)
+
+    async with db_engine.begin() as connection:
+        result = await connection.execute(
+            SEED_TABLES, {"prefix": prefix, "count": tables}
+        )
+        table_ids = list(result.scalars())
+        if reservations:
+            await connection.execute(
+                SEED_RESERVATIONS,
+                {
+                    "prefix": prefix,
+                    "table_ids": table_ids,
+                    "start": start,
+                    "step": SEED_STEP,
+                    "duration": DURATION_MINUTES,
+                    "count": reservations,
+                },
+            )
+
+    # данные добавлены в обход репозиториев
+    availability_cache.clear()
+    await table_cache.clear()
+
+    return table_ids
+
+
+async def cleanup(db_engine: AsyncEngine, table_ids: List[int]) -> None:
+    async with db_engine.begin() as connection:
+        for statement in CLEANUP:
+            await connection.execute(
+                statement.bindparams(bindparam("table_ids", type_=ARRAY(Integer))),
+                {"table_ids": table_ids},
+            )
+
+    availability_cache.clear()
+    await table_cache.clear()
+
+
+async def run_scenario(
+    name: str,
+    clients: int,
+    requests: int,
+    send: Callable[[int], Awaitable[Response]],
+) -> Dict[str, Any]:
+    """
+    Выполнение requests запросов от clients параллельных клиентов.
+
+    :param name: название сценария
+    :param clients: количество параллельных клиентов
+    :param requests: общее количество запросов
+    :param send: функция отправки запроса по его порядковому номеру
+    :return: сводка сценария
+    """
+
+    counter = itertools.count()
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def worker() -> None:
+        while True:
+            number = next(counter)
+            if number >= requests:
+                return
+            started_at = time.perf_counter()
+            response = await send(number)
+            latencies.append(time.perf_counter() - started_at)
+            statuses[response.status_code] += 1
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    return summarize(name, latencies, time.perf_counter() - started_at, statuses)
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    rnd = random.Random(args.seed)
+    prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+    table_ids = await seed(database.engine, prefix, args.tables, args.reservations)
+
+    # бронирования сценария создания попадают в отдельное окно после
+    # засеянных, чтобы клиенты конкурировали только друг с другом
+    seeded_slots = -(-args.reservations // args.tables)
+    window_start = (
+        datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        + timedelta(days=2)
+        + seeded_slots * SEED_STEP
+    )
+    hot_tables = table_ids[: args.hot_tables]
+    created: List[int] = []
+
+    async def create(number: int) -> Response:
+        slot = rnd.randrange(args.slots)
+        response = await client.post(
+            "/api/v1/reservations/",
+            json={
+                "customer_name": f"{prefix}{number}",
+                "table_id": rnd.choice(hot_tables),
+                "reservation_time": (
+                    window_start + timedelta(minutes=DURATION_MINUTES * slot)
+                ).isoformat(),
+                "duration_minutes": DURATION_MINUTES,
+            },
+        )
+        if response.status_code == 200:
+            created.append(response.json()["id"])
+        return response
+
+    async def list_reservations(number: int) -> Response:
+        return await client.get("/api/v1/reservations/", params={"size": args.page})
+
+    async def list_by_table(number: int) -> Response:
+        return await client.get(
+            "/api/v1/reservations/",
+            params={"size": args.page, "table_id": rnd.choice(table_ids)},
+        )
+
+    async def list_tables(number: int) -> Response:
+        return await client.get("/api/v1/tables/", params={"size": args.page})
+
+    async def delete(number: int) -> Response:
+        return await client.delete(f"/api/v1/reservations/{created[number]}")
+
+    results = []
+    try:
+        async with AsyncClient(app=app, base_url="http://benchmark") as client:
+            await run_scenario("warmup", args.clients, args.clients, list_tables)
+
+            results.append(
+                await run_scenario(
+                    "reservations:create_contended",
+                    args.clients,
+                    args.requests,
+                    create,
+                )
+            )
+            for name, send in (
+                ("reservations:list", list_reservations),
+                ("reservations:list_by_table", list_by_table),
+                ("tables:list", list_tables),
+            ):
+                results.append(
+                    await run_scenario(name, args.clients, args.requests, send)
+                )
+            results.append(
+                await run_scenario(
+                    "reservations:delete", args.clients, len(created), delete
+                )
+            )
+    finally:
+        if not args.keep:
+            await cleanup(database.engine, table_ids)
+        await database.dispose()
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--tables", type=int, default=100, help="количество столиков")
+    parser.add_argument(
+        "--reservations", type=int, default=10000, help="количество бронирований"
+    )
+    parser.add_argument(
+        "--clients", type=int, default=20, help="количество параллельных клиентов"
+    )
+    parser.add_argument(
+        "--requests", type=int, default=2000, help="количество запросов в сценарии"
+    )
+    parser.add_argument(
+        "--hot-tables",
+        type=int,
+        default=5,
+        help="количество столиков, за которые конкурируют клиенты при создании",
+    )
+    parser.add_argument(
+        "--slots", type=int, default=200, help="количество слотов на столик"
+    )
+    parser.add_argument("--page", type=int, default=50, help="размер страницы")
+    parser.add_argument("--seed", type=int, default=1, help="зерно генератора")
+    parser.add_argument(
+        "--output", default="benchmark-api.json", help="файл результатов"
+    )
+    parser.add_argument(
+        "--keep", action="store_true", help="не удалять данные после запуска"
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_results(results)
+
+    params = {
+        key: value for key, value in vars(args).items() if key not in ("output", "keep")
+    }
+    write_results(args.output, "api", params, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Сравнение двух файлов результатов тестов производительности.
+
+Пример::
+
+    python -m benchmarks.compare before.json after.json
+"""
+
+import argparse
+import json
+from typing import Any, Dict
+
+#: сравниваемые показатели и признак «больше — лучше»
+METRICS = {
+    "throughput_per_s": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+}
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("before", help="результаты до изменений")
+    parser.add_argument("after", help="результаты после изменений")
+    args = parser.parse_args()
+
+    before, after = load(args.before), load(args.after)
+    previous = {result["name"]: result for result in before["results"]}
+
+    print(f"{before.get('revision')} -> {after.get('revision')}")
+    for result in after["results"]:
+        base = previous.get(result["name"])
+        if base is None:
+            continue
+
+        changes = []
+        for metric, higher_is_better in METRICS.items():
+            old, new = base[metric], result[metric]
+            if not old:
+                continue
+            delta = (new - old) / old * 100
+            worse = delta < 0 if higher_is_better else delta > 0
+            mark = " (хуже)" if worse else ""
+            changes.append(f"{metric}: {old} -> {new} ({delta:+.1f}%){mark}")
+
+        print(f"{result['name']}:")
+        for change in changes:
+            print(f"    {change}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Стресс-тест стратегий конкурентного создания бронирований.
+
+Для каждой стратегии (CONCURRENCY__STRATEGY) --clients параллельных
+клиентов выполняют --requests попыток бронирования --tables столиков
+на --slots пересекающихся промежутков времени (каждая сессия — отдельное
+соединение). После прогона проверяется, что пересекающихся бронирований
+нет, и выводятся пропускная способность и перцентили задержки.
+
+Стратегии, кроме constraint, работают с копией таблицы reservation без
+ограничения-исключения и триггера проверки пересечений (unconstrained):
+иначе двойные бронирования исключала бы сама БД, а не стратегия.
+
+Пример::
+
+    python -m benchmarks.concurrency --clients 50 --requests 2000 --tables 5
+
+Данные запуска удаляются после завершения.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager, nullcontext
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List
+
+from sqlalchemy import Integer, TextClause, bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from benchmarks.api import cleanup, seed
+from benchmarks.results import print_results, summarize, write_results
+from exceptions import ApiHTTPException
+from integrations.db.session import database
+from models.models import Reservation
+from repositories.reservation_repository import ReservationRepository
+from settings import ConcurrencySettings, ConcurrencyStrategy, settings
+
+#: длительность бронирований; слоты сдвинуты на полчаса и пересекаются
+DURATION_MINUTES = 60
+SLOT_STEP = timedelta(minutes=30)
+
+DOUBLE_BOOKINGS: TextClause = text(
+    """
+    SELECT count(*)
+    FROM reservation AS a
+    JOIN reservation AS b
+        ON b.table_id = a.table_id AND b.id > a.id AND b.period && a.period
+    WHERE a.table_id = ANY(:table_ids)
+    """
+).bindparams(bindparam("table_ids", type_=ARRAY(Integer)))
+
+#: копия reservation без ограничения-исключения, триггеров и внешних ключей;
+#: id берётся из общей последовательности, period вычисляется как в исходной
+UNCONSTRAINED = [
+    "CREATE SCHEMA {schema}",
+    "CREATE TABLE {schema}.reservation "
+    "(LIKE public.reservation INCLUDING DEFAULTS INCLUDING GENERATED)",
+    "ALTER TABLE {schema}.reservation ADD PRIMARY KEY (id)",
+    "CREATE INDEX ON {schema}.reservation (table_id, reservation_time)",
+]
+
+
+@asynccontextmanager
+async def unconstrained(database_url: str) -> AsyncIterator[AsyncEngine]:
+    """
+    Движок БД, запросы которого к reservation попадают в копию таблицы
+    без защиты от пересечений (search_path начинается с отдельной схемы,
+    остальные таблицы и функции — из public). Схема удаляется на выходе.
+
+    :param database_url: адрес БД
+    :return: движок БД
+    """
+
+    schema = f"stress_{uuid.uuid4().hex[:8]}"
+    admin = create_async_engine(database_url)
+    async with admin.begin() as connection:
+        for statement in UNCONSTRAINED:
+            await connection.execute(text(statement.format(schema=schema)))
+
+    db_engine = create_async_engine(
+        database_url,
+        connect_args={"server_settings": {"search_path": f"{schema}, public"}},
+    )
+    try:
+        yield db_engine
+    finally:
+        await db_engine.dispose()
+        async with admin.begin() as connection:
+            await connection.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+        await admin.dispose()
+
+
+async def stress(
+    db_engine: AsyncEngine,
+    config: ConcurrencySettings,
+    table_ids: List[int],
+    clients: int,
+    requests: int,
+    slots: int,
+    rng: random.Random,
+) -> Dict[str, Any]:
+    """
+    Параллельное создание пересекающихся бронирований.
+
+    :param db_engine: движок БД
+    :param config: стратегия конкурентного создания
+    :param table_ids: столики, за которые конкурируют клиенты
+    :param clients: количество параллельных клиентов
+    :param requests: общее количество попыток
+    :param slots: количество слотов на столик
+    :param rng: генератор случайных чисел
+    :return: сводка с количеством пересекающихся бронирований (double_bookings)
+    """
+
+    make_session = async_sessionmaker(db_engine, expire_on_commit=False)
+    start = datetime.now(timezone.utc).replace(
+        minute=0, second=0, microsecond=0
+    ) + timedelta(days=1)
+    attempts = [
+        (rng.choice(table_ids), start + rng.randrange(slots) * SLOT_STEP)
+        for _ in range(requests)
+    ]
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def client(number: int) -> None:
+        for table_id, reservation_time in attempts[number::clients]:
+            began = time.perf_counter()
+            try:
+                async with make_session() as session:
+                    await ReservationRepository(session, config).create(
+                        Reservation(
+                            customer_name="stress",
+                            table_id=table_id,
+                            reservation_time=reservation_time,
+                            duration_minutes=DURATION_MINUTES,
+                        )
+                    )
+                statuses[200] += 1
+            except ApiHTTPException as exc:
+                statuses[exc.status_code] += 1
+            except Exception as exc:  # pylint: disable=broad-except
+                statuses[type(exc).__name__] += 1
+            latencies.append(time.perf_counter() - began)
+
+    began = time.perf_counter()
+    await asyncio.gather(*(client(number) for number in range(clients)))
+    elapsed = time.perf_counter() - began
+
+    name = config.strategy.value + (":per_day" if config.lock_per_day else "")
+    result = summarize(name, latencies, elapsed, statuses)
+    async with db_engine.connect() as connection:
+        result["double_bookings"] = await connection.scalar(
+            DOUBLE_BOOKINGS, {"table_ids": table_ids}
+        )
+    return result
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    configs = [
+        ConcurrencySettings(strategy=ConcurrencyStrategy.CONSTRAINT),
+        ConcurrencySettings(strategy=ConcurrencyStrategy.ADVISORY_LOCK),
+        ConcurrencySettings(
+            strategy=ConcurrencyStrategy.ADVISORY_LOCK, lock_per_day=True
+        ),
+        ConcurrencySettings(strategy=ConcurrencyStrategy.SERIALIZABLE),
+    ]
+    rng = random.Random(args.seed)
+    results = []
+    for config in configs:
+        table_ids = await seed(
+            database.engine, f"bench-{uuid.uuid4().hex[:8]}-", args.tables, 0
+        )
+        # стратегия constraint проверяется на исходной таблице
+        engines = (
+            nullcontext(database.engine)
+            if config.strategy == ConcurrencyStrategy.CONSTRAINT
+            else unconstrained(settings.database_url)
+        )
+        try:
+            async with engines as db_engine:
+                results.append(
+                    await stress(
+                        db_engine,
+                        config,
+                        table_ids,
+                        args.clients,
+                        args.requests,
+                        args.slots,
+                        rng,
+                    )
+                )
+        finally:
+            await cleanup(database.engine, table_ids)
+    await database.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--tables", type=int, default=5, help="количество столиков")
+    parser.add_argument(
+        "--clients", type=int, default=20, help="количество параллельных клиентов"
+    )
+    parser.add_argument(
+        "--requests", type=int, default=1000, help="количество попыток бронирования"
+    )
+    parser.add_argument(
+        "--slots", type=int, default=48, help="количество слотов на столик"
+    )
+    parser.add_argument("--seed", type=int, default=1, help="зерно генератора")
+    parser.add_argument(
+        "--output", default="benchmark-concurrency.json", help="файл результатов"
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_results(results)
+    for result in results:
+        print(
+            f"{result['name']}: пересекающихся бронирований {result['double_bookings']}"
+        )
+
+    params = {key: value for key, value in vars(args).items() if key != "output"}
+    write_results(args.output, "concurrency", params, results)
+
+
+if __name__ == "__main__":
+    main()
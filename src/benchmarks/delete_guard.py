@@ -0,0 +1,140 @@
+"""
+Проверка перед удалением столика: полный просмотр против индекса.
+
+Во временной таблице с той же структурой, что и reservation, создаются
+--rows бронирований для --tables столиков. Для одного столика все
+бронирования в прошлом, для другого есть будущее, у третьего бронирований
+нет. Затем измеряется время
+выполнения на сервере (EXPLAIN ANALYZE) прежней проверки (выборка любого
+бронирования столика) и новой (EXISTS по текущим и будущим бронированиям)
+до и после создания индексов из миграции 6a3e9b2c4d15.
+
+Пример::
+
+    python -m benchmarks.delete_guard --rows 10000000 --tables 10000
+
+Основная таблица reservation не изменяется.
+"""
+
+import argparse
+import asyncio
+from typing import Any, Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from benchmarks.results import print_results, summarize, write_results
+from integrations.db.session import database
+
+SETUP = [
+    """
+    CREATE TEMPORARY TABLE bench_reservation (
+        id bigint GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+        table_id integer NOT NULL,
+        reservation_time timestamptz NOT NULL,
+        duration_minutes integer NOT NULL,
+        period tstzrange GENERATED ALWAYS AS
+            (reservation_period(reservation_time, duration_minutes)) STORED
+    ) ON COMMIT DROP
+    """,
+    # каждый столик: бронирования каждые 2 часа, последние — в прошлом;
+    # у столика 2 последнее бронирование переносится в будущее
+    """
+    INSERT INTO bench_reservation (table_id, reservation_time, duration_minutes)
+    SELECT
+        n % :tables + 1,
+        now() - interval '1 day' - (n / :tables) * interval '2 hours',
+        60
+    FROM generate_series(0, :rows - 1) AS n
+    """,
+    """
+    UPDATE bench_reservation SET reservation_time = now() + interval '1 day'
+    WHERE id = (SELECT max(id) FROM bench_reservation WHERE table_id = 2)
+    """,
+    "ANALYZE bench_reservation",
+]
+INDEXES = [
+    "CREATE INDEX ON bench_reservation (table_id, reservation_time, id)",
+    "CREATE INDEX ON bench_reservation (table_id, upper(period))",
+    "ANALYZE bench_reservation",
+]
+#: прежняя проверка: все бронирования столика (из них бралось первое)
+OLD_GUARD = "SELECT * FROM bench_reservation WHERE table_id = :table_id"
+#: новая проверка: есть ли текущие или будущие бронирования
+NEW_GUARD = """
+    SELECT EXISTS (
+        SELECT 1 FROM bench_reservation
+        WHERE table_id = :table_id AND upper(period) > now()
+    )
+"""
+#: столики: 1 — только прошедшие бронирования, 2 — есть будущее,
+#: 0 — без бронирований
+CASES = {"past_only": 1, "has_future": 2, "no_reservations": 0}
+#: этапы замера: полный просмотр, затем с индексами из миграции
+STAGES: Dict[str, List[str]] = {"seqscan": [], "index": INDEXES}
+
+
+async def measure(
+    connection: AsyncConnection, name: str, query: str, table_id: int, repeat: int
+) -> Dict[str, Any]:
+    timings = []
+    for _ in range(repeat):
+        result = await connection.execute(
+            text(f"EXPLAIN (ANALYZE, FORMAT JSON) {query}"), {"table_id": table_id}
+        )
+        timings.append(result.scalar_one()[0]["Execution Time"] / 1000)
+    return summarize(name, timings, sum(timings))
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    results = []
+    async with database.engine.connect() as connection:
+        async with connection.begin():
+            for statement in SETUP:
+                await connection.execute(
+                    text(statement), {"rows": args.rows, "tables": args.tables}
+                )
+
+            for stage, statements in STAGES.items():
+                for statement in statements:
+                    await connection.execute(text(statement))
+                for case, table_id in CASES.items():
+                    for guard, query in (("old", OLD_GUARD), ("exists", NEW_GUARD)):
+                        results.append(
+                            await measure(
+                                connection,
+                                f"{stage}:{guard}:{case}",
+                                query,
+                                table_id,
+                                args.repeat,
+                            )
+                        )
+    await database.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--rows", type=int, default=10_000_000, help="количество бронирований"
+    )
+    parser.add_argument(
+        "--tables", type=int, default=10_000, help="количество столиков"
+    )
+    parser.add_argument("--repeat", type=int, default=20, help="количество повторов")
+    parser.add_argument(
+        "--output", default="benchmark-delete-guard.json", help="файл результатов"
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_results(results)
+
+    params = {key: value for key, value in vars(args).items() if key != "output"}
+    write_results(args.output, "delete_guard", params, results)
+
+
+if __name__ == "__main__":
+    main()
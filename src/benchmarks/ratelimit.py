@@ -0,0 +1,162 @@
+"""
+Микротест накладных расходов ограничения частоты запросов и отклонения
+запросов при перегрузке.
+
+Запросы к маршрутам приложения передаются напрямую в цепочку ASGI
+с пустым обработчиком (без маршрутизации и БД), поэтому время запроса —
+это время самих промежуточных слоёв. Клиенты и пути с идентификаторами
+чередуются, ограничения не срабатывают.
+
+Пример::
+
+    python -m benchmarks.ratelimit --number 20000 --repeat 20
+
+Результаты сохраняются в JSON.
+"""
+
+import argparse
+import asyncio
+import itertools
+import time
+from typing import Any, Dict, Iterator, List
+
+from benchmarks.results import print_results, summarize, write_results
+from integrations.metrics import DecayingAverage
+from integrations.ratelimit import (
+    LoadShedder,
+    LoadSheddingMiddleware,
+    MemoryBuckets,
+    RateLimitMiddleware,
+)
+from main import app
+from settings import LoadSheddingSettings, RateLimitSettings
+
+#: пути запросов (шаблоны маршрутов с разными идентификаторами)
+PATHS = [
+    ("GET", "/api/v1/tables/"),
+    ("GET", "/api/v1/tables/{id}"),
+    ("GET", "/api/v1/reservations/"),
+    ("POST", "/api/v1/reservations/"),
+    ("GET", "/api/v1/tables/{id}/reservations"),
+]
+
+
+async def endpoint(scope: Any, receive: Any, send: Any) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def receive() -> Dict[str, Any]:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message: Dict[str, Any]) -> None:
+    pass
+
+
+def scopes(clients: int, ids: int) -> Iterator[Dict[str, Any]]:
+    requests = itertools.product(range(clients), range(ids), PATHS)
+    for client, item_id, (method, path) in itertools.cycle(requests):
+        yield {
+            "type": "http",
+            "method": method,
+            "path": path.format(id=item_id),
+            "headers": [],
+            "client": (f"10.0.{client // 256}.{client % 256}", 40000),
+        }
+
+
+def cases(clients: int) -> Dict[str, Any]:
+    """
+    Измеряемые цепочки промежуточных слоёв.
+
+    :param clients: количество клиентов
+    :return:
+    """
+
+    # ограничения с запасом: все запросы проходят полный путь
+    limits = RateLimitSettings(rate=1e9, burst=10**9, routes={})
+    shedding = LoadSheddingSettings(max_in_flight=10**9)
+
+    def rate_limit(inner: Any) -> Any:
+        return RateLimitMiddleware(
+            inner, app.router.routes, MemoryBuckets(clients * 10), limits
+        )
+
+    def load_shedding(inner: Any) -> Any:
+        return LoadSheddingMiddleware(inner, LoadShedder(shedding, DecayingAverage()))
+
+    return {
+        "baseline": endpoint,
+        "rate_limit": rate_limit(endpoint),
+        "load_shedding": load_shedding(endpoint),
+        "rate_limit+load_shedding": load_shedding(rate_limit(endpoint)),
+    }
+
+
+async def measure(
+    name: str, chain: Any, requests: Iterator[Dict[str, Any]], number: int, repeat: int
+) -> Dict[str, Any]:
+    """
+    Измерение цепочки: repeat серий по number запросов.
+
+    :param name: название цепочки
+    :param chain: приложение ASGI
+    :param requests: запросы
+    :param number: количество запросов в серии
+    :param repeat: количество серий
+    :return: сводка
+    """
+
+    timings = []
+    for _ in range(repeat):
+        batch = list(itertools.islice(requests, number))
+        started_at = time.perf_counter()
+        for scope in batch:
+            await chain(scope, receive, send)
+        timings.append(time.perf_counter() - started_at)
+
+    result = summarize(name, [timing / number for timing in timings], sum(timings))
+    result["operations"] = number * repeat
+    result["throughput_per_s"] = round(number * repeat / sum(timings), 2)
+    return result
+
+
+async def run(number: int, repeat: int, clients: int, ids: int) -> List[Dict[str, Any]]:
+    return [
+        await measure(name, chain, scopes(clients, ids), number, repeat)
+        for name, chain in cases(clients).items()
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--number", type=int, default=20000, help="количество запросов в серии"
+    )
+    parser.add_argument("--repeat", type=int, default=20, help="количество серий")
+    parser.add_argument("--clients", type=int, default=1000, help="количество клиентов")
+    parser.add_argument(
+        "--ids", type=int, default=100, help="количество идентификаторов в путях"
+    )
+    parser.add_argument(
+        "--output", default="benchmark-ratelimit.json", help="файл результатов"
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.number, args.repeat, args.clients, args.ids))
+    print_results(results)
+    # среднее время запроса меньше точности перцентилей (мкс)
+    baseline = 1 / results[0]["throughput_per_s"]
+    for result in results[1:]:
+        overhead = (1 / result["throughput_per_s"] - baseline) * 1_000_000
+        print(f"{result['name']}: +{overhead:.2f} мкс на запрос")
+
+    params = {key: value for key, value in vars(args).items() if key != "output"}
+    write_results(args.output, "ratelimit", params, results)
+
+
+if __name__ == "__main__":
+    main()
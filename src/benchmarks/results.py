@@ -0,0 +1,114 @@
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Перцентиль отсортированной выборки (метод ближайшего ранга).
+
+    :param values: отсортированные значения
+    :param q: перцентиль от 0 до 100
+    :return:
+    """
+
+    if not values:
+        return 0.0
+
+    rank = max(0, min(len(values) - 1, round(q / 100 * len(values)) - 1))
+    return values[rank]
+
+
+def summarize(
+    name: str,
+    latencies: Iterable[float],
+    elapsed: float,
+    statuses: Optional[Dict[Any, int]] = None,
+) -> Dict[str, Any]:
+    """
+    Сводка по одному сценарию: пропускная способность и перцентили задержки.
+
+    :param name: название сценария
+    :param latencies: задержки отдельных операций в секундах
+    :param elapsed: общее время выполнения сценария в секундах
+    :param statuses: количество ответов по кодам статуса
+    :return:
+    """
+
+    values = sorted(latencies)
+    return {
+        "name": name,
+        "operations": len(values),
+        "elapsed_s": round(elapsed, 4),
+        "throughput_per_s": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+        "statuses": {str(key): count for key, count in (statuses or {}).items()},
+    }
+
+
+def git_revision() -> Optional[str]:
+    """
+    Текущий коммит рабочей копии (если доступен git).
+
+    :return:
+    """
+
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(
+    path: str, suite: str, params: Dict[str, Any], results: List[Dict[str, Any]]
+) -> None:
+    """
+    Сохранение результатов в JSON для сравнения между коммитами.
+
+    :param path: путь к файлу результатов
+    :param suite: название набора тестов производительности
+    :param params: параметры запуска
+    :param results: сводки сценариев
+    :return:
+    """
+
+    report = {
+        "suite": suite,
+        "revision": git_revision(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "params": params,
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    """
+    Вывод сводок сценариев в виде таблицы.
+
+    :param results: сводки сценариев
+    :return:
+    """
+
+    print(
+        f"{'scenario':<32}{'ops':>8}{'ops/s':>12}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  statuses"
+    )
+    for result in results:
+        print(
+            f"{result['name']:<32}{result['operations']:>8}"
+            f"{result['throughput_per_s']:>12}{result['p50_ms']:>10}"
+            f"{result['p95_ms']:>10}{result['p99_ms']:>10}  {result['statuses']}"
+        )
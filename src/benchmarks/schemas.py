@@ -0,0 +1,107 @@
+"""
+Микротесты производительности слоя схем: валидация ReservationCreate
+и сериализация ReservationRead.
+
+Пример::
+
+    python -m benchmarks.schemas --number 10000 --repeat 30
+"""
+
+import argparse
+import timeit
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+from benchmarks.results import print_results, summarize, write_results
+from schemas.schemas import ReservationCreate, ReservationRead
+
+CREATE_PAYLOAD = {
+    "customer_name": "Иван Петров",
+    "table_id": 1,
+    "reservation_time": "2030-05-01T19:30:00Z",
+    "duration_minutes": 90,
+}
+READ_ROW = {
+    "id": 1,
+    "customer_name": "Иван Петров",
+    "table_id": 1,
+    "reservation_time": datetime(2030, 5, 1, 19, 30, tzinfo=timezone.utc),
+    "duration_minutes": 90,
+}
+
+
+def cases(batch: int) -> Dict[str, Callable[[], Any]]:
+    """
+    Измеряемые операции.
+
+    :param batch: количество записей в операциях над списком
+    :return:
+    """
+
+    read = ReservationRead.parse_obj(READ_ROW)
+    rows = [dict(READ_ROW, id=number) for number in range(batch)]
+
+    return {
+        "ReservationCreate:validate": lambda: ReservationCreate.parse_obj(
+            CREATE_PAYLOAD
+        ),
+        "ReservationRead:from_row": lambda: ReservationRead.parse_obj(READ_ROW),
+        "ReservationRead:dict": read.dict,
+        "ReservationRead:json": read.json,
+        f"ReservationRead:list_{batch}": lambda: [
+            ReservationRead.parse_obj(row).json() for row in rows
+        ],
+    }
+
+
+def measure(
+    name: str, case: Callable[[], Any], number: int, repeat: int
+) -> Dict[str, Any]:
+    """
+    Измерение операции: repeat серий по number вызовов.
+
+    Перцентили вычисляются по среднему времени вызова в каждой серии.
+
+    :param name: название операции
+    :param case: операция
+    :param number: количество вызовов в серии
+    :param repeat: количество серий
+    :return: сводка
+    """
+
+    timings = timeit.repeat(case, number=number, repeat=repeat)
+    result = summarize(name, [timing / number for timing in timings], sum(timings))
+    result["operations"] = number * repeat
+    result["throughput_per_s"] = round(number * repeat / sum(timings), 2)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--number", type=int, default=5000, help="количество вызовов в серии"
+    )
+    parser.add_argument("--repeat", type=int, default=20, help="количество серий")
+    parser.add_argument(
+        "--batch", type=int, default=100, help="размер списка для сериализации"
+    )
+    parser.add_argument(
+        "--output", default="benchmark-schemas.json", help="файл результатов"
+    )
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = []
+    for name, case in cases(args.batch).items():
+        # операции над списком заметно дольше одиночных
+        number = max(1, args.number // args.batch) if "list" in name else args.number
+        results.append(measure(name, case, number, args.repeat))
+    print_results(results)
+
+    params = {key: value for key, value in vars(args).items() if key != "output"}
+    write_results(args.output, "schemas", params, results)
+
+
+if __name__ == "__main__":
+    main()
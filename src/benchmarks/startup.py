@@ -0,0 +1,216 @@
+"""
+Профилирование запуска приложения.
+
+Импорт приложения выполняется в отдельном процессе с ``-X importtime``,
+выводится время импорта по пакетам (собственное время модулей) и самые
+долгие модули проекта (вместе с зависимостями). Затем --repeat раз
+измеряется время от запуска процесса интерпретатора до ответа на первый
+запрос (--path): импорт, события startup и сам запрос.
+
+Пример::
+
+    python -m benchmarks.startup --repeat 5 --path /api/v1/tables/
+
+Результаты сохраняются в JSON.
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, NamedTuple
+
+from benchmarks.results import print_results, summarize, write_results
+
+#: модули проекта (первый компонент имени)
+PROJECT_PACKAGES = {
+    "main",
+    "bootstrap",
+    "settings",
+    "exceptions",
+    "routes",
+    "integrations",
+    "models",
+    "repositories",
+    "schemas",
+    "services",
+    "transport",
+}
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+#: импорт приложения, события startup и первый запрос в новом процессе;
+#: выводит моменты (time.time()) окончания каждого этапа
+FIRST_REQUEST = """
+import asyncio, json, sys, time
+
+from httpx import AsyncClient
+
+from main import app
+
+imported = time.time()
+
+
+async def first_request():
+    async with AsyncClient(app=app, base_url="http://startup") as client:
+        await app.router.startup()
+        started = time.time()
+        response = await client.get(sys.argv[1])
+        answered = time.time()
+        await app.router.shutdown()
+    print(json.dumps({
+        "imported": imported,
+        "started": started,
+        "answered": answered,
+        "status": response.status_code,
+    }))
+
+
+asyncio.run(first_request())
+"""
+
+
+class ImportRecord(NamedTuple):
+    #: модуль
+    module: str
+    #: собственное время импорта в секундах
+    self_time: float
+    #: время импорта вместе с зависимостями в секундах
+    cumulative: float
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """
+    Разбор вывода ``python -X importtime``.
+
+    :param output: вывод в stderr
+    :return: записи по модулям
+    """
+
+    records = []
+    for line in output.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            records.append(
+                ImportRecord(
+                    match[4], int(match[1]) / 1_000_000, int(match[2]) / 1_000_000
+                )
+            )
+    return records
+
+
+def profile_imports(module: str = "main") -> List[ImportRecord]:
+    """
+    Время импорта модуля в новом процессе.
+
+    :param module: импортируемый модуль
+    :return: записи по всем загруженным модулям
+    """
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def by_package(records: List[ImportRecord]) -> Dict[str, float]:
+    """
+    Собственное время импорта, сгруппированное по пакетам верхнего уровня.
+
+    :param records: записи по модулям
+    :return: время в секундах по убыванию
+    """
+
+    totals: Dict[str, float] = defaultdict(float)
+    for record in records:
+        totals[record.module.split(".")[0]] += record.self_time
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def first_request(path: str) -> Dict[str, Any]:
+    """
+    Время до ответа на первый запрос в новом процессе.
+
+    :param path: путь запроса
+    :return: длительность этапов в секундах от запуска процесса
+    """
+
+    launched = time.time()
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_REQUEST, path],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    marks = json.loads(result.stdout.strip().splitlines()[-1])
+    return {
+        "import": marks["imported"] - launched,
+        "startup": marks["started"] - marks["imported"],
+        "first_request": marks["answered"] - marks["started"],
+        "total": marks["answered"] - launched,
+        "status": marks["status"],
+    }
+
+
+def print_imports(records: List[ImportRecord], top: int) -> None:
+    total = sum(record.self_time for record in records)
+    print(f"импорт: {len(records)} модулей, {total * 1000:.1f} мс")
+    print(f"{'package':<40}{'self ms':>10}")
+    for package, self_time in list(by_package(records).items())[:top]:
+        print(f"{package:<40}{self_time * 1000:>10.1f}")
+
+    print(f"\n{'project module':<40}{'cumulative ms':>16}")
+    project = [
+        record for record in records if record.module.split(".")[0] in PROJECT_PACKAGES
+    ]
+    for record in sorted(project, key=lambda record: -record.cumulative)[:top]:
+        print(f"{record.module:<40}{record.cumulative * 1000:>16.1f}")
+    print()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--path", default="/api/v1/tables/", help="путь первого запроса"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="количество запусков")
+    parser.add_argument("--top", type=int, default=15, help="количество строк отчёта")
+    parser.add_argument(
+        "--output", default="benchmark-startup.json", help="файл результатов"
+    )
+    args = parser.parse_args()
+
+    records = profile_imports()
+    print_imports(records, args.top)
+
+    runs = [first_request(args.path) for _ in range(args.repeat)]
+    statuses = Counter(run["status"] for run in runs)
+    results = [
+        summarize(
+            stage,
+            [run[stage] for run in runs],
+            sum(run[stage] for run in runs),
+            statuses if stage == "first_request" else None,
+        )
+        for stage in ("import", "startup", "first_request", "total")
+    ]
+    print_results(results)
+
+    params = {key: value for key, value in vars(args).items() if key != "output"}
+    write_results(
+        args.output,
+        "startup",
+        {**params, "import_by_package_s": by_package(records)},
+        results,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Сравнение пропускной способности при разном количестве рабочих процессов.
+
+Для каждого значения --workers запускается ``python -m server`` на
+--port, после готовности выполняется --requests запросов списка столиков
+от --clients параллельных клиентов по HTTP, затем сервер останавливается
+по SIGTERM (проверяется, что остановка прошла без ошибок).
+
+Пример::
+
+    python -m benchmarks.workers --workers 1 4 --clients 50 --requests 5000
+
+Клиенты работают в одном процессе, поэтому при большом количестве
+рабочих процессов упором может стать сама нагрузка; для точных измерений
+используйте отдельную машину. Данные запуска удаляются после завершения.
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+import uuid
+from typing import Any, Dict, List
+
+from httpx import AsyncClient, HTTPError, Limits, Response
+
+from benchmarks.api import cleanup, run_scenario, seed
+from benchmarks.results import print_results, write_results
+from integrations.db.session import database
+from server import default_workers
+
+
+def start_server(workers: int, port: int) -> "subprocess.Popen[bytes]":
+    """
+    Запуск сервера в отдельном процессе.
+
+    :param workers: количество рабочих процессов
+    :param port: порт
+    :return: процесс сервера
+    """
+
+    return subprocess.Popen(  # pylint: disable=consider-using-with
+        [
+            sys.executable,
+            "-m",
+            "server",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--no-access-log",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+
+
+async def wait_ready(
+    process: "subprocess.Popen[bytes]", url: str, timeout: float = 30
+) -> None:
+    """
+    Ожидание готовности сервера.
+
+    :param process: процесс сервера
+    :param url: адрес проверочного запроса
+    :param timeout: максимальное время ожидания в секундах
+    :return:
+    """
+
+    deadline = time.monotonic() + timeout
+    async with AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"Сервер завершился с кодом {process.returncode}")
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise TimeoutError(f"Сервер не ответил за {timeout} с")
+
+
+def stop_server(process: "subprocess.Popen[bytes]", timeout: float = 60) -> int:
+    """
+    Плавная остановка сервера по SIGTERM.
+
+    :param process: процесс сервера
+    :param timeout: максимальное время ожидания в секундах
+    :return: код завершения
+    """
+
+    process.send_signal(signal.SIGTERM)
+    try:
+        return process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        raise
+
+
+async def measure(args: argparse.Namespace, workers: int) -> Dict[str, Any]:
+    base_url = f"http://127.0.0.1:{args.port}"
+    process = start_server(workers, args.port)
+    try:
+        await wait_ready(process, f"{base_url}/api/v1/tables/?size=1")
+        limits = Limits(max_connections=args.clients)
+        async with AsyncClient(base_url=base_url, limits=limits) as client:
+
+            async def list_tables(number: int) -> Response:
+                return await client.get("/api/v1/tables/", params={"size": args.page})
+
+            await run_scenario("warmup", args.clients, args.clients * 4, list_tables)
+            result = await run_scenario(
+                f"tables:list:workers={workers}",
+                args.clients,
+                args.requests,
+                list_tables,
+            )
+    finally:
+        exit_code = stop_server(process)
+    result["exit_code"] = exit_code
+    return result
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+    table_ids = await seed(database.engine, prefix, args.tables, 0)
+    try:
+        return [await measure(args, workers) for workers in args.workers]
+    finally:
+        await cleanup(database.engine, table_ids)
+        await database.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, default_workers()}),
+        help="сравниваемые количества рабочих процессов",
+    )
+    parser.add_argument("--port", type=int, default=8100, help="порт сервера")
+    parser.add_argument("--tables", type=int, default=100, help="количество столиков")
+    parser.add_argument(
+        "--clients", type=int, default=20, help="количество параллельных клиентов"
+    )
+    parser.add_argument(
+        "--requests", type=int, default=2000, help="количество запросов"
+    )
+    parser.add_argument("--page", type=int, default=10, help="размер страницы")
+    parser.add_argument(
+        "--output", default="benchmark-workers.json", help="файл результатов"
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_results(results)
+    for result in results:
+        print(f"{result['name']}: код завершения {result['exit_code']}")
+
+    params = {key: value for key, value in vars(args).items() if key != "output"}
+    write_results(args.output, "workers", params, results)
+
+
+if __name__ == "__main__":
+    main()
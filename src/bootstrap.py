@@ -1,7 +1,19 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 from exceptions import setup_exception_handlers
+from integrations.db.partitions import setup_partitions
+from integrations.db.session import setup_database
+from integrations.events.dispatcher import setup_events
+from integrations.events.stream import setup_stream
+from integrations.metrics import setup_metrics
+from integrations.profiling import setup_profiling
+from integrations.ratelimit import setup_rate_limit
 from routes import metadata_tags, setup_routes
+from services.booking import setup_booking
+from services.daily_occupancy import setup_daily_occupancy
+from services.idempotency import setup_idempotency_cleanup
+from services.retention import setup_retention
 from settings import settings
 
 
@@ -14,10 +26,27 @@ def build_app() -> FastAPI:
         "title": f'API системы "{settings.project.title}"',
         "description": settings.project.description,
         "version": settings.project.release_version,
+        "default_response_class": (
+            ORJSONResponse if settings.fast_json else JSONResponse
+        ),
     }
     app = FastAPI(**app_params)
 
     setup_routes(app)
     setup_exception_handlers(app)
+    setup_partitions(app)
+    # до метрик: отклонённые запросы учитываются в метриках
+    setup_rate_limit(app)
+    setup_profiling(app)
+    setup_metrics(app)
+    setup_booking(app)
+    setup_idempotency_cleanup(app)
+    setup_retention(app)
+    setup_daily_occupancy(app)
+    setup_events(app)
+    setup_stream(app)
+    # последним: события shutdown выполняются по порядку, и пулы соединений
+    # закрываются после остановки фоновых задач и записи бронирований
+    setup_database(app)
 
     return app
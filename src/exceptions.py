@@ -5,6 +5,8 @@ from fastapi.exceptions import RequestValidationError
 from pydantic import BaseModel
 from starlette.responses import JSONResponse
 
+from integrations.metrics import API_ERRORS
+
 
 class ApiHTTPException(HTTPException):
     """Обработка ошибок API."""
@@ -43,6 +45,22 @@ class ConflictException(ApiHTTPException):
     detail = "Конфликт с существующими данными."
 
 
+class TooManyRequestsException(ApiHTTPException):
+    """Превышено допустимое количество запросов клиента."""
+
+    status_code = status.HTTP_429_TOO_MANY_REQUESTS
+    code = "too_many_requests"
+    detail = "Слишком много запросов, повторите запрос позже."
+
+
+class ServiceUnavailableException(ApiHTTPException):
+    """Запрос временно не может быть выполнен, его можно повторить."""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    code = "service_unavailable"
+    detail = "Сервис временно недоступен, повторите запрос позже."
+
+
 def setup_exception_handlers(app: FastAPI) -> None:
     """
     Назначение обработчиков исключений.
@@ -63,6 +81,7 @@ def setup_exception_handlers(app: FastAPI) -> None:
         :return:
         """
 
+        API_ERRORS.labels(ValidationErrorException.code).inc()
         return api_http_exception(ValidationErrorException(detail=exc.errors()))
 
     @app.exception_handler(ApiHTTPException)
@@ -77,6 +96,7 @@ def setup_exception_handlers(app: FastAPI) -> None:
         :return:
         """
 
+        API_ERRORS.labels(exc.code).inc()
         return api_http_exception(exc)
 
     @app.exception_handler(Exception)
@@ -89,6 +109,7 @@ def setup_exception_handlers(app: FastAPI) -> None:
         :return:
         """
 
+        API_ERRORS.labels("server_error").inc()
         return api_exception(exc)
 
 
@@ -0,0 +1,85 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Tuple
+
+#: признак отсутствия значения в кэше (None — допустимое значение)
+MISSING = object()
+
+
+class MemoryBackend:
+    """
+    Хранилище кэша в памяти процесса: LRU ограниченного размера
+    со временем жизни записей.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    async def get(self, key: str) -> Any:
+        item = self._items.get(key)
+        if item is None:
+            return MISSING
+
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._items[key]
+            return MISSING
+
+        self._items.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any) -> None:
+        self._items[key] = (time.monotonic() + self.ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    async def clear(self) -> None:
+        self._items.clear()
+
+
+class RedisBackend:
+    """
+    Хранилище кэша в Redis (или совместимом сервере), общее для всех процессов.
+
+    Каждая запись — отдельный ключ со временем жизни (SET ... EX), поэтому
+    устаревшие записи удаляет сам Redis, а при нехватке памяти они
+    вытесняются политикой volatile-*. Ключи записей содержат номер
+    поколения пространства имён: сброс кэша — это одна команда INCR,
+    записи прежнего поколения больше не читаются и истекают сами.
+    Значения должны сериализоваться в JSON.
+    """
+
+    def __init__(self, client: Any, namespace: str, ttl: float):
+        self.client = client
+        self.namespace = namespace
+        self.ttl = ttl
+        self._generation_key = f"{namespace}:generation"
+
+    def __len__(self) -> int:
+        # количество ключей доступно только асинхронно, локальных записей нет
+        return 0
+
+    async def _key(self, key: str) -> str:
+        generation = await self.client.get(self._generation_key)
+        return f"{self.namespace}:{int(generation or 0)}:{key}"
+
+    async def get(self, key: str) -> Any:
+        raw = await self.client.get(await self._key(key))
+        if raw is None:
+            return MISSING
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any) -> None:
+        await self.client.set(
+            await self._key(key), json.dumps(value), ex=max(int(self.ttl), 1)
+        )
+
+    async def clear(self) -> None:
+        await self.client.incr(self._generation_key)
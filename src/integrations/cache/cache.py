@@ -0,0 +1,113 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+from integrations.cache.backends import MISSING, MemoryBackend, RedisBackend
+from settings import CacheSettings
+
+Backend = Union[MemoryBackend, RedisBackend]
+
+
+class Cache:
+    """
+    Кэш с объединением одновременных промахов (single-flight).
+
+    Если несколько запросов одновременно не нашли значение по одному ключу,
+    загрузка выполняется один раз, остальные запросы ждут её результата.
+    """
+
+    def __init__(self, backend: Optional[Backend]):
+        #: хранилище (None — кэш отключён)
+        self.backend = backend
+        #: количество попаданий
+        self.hits = 0
+        #: количество промахов
+        self.misses = 0
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+        self._generation = 0
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Получение значения из кэша или его загрузка при отсутствии.
+
+        :param key: ключ
+        :param loader: загрузка значения
+        :return:
+        """
+
+        if self.backend is None:
+            return await loader()
+
+        value = await self.backend.get(key)
+        if value is not MISSING:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        generation = self._generation
+        try:
+            value = await loader()
+        except BaseException as exc:
+            future.set_exception(exc)
+            # ожидающих может не быть, исключение считается обработанным
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        # значение, загруженное до сброса кэша, могло устареть
+        if generation == self._generation:
+            await self.backend.set(key, value)
+        future.set_result(value)
+        return value
+
+    async def clear(self) -> None:
+        """
+        Сброс всех значений кэша.
+
+        :return:
+        """
+
+        self._generation += 1
+        if self.backend is not None:
+            await self.backend.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Счётчики для подбора размера и времени жизни кэша.
+
+        :return:
+        """
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.backend) if self.backend is not None else 0,
+        }
+
+
+def create_cache(namespace: str, config: CacheSettings) -> Cache:
+    """
+    Создание кэша по настройкам.
+
+    :param namespace: пространство имён ключей в общем хранилище
+    :param config: настройки кэша
+    :return:
+    """
+
+    if config.ttl <= 0:
+        return Cache(None)
+
+    if config.redis_url:
+        # клиент Redis нужен только при использовании общего хранилища
+        from redis import asyncio as redis  # pylint: disable=import-outside-toplevel
+
+        client = redis.from_url(config.redis_url)
+        return Cache(RedisBackend(client, namespace, config.ttl))
+
+    return Cache(MemoryBackend(config.ttl, config.max_size))
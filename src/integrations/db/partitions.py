@@ -0,0 +1,207 @@
+"""
+Обслуживание секций таблицы бронирований.
+
+Таблица reservation секционирована по месяцам reservation_time (UTC).
+Команда создаёт секции на --ahead месяцев вперёд и отсоединяет секции
+старше --retain месяцев: они переносятся в схему archive, где наследуют
+таблицу reservation_archive (запросы к архиву читают и их), или удаляются
+(--drop).
+
+Пример::
+
+    python -m integrations.db.partitions --ahead 3 --retain 24
+"""
+
+import argparse
+import asyncio
+import logging
+import re
+from datetime import date, datetime, timezone
+from typing import List
+
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from integrations.db.session import database
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+#: схема для отсоединённых секций
+ARCHIVE_SCHEMA = "archive"
+#: имя месячной секции: reservation_yГГГГmММ
+PARTITION_NAME = re.compile(r"^reservation_y(\d{4})m(\d{2})$")
+
+CREATE_PARTITIONS = text(
+    """
+    SELECT reservation_create_partition(month::date)
+    FROM generate_series(
+        date_trunc('month', now() AT TIME ZONE 'UTC'),
+        date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => :ahead),
+        interval '1 month'
+    ) AS month
+    """
+)
+PARTITIONS = text(
+    """
+    SELECT child.relname
+    FROM pg_inherits
+    JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+    WHERE pg_inherits.inhparent = 'reservation'::regclass
+    ORDER BY child.relname
+    """
+)
+#: сдвиг границы архива до окончания последнего бронирования секции
+EXTEND_BOUNDARY = """
+    INSERT INTO reservation_archive_boundary (id, archived_until)
+    SELECT 1, max(upper(period)) FROM {partition} HAVING count(*) > 0
+    ON CONFLICT (id) DO UPDATE SET archived_until = greatest(
+        reservation_archive_boundary.archived_until, excluded.archived_until
+    )
+"""
+FOREIGN_KEYS = text(
+    """
+    SELECT conname FROM pg_constraint
+    WHERE conrelid = CAST(:partition AS regclass) AND contype = 'f'
+    """
+)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+async def create_partitions(connection: AsyncConnection, ahead: int) -> List[str]:
+    """
+    Создание секций с текущего месяца на ahead месяцев вперёд.
+
+    Бронирования этих месяцев из секции по умолчанию переносятся
+    в созданные секции.
+
+    :param connection: соединение с БД
+    :param ahead: количество месяцев вперёд
+    :return: имена созданных секций
+    """
+
+    result = await connection.execute(CREATE_PARTITIONS, {"ahead": ahead})
+    return [name for name in result.scalars() if name]
+
+
+async def archive_partitions(
+    connection: AsyncConnection, retain: int, drop: bool = False
+) -> List[str]:
+    """
+    Отсоединение секций, которые целиком старше retain месяцев.
+
+    Отсоединённая секция переносится в схему archive (или удаляется),
+    её внешние ключи удаляются, чтобы архив не мешал удалять столики.
+    Перенесённая секция наследует таблицу reservation_archive, а граница
+    архива сдвигается до окончания её последнего бронирования: запросы
+    к архиву находят бронирования секции.
+
+    :param connection: соединение с БД
+    :param retain: количество хранимых месяцев, включая текущий
+    :param drop: удалять секции вместо переноса в архив
+    :return: имена отсоединённых секций
+    """
+
+    today = datetime.now(timezone.utc).date()
+    first_kept = add_months(today.replace(day=1), 1 - retain)
+
+    archived = []
+    for partition in (await connection.execute(PARTITIONS)).scalars():
+        match = PARTITION_NAME.match(partition)
+        if not match or date(int(match[1]), int(match[2]), 1) >= first_kept:
+            continue
+
+        await connection.execute(
+            text(f'ALTER TABLE reservation DETACH PARTITION "{partition}"')
+        )
+        if drop:
+            await connection.execute(text(f'DROP TABLE "{partition}"'))
+        else:
+            result = await connection.execute(FOREIGN_KEYS, {"partition": partition})
+            for constraint in result.scalars().all():
+                await connection.execute(
+                    text(f'ALTER TABLE "{partition}" DROP CONSTRAINT "{constraint}"')
+                )
+            await connection.execute(
+                text(f'CREATE SCHEMA IF NOT EXISTS "{ARCHIVE_SCHEMA}"')
+            )
+            await connection.execute(
+                text(f'ALTER TABLE "{partition}" SET SCHEMA "{ARCHIVE_SCHEMA}"')
+            )
+            archived_partition = f'"{ARCHIVE_SCHEMA}"."{partition}"'
+            await connection.execute(
+                text(
+                    f"ALTER TABLE {archived_partition} ADD COLUMN archived_at "
+                    "timestamptz NOT NULL DEFAULT now()"
+                )
+            )
+            await connection.execute(
+                text(f"ALTER TABLE {archived_partition} INHERIT reservation_archive")
+            )
+            await connection.execute(
+                text(EXTEND_BOUNDARY.format(partition=archived_partition))
+            )
+        archived.append(partition)
+
+    return archived
+
+
+def setup_partitions(app: FastAPI) -> None:
+    """
+    Создание секций на ближайшие месяцы при запуске приложения.
+
+    :param app:
+    :return:
+    """
+
+    ahead = settings.database.partitions_ahead
+    if not ahead:
+        return
+
+    @app.on_event("startup")
+    async def create_upcoming_partitions() -> None:
+        async with database.engine.begin() as connection:
+            created = await create_partitions(connection, ahead)
+        if created:
+            logger.info("Созданы секции: %s", ", ".join(created))
+
+
+async def maintain(ahead: int, retain: int, drop: bool) -> None:
+    async with database.engine.begin() as connection:
+        created = await create_partitions(connection, ahead)
+        archived = await archive_partitions(connection, retain, drop) if retain else []
+    await database.dispose()
+
+    logger.info("Созданы секции: %s", ", ".join(created) or "-")
+    logger.info("Отсоединены секции: %s", ", ".join(archived) or "-")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--ahead", type=int, default=3, help="количество месяцев вперёд"
+    )
+    parser.add_argument(
+        "--retain",
+        type=int,
+        default=0,
+        help="количество хранимых месяцев (0 — не отсоединять секции)",
+    )
+    parser.add_argument(
+        "--drop", action="store_true", help="удалять старые секции вместо архивации"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(maintain(args.ahead, args.retain, args.drop))
+
+
+if __name__ == "__main__":
+    main()
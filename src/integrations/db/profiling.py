@@ -0,0 +1,267 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from integrations.metrics import request_stats
+from settings import ProfilingSettings
+
+logger = logging.getLogger(__name__)
+
+#: опция выполнения, отключающая журнал для запроса (запросы EXPLAIN)
+PROFILING_OPTION = "profiling"
+#: максимальное количество одновременно получаемых планов выполнения
+MAX_PENDING_EXPLAINS = 4
+
+#: запросы на чтение без блокировки строк
+READ_ONLY = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+WRITES = re.compile(
+    r"\b(INSERT|UPDATE|DELETE|MERGE)\b|\bFOR\s+(NO\s+KEY\s+)?(UPDATE|SHARE|KEY\s+SHARE)\b",
+    re.IGNORECASE,
+)
+#: имя перед скобкой: вызов функции, ключевое слово или тип
+CALLS = re.compile(r"([A-Za-z_][\w$.]*)\s*\(")
+#: имена перед скобкой, с которыми запрос на чтение можно выполнить повторно
+#: (EXPLAIN ANALYZE): функции без побочных эффектов, ключевые слова и типы;
+#: запрос с любым другим вызовом (pg_advisory_xact_lock, pg_notify, nextval,
+#: функции приложения) не выполняется
+SAFE_CALLS = frozenset(
+    {
+        # ключевые слова и типы
+        "all",
+        "and",
+        "any",
+        "array",
+        "as",
+        "cast",
+        "char",
+        "character",
+        "exists",
+        "filter",
+        "from",
+        "in",
+        "interval",
+        "join",
+        "lateral",
+        "not",
+        "numeric",
+        "on",
+        "or",
+        "over",
+        "row",
+        "select",
+        "timestamp",
+        "using",
+        "values",
+        "varchar",
+        "varying",
+        "where",
+        "within",
+        # агрегатные и оконные функции
+        "array_agg",
+        "avg",
+        "bool_and",
+        "bool_or",
+        "count",
+        "dense_rank",
+        "json_agg",
+        "jsonb_agg",
+        "lag",
+        "lead",
+        "max",
+        "min",
+        "rank",
+        "row_number",
+        "string_agg",
+        "sum",
+        # функции без побочных эффектов
+        "abs",
+        "coalesce",
+        "date_part",
+        "date_trunc",
+        "extract",
+        "generate_series",
+        "greatest",
+        "isempty",
+        "json_build_object",
+        "jsonb_build_object",
+        "least",
+        "length",
+        "lower",
+        "lower_inf",
+        "now",
+        "nullif",
+        "reservation_period",
+        "round",
+        "timezone",
+        "to_char",
+        "tstzrange",
+        "unnest",
+        "upper",
+        "upper_inf",
+    }
+)
+
+#: задачи получения планов выполнения (ссылки, чтобы задачи не были удалены)
+pending_explains: Set["asyncio.Task[None]"] = set()
+
+
+def explain_statement(statement: str) -> str:
+    """
+    Запрос плана выполнения.
+
+    Запросы на чтение, вызывающие только функции из SAFE_CALLS, выполняются
+    повторно (ANALYZE, BUFFERS); для остальных запросов (изменяющих данные,
+    блокирующих строки, вызывающих другие функции) выводится только план.
+
+    :param statement: SQL-запрос
+    :return: запрос EXPLAIN
+    """
+
+    safe = all(name.lower() in SAFE_CALLS for name in CALLS.findall(statement))
+    if safe and READ_ONLY.match(statement) and not WRITES.search(statement):
+        return f"EXPLAIN (ANALYZE, BUFFERS) {statement}"
+    return f"EXPLAIN {statement}"
+
+
+async def explain(
+    engine: AsyncEngine,
+    statement: str,
+    parameters: Any,
+    config: ProfilingSettings,
+) -> None:
+    """
+    Вывод в журнал плана выполнения медленного запроса.
+
+    План получается в отдельном соединении в транзакции, которая затем
+    откатывается. Откат отменяет не всё: повторно выполняемый запрос берёт
+    блокировки (в том числе рекомендательные) и расходует значения
+    последовательностей, поэтому выполняются только запросы, которые
+    explain_statement считает безопасными.
+
+    :param engine: движок БД
+    :param statement: SQL-запрос с параметрами драйвера
+    :param parameters: значения параметров
+    :param config: настройки профилирования
+    :return:
+    """
+
+    # задача получает копию контекста запроса: EXPLAIN не учитывается в его статистике
+    request_stats.set(None)
+    try:
+        async with engine.connect() as connection:
+            async with connection.begin() as transaction:
+                options = {PROFILING_OPTION: False}
+                if config.explain_timeout:
+                    await connection.exec_driver_sql(
+                        f"SET LOCAL statement_timeout = {config.explain_timeout}",
+                        execution_options=options,
+                    )
+                result = await connection.exec_driver_sql(
+                    explain_statement(statement), parameters, execution_options=options
+                )
+                plan = "\n".join(result.scalars())
+                await transaction.rollback()
+    except Exception:  # pylint: disable=broad-except
+        logger.warning(
+            "Не удалось получить план запроса:\n%s", statement, exc_info=True
+        )
+        return
+
+    logger.warning("План медленного SQL-запроса:\n%s\n%s", statement, plan)
+
+
+def instrument_profiling(engine: AsyncEngine, config: ProfilingSettings) -> None:
+    """
+    Подключение журнала медленных SQL-запросов и журнала запросов
+    профилируемого HTTP-запроса к движку БД.
+
+    Запросы дольше ``config.slow_query_ms`` записываются в журнал вместе
+    с параметрами, план выполнения получается в фоновой задаче и
+    записывается отдельным сообщением.
+
+    :param engine: движок БД
+    :param config: настройки профилирования
+    :return:
+    """
+
+    threshold = (
+        config.slow_query_ms / 1000 if config.slow_query_ms is not None else None
+    )
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(
+        conn: Any,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        context.profiling_started_at = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(
+        conn: Any,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        if not context.execution_options.get(PROFILING_OPTION, True):
+            return
+        duration = time.perf_counter() - context.profiling_started_at
+        logged_parameters = parameters if config.log_parameters else "..."
+
+        stats = request_stats.get()
+        if stats is not None and stats.profile:
+            logger.info(
+                "SQL-запрос (%.1f мс): %s; параметры: %s",
+                duration * 1000,
+                statement,
+                logged_parameters,
+            )
+
+        if threshold is None or duration < threshold:
+            return
+        logger.warning(
+            "Медленный SQL-запрос (%.1f мс): %s; параметры: %s",
+            duration * 1000,
+            statement,
+            logged_parameters,
+        )
+        if config.slow_query_explain and not executemany:
+            schedule_explain(engine, statement, parameters, config)
+
+
+def schedule_explain(
+    engine: AsyncEngine, statement: str, parameters: Any, config: ProfilingSettings
+) -> None:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    if len(pending_explains) >= MAX_PENDING_EXPLAINS:
+        logger.info("План запроса не получен: слишком много запросов EXPLAIN")
+        return
+
+    task = loop.create_task(explain(engine, statement, parameters, config))
+    pending_explains.add(task)
+    task.add_done_callback(pending_explains.discard)
+
+
+async def wait_explains(timeout: Optional[float] = None) -> None:
+    """
+    Ожидание получения запланированных планов выполнения.
+
+    :param timeout: максимальное время ожидания в секундах
+    :return:
+    """
+
+    if pending_explains:
+        await asyncio.wait(set(pending_explains), timeout=timeout)
@@ -0,0 +1,99 @@
+import itertools
+import logging
+import time
+from typing import Callable, List, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import ExceptionContext
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaRouter:
+    """
+    Выбор реплики БД для запросов на чтение.
+
+    Реплики перебираются по кругу. Реплика, к которой не удалось подключиться
+    или соединение с которой разорвано, исключается на retry_interval секунд.
+    Если исправных реплик нет, чтение выполняется на основной БД.
+    """
+
+    def __init__(
+        self,
+        replicas: Sequence[AsyncEngine],
+        primary: AsyncEngine,
+        retry_interval: float,
+    ):
+        self.replicas = list(replicas)
+        self.primary = primary
+        self.retry_interval = retry_interval
+        self._ejected_until: List[float] = [0.0] * len(self.replicas)
+        self._counter = itertools.count()
+
+        for index, replica in enumerate(self.replicas):
+            event.listen(
+                replica.sync_engine, "handle_error", self._error_listener(index)
+            )
+
+    def choose(self) -> AsyncEngine:
+        """
+        Выбор следующей исправной реплики (или основной БД).
+
+        :return:
+        """
+
+        now = time.monotonic()
+        for _ in range(len(self.replicas)):
+            index = next(self._counter) % len(self.replicas)
+            if self._ejected_until[index] <= now:
+                return self.replicas[index]
+
+        return self.primary
+
+    def eject(self, replica: AsyncEngine) -> None:
+        """
+        Исключение реплики из ротации на retry_interval секунд.
+
+        :param replica: реплика
+        :return:
+        """
+
+        for index, candidate in enumerate(self.replicas):
+            if candidate is replica:
+                logger.warning("Реплика %s исключена из ротации", replica.url)
+                self._ejected_until[index] = time.monotonic() + self.retry_interval
+
+    async def session(self) -> AsyncSession:
+        """
+        Создание сессии для чтения с уже установленным соединением.
+
+        Соединение открывается сразу, чтобы недоступная реплика была
+        исключена до выполнения запросов обработчика.
+
+        :return:
+        """
+
+        for _ in range(len(self.replicas)):
+            engine = self.choose()
+            if engine is self.primary:
+                break
+
+            session = AsyncSession(engine, expire_on_commit=False)
+            try:
+                await session.connection()
+            except (OSError, DBAPIError):
+                await session.close()
+                self.eject(engine)
+                continue
+            return session
+
+        return AsyncSession(self.primary, expire_on_commit=False)
+
+    def _error_listener(self, index: int) -> Callable[[ExceptionContext], None]:
+        def on_error(context: ExceptionContext) -> None:
+            if context.is_disconnect:
+                self.eject(self.replicas[index])
+
+        return on_error
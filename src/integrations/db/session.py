@@ -1,13 +1,155 @@
-from typing import AsyncGenerator
+import asyncio
+from typing import Any, AsyncGenerator, Dict, List, Optional
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import NullPool
 
-from settings import settings
+from integrations.db.profiling import instrument_profiling, wait_explains
+from integrations.db.routing import ReplicaRouter
+from integrations.metrics import InstrumentedQueuePool, instrument_engine
+from settings import DatabaseSettings, ProfilingSettings, settings
 
-engine = create_async_engine(settings.database_url, echo=True, future=True)
 
-async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+def create_engine(
+    database_url: str,
+    config: DatabaseSettings,
+    profiling: ProfilingSettings = settings.profiling,
+) -> AsyncEngine:
+    """
+    Создание движка БД с параметрами пула соединений из настроек,
+    измерением времени выполнения запросов и журналом медленных запросов.
+
+    :param database_url: строка подключения к БД
+    :param config: настройки подключения к БД
+    :param profiling: настройки профилирования SQL-запросов
+    :return:
+    """
+
+    connect_args: Dict[str, Any] = {}
+    if config.statement_timeout:
+        connect_args["server_settings"] = {
+            "statement_timeout": str(config.statement_timeout)
+        }
+
+    if config.pgbouncer:
+        # PgBouncer в режиме transaction pooling не сохраняет подготовленные
+        # выражения между транзакциями, а пулом соединений управляет сам
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_cache_size"] = 0
+        db_engine = create_async_engine(
+            database_url,
+            future=True,
+            poolclass=NullPool,
+            connect_args=connect_args,
+        )
+        instrument_engine(db_engine)
+        instrument_profiling(db_engine, profiling)
+        return db_engine
+
+    connect_args["prepared_statement_cache_size"] = config.statement_cache_size
+    db_engine = create_async_engine(
+        database_url,
+        future=True,
+        poolclass=InstrumentedQueuePool,
+        pool_size=config.pool_size,
+        max_overflow=config.max_overflow,
+        pool_timeout=config.pool_timeout,
+        pool_pre_ping=config.pool_pre_ping,
+        pool_recycle=config.pool_recycle,
+        connect_args=connect_args,
+    )
+    instrument_engine(db_engine)
+    instrument_profiling(db_engine, profiling)
+    return db_engine
+
+
+class Database:
+    """
+    Движки БД приложения, создаваемые при первом обращении.
+
+    Импорт модуля не создаёт движков и не загружает драйвер БД, поэтому
+    не замедляет запуск процесса. Движки создаются при запуске приложения
+    (или при первом запросе) и освобождаются при его остановке; после
+    :meth:`dispose` следующее обращение создаёт их заново, например
+    в дочернем процессе после fork.
+    """
+
+    def __init__(self) -> None:
+        self._engine: Optional[AsyncEngine] = None
+        self._session_factory: Optional[async_sessionmaker[AsyncSession]] = None
+        self._replica_engines: List[AsyncEngine] = []
+        self._replica_router: Optional[ReplicaRouter] = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        """Движок основной БД."""
+
+        if self._engine is None:
+            self._engine = create_engine(settings.database_url, settings.database)
+        return self._engine
+
+    @property
+    def replica_router(self) -> ReplicaRouter:
+        """Выбор реплики для запросов на чтение."""
+
+        if self._replica_router is None:
+            self._replica_engines = [
+                create_engine(url, settings.database)
+                for url in settings.database_replica_urls
+            ]
+            self._replica_router = ReplicaRouter(
+                self._replica_engines,
+                self.engine,
+                settings.database.replica_retry_interval,
+            )
+        return self._replica_router
+
+    @property
+    def engines(self) -> List[AsyncEngine]:
+        """Движки основной БД и реплик."""
+
+        return [self.engine, *self.replica_router.replicas]
+
+    def session(self) -> AsyncSession:
+        """Создание сессии основной БД."""
+
+        if self._session_factory is None:
+            self._session_factory = async_sessionmaker(
+                self.engine, expire_on_commit=False
+            )
+        return self._session_factory()
+
+    async def dispose(self) -> None:
+        """
+        Закрытие соединений всех созданных движков.
+
+        :return:
+        """
+
+        for db_engine in [self._engine, *self._replica_engines]:
+            if db_engine is not None:
+                await db_engine.dispose()
+
+        self._engine = None
+        self._session_factory = None
+        self._replica_engines = []
+        self._replica_router = None
+
+
+database = Database()
+
+
+def async_session() -> AsyncSession:
+    """
+    Создание сессии основной БД (движок создаётся при первом вызове).
+    """
+    return database.session()
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
@@ -16,3 +158,58 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
     """
     async with async_session() as session:
         yield session
+
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Получение объекта сессии для запросов на чтение.
+
+    Сессия подключается к одной из реплик (или к основной БД, если реплики
+    не настроены или недоступны), поэтому данные могут отставать
+    от основной БД на время репликации.
+    """
+    async with await database.replica_router.session() as session:
+        yield session
+
+
+async def warm_up_engine(db_engine: AsyncEngine, connections: int) -> None:
+    """
+    Предварительное открытие соединений пула, чтобы первые запросы
+    не тратили время на установку соединения.
+
+    :param db_engine: движок БД
+    :param connections: количество соединений
+    :return:
+    """
+
+    if connections <= 0 or isinstance(db_engine.pool, NullPool):
+        return
+
+    opened = await asyncio.gather(*(db_engine.connect() for _ in range(connections)))
+    for connection in opened:
+        await connection.close()
+
+
+def setup_database(app: FastAPI) -> None:
+    """
+    Привязка жизненного цикла движков БД к запуску и остановке приложения.
+
+    Движки создаются и прогреваются при запуске, а при остановке
+    освобождаются и сбрасываются.
+
+    :param app:
+    :return:
+    """
+
+    connections = min(settings.database.pool_warmup, settings.database.pool_size)
+
+    @app.on_event("startup")
+    async def warm_up_pool() -> None:
+        await asyncio.gather(
+            *(warm_up_engine(db_engine, connections) for db_engine in database.engines)
+        )
+
+    @app.on_event("shutdown")
+    async def dispose_pool() -> None:
+        await wait_explains(timeout=5)
+        await database.dispose()
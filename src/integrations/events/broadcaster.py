@@ -0,0 +1,166 @@
+import asyncio
+import json
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Optional, Set
+
+from settings import settings
+
+#: тип служебного сообщения: часть событий пропущена, данные нужно перечитать
+RESYNC = "resync"
+
+
+class Message:
+    """
+    Событие для подписчиков, закодированное один раз для всех соединений.
+    """
+
+    __slots__ = ("type", "table_id", "location", "text", "sse")
+
+    def __init__(self, event_type: str, data: Dict[str, Any]):
+        self.type = event_type
+        # у событий столиков идентификатор столика — id
+        self.table_id: Optional[int] = data.get("table_id", data.get("id"))
+        self.location: Optional[str] = data.get("location")
+        self.text = json.dumps(
+            {"type": event_type, "data": data}, ensure_ascii=False, default=str
+        )
+        self.sse = f"event: {event_type}\ndata: {self.text}\n\n".encode()
+
+
+class Subscription:
+    """
+    Подписка на события с фильтром по столику и (или) расположению.
+
+    Очередь ограничена: при переполнении удаляется самое старое событие,
+    а подписчик перед следующим событием получает сообщение ``resync``.
+    """
+
+    __slots__ = ("table_id", "location", "queue", "ready", "dropped")
+
+    def __init__(self, table_id: Optional[int], location: Optional[str], size: int):
+        self.table_id = table_id
+        self.location = location
+        self.queue: Deque[Message] = deque(maxlen=size)
+        self.ready = asyncio.Event()
+        self.dropped = 0
+
+    def matches(self, message: Message) -> bool:
+        if message.type == RESYNC:
+            return True
+        if self.table_id is not None and message.table_id != self.table_id:
+            return False
+        return self.location is None or message.location == self.location
+
+    def put(self, message: Message) -> None:
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+        self.queue.append(message)
+        self.ready.set()
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Message]:
+        """
+        Следующее событие.
+
+        :param timeout: время ожидания в секундах
+        :return: событие (None, если за время ожидания событий не было)
+        """
+
+        if not self.queue:
+            self.ready.clear()
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            return Message(RESYNC, {"dropped": dropped})
+        return self.queue.popleft()
+
+
+class Broadcaster:
+    """
+    Рассылка событий подписчикам процесса.
+
+    Подписки проиндексированы по столику и расположению, поэтому событие
+    проверяется только для подписок, которые могут его получить.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = settings.stream.queue_size,
+        max_subscribers: int = settings.stream.max_subscribers,
+    ):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._count = 0
+        self._all: Set[Subscription] = set()
+        self._by_table: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._by_location: Dict[str, Set[Subscription]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def is_full(self) -> bool:
+        return self._count >= self.max_subscribers
+
+    def subscribe(
+        self, table_id: Optional[int] = None, location: Optional[str] = None
+    ) -> Subscription:
+        """
+        Создание подписки.
+
+        :param table_id: только события столика
+        :param location: только события столиков в этом расположении
+        :return:
+        """
+
+        subscription = Subscription(table_id, location, self.queue_size)
+        self._index(subscription).add(subscription)
+        self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._index(subscription)
+        if subscription in subscriptions:
+            subscriptions.remove(subscription)
+            self._count -= 1
+        # пустые множества удаляются, чтобы индекс не рос
+        if not subscriptions and subscriptions is not self._all:
+            if subscription.table_id is not None:
+                self._by_table.pop(subscription.table_id, None)
+            else:
+                self._by_location.pop(subscription.location, None)  # type: ignore
+
+    def publish(self, message: Message) -> None:
+        """
+        Передача события подходящим подписчикам.
+
+        :param message: событие
+        :return:
+        """
+
+        if message.type == RESYNC:
+            groups = [self._all, *self._by_table.values(), *self._by_location.values()]
+        else:
+            groups = [self._all]
+            if message.table_id is not None and message.table_id in self._by_table:
+                groups.append(self._by_table[message.table_id])
+            if message.location is not None and message.location in self._by_location:
+                groups.append(self._by_location[message.location])
+
+        for subscriptions in groups:
+            for subscription in subscriptions:
+                if subscription.matches(message):
+                    subscription.put(message)
+
+    def _index(self, subscription: Subscription) -> Set[Subscription]:
+        if subscription.table_id is not None:
+            return self._by_table[subscription.table_id]
+        if subscription.location is not None:
+            return self._by_location[subscription.location]
+        return self._all
+
+
+broadcaster = Broadcaster()
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+from typing import Callable, Optional
+
+from fastapi import FastAPI
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from integrations.db.session import async_session
+from integrations.events.transport import Event, EventTransport, RabbitMQTransport
+from models.models import OutboxEvent
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxDispatcher:
+    """
+    Фоновая отправка событий из таблицы outbox брокеру сообщений.
+
+    Пачка событий выбирается SELECT ... FOR UPDATE SKIP LOCKED, отправляется
+    и удаляется из таблицы одной транзакцией. Если процесс завершится
+    после отправки, но до фиксации, пачка будет отправлена повторно
+    (доставка «хотя бы один раз», получатель исключает повторы
+    по идентификатору события). Несколько процессов отправляют разные
+    пачки параллельно, порядок событий гарантируется только внутри пачки.
+    """
+
+    def __init__(
+        self,
+        transport: EventTransport,
+        session_factory: Callable[[], AsyncSession] = async_session,
+        batch_size: int = settings.events.batch_size,
+        poll_interval: float = settings.events.poll_interval,
+        retry_interval: float = settings.events.retry_interval,
+    ):
+        self.transport = transport
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+
+    async def drain(self, session: AsyncSession) -> int:
+        """
+        Отправка одной пачки событий.
+
+        При ошибке отправки исключение передаётся вызывающему без фиксации
+        транзакции: события остаются в таблице outbox, блокировки снимаются
+        при закрытии сессии.
+
+        :param session: сессия БД
+        :return: количество отправленных событий
+        """
+
+        query: Select = select(
+            OutboxEvent.id,
+            OutboxEvent.event_type,
+            OutboxEvent.payload,
+            OutboxEvent.created_at,
+        ).order_by(OutboxEvent.id)
+        query = query.limit(self.batch_size)
+        query = query.with_for_update(skip_locked=True)
+        result = await session.execute(query)
+        events = [Event(*row) for row in result.all()]
+        if not events:
+            await session.commit()
+            return 0
+
+        await self.transport.send(events)
+        await session.execute(
+            delete(OutboxEvent).where(
+                OutboxEvent.id.in_([event.id for event in events])
+            ),
+            execution_options={"synchronize_session": False},
+        )
+        await session.commit()
+        return len(events)
+
+    async def run(self) -> None:
+        """
+        Отправка событий до отмены задачи.
+
+        Полные пачки отправляются без пауз, после пустой или неполной
+        пачки таблица опрашивается через poll_interval секунд.
+
+        :return:
+        """
+
+        while True:
+            try:
+                async with self.session_factory() as session:
+                    sent = await self.drain(session)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Ошибка отправки событий")
+                await asyncio.sleep(self.retry_interval)
+                continue
+
+            if sent < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+
+def setup_events(app: FastAPI, transport: Optional[EventTransport] = None) -> None:
+    """
+    Запуск фоновой отправки событий при запуске приложения.
+
+    :param app:
+    :param transport: способ доставки событий (по умолчанию RabbitMQ)
+    :return:
+    """
+
+    if not settings.events.enabled:
+        return
+
+    if transport is None:
+        transport = RabbitMQTransport(
+            settings.events.broker_url, settings.events.exchange
+        )
+    dispatcher = OutboxDispatcher(transport)
+    tasks = []
+
+    @app.on_event("startup")
+    async def start_dispatcher() -> None:
+        tasks.append(asyncio.create_task(dispatcher.run()))
+
+    @app.on_event("shutdown")
+    async def stop_dispatcher() -> None:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await dispatcher.transport.close()
@@ -0,0 +1,52 @@
+from typing import Any, Dict
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from integrations.events.stream import add_stream_events
+from models.models import OutboxEvent
+from settings import settings
+
+#: типы событий (ключи маршрутизации брокера)
+RESERVATION_CREATED = "reservation.created"
+RESERVATION_DELETED = "reservation.deleted"
+TABLE_CREATED = "table.created"
+TABLE_DELETED = "table.deleted"
+
+
+class EventProducer:
+    """
+    Запись событий в таблицу outbox.
+
+    События добавляются в сессию репозитория и сохраняются той же
+    транзакцией, что и изменение данных: событие не может быть потеряно
+    при сбое после фиксации изменения или отправлено для отменённого
+    изменения. Брокеру события отправляет
+    :class:`~integrations.events.dispatcher.OutboxDispatcher` вне обработки
+    запроса. Если включён поток изменений, события также рассылаются
+    его подписчикам после фиксации транзакции.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    def publish(self, event_type: str, *payloads: Dict[str, Any]) -> None:
+        """
+        Добавление событий в сессию без фиксации транзакции.
+
+        :param event_type: тип события
+        :param payloads: данные событий (по одному событию на каждый словарь)
+        :return:
+        """
+
+        if not (settings.events.enabled or settings.stream.enabled):
+            return
+
+        encoded = [jsonable_encoder(payload) for payload in payloads]
+        if settings.stream.enabled:
+            add_stream_events(self.session.sync_session, event_type, encoded)
+        if settings.events.enabled:
+            self.session.add_all(
+                OutboxEvent(event_type=event_type, payload=payload)
+                for payload in encoded
+            )
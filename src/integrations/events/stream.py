@@ -0,0 +1,230 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI
+from sqlalchemy import event, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from integrations.events.broadcaster import RESYNC, Broadcaster, Message, broadcaster
+from models.models import Table
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+#: идентификатор запуска: общий для процессов, созданных fork после импорта
+LAUNCH = uuid.uuid4().hex
+#: ключ session.info: события транзакции для потока изменений
+PENDING_KEY = "stream_events"
+#: ключ session.info: события, рассылаемые после фиксации транзакции
+COMMITTED_KEY = "stream_messages"
+
+NOTIFY = text("SELECT pg_notify(:channel, m) FROM unnest(CAST(:messages AS text[])) m")
+
+
+def origin() -> str:
+    """
+    Идентификатор процесса в уведомлениях: свои уведомления процесс
+    не рассылает повторно. Рабочие процессы python -m server создаются
+    fork после импорта модуля и различаются по pid.
+
+    :return:
+    """
+
+    return f"{LAUNCH}:{os.getpid()}"
+
+
+def add_stream_events(
+    session: Session, event_type: str, payloads: List[Dict[str, Any]]
+) -> None:
+    """
+    Добавление событий транзакции в поток изменений.
+
+    События рассылаются подписчикам только после фиксации транзакции.
+
+    :param session: сессия БД
+    :param event_type: тип события
+    :param payloads: данные событий (JSON-совместимые)
+    :return:
+    """
+
+    session.info.setdefault(PENDING_KEY, []).extend(
+        (event_type, payload) for payload in payloads
+    )
+
+
+def with_locations(
+    session: Session, events: List[Tuple[str, Dict[str, Any]]]
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Добавление расположения столика к событиям бронирований,
+    чтобы подписчики могли фильтровать их по расположению.
+
+    :param session: сессия БД
+    :param events: события транзакции
+    :return:
+    """
+
+    # столики, удалённые этой же транзакцией, известны по их событиям
+    locations = {
+        data["id"]: data.get("location")
+        for event_type, data in events
+        if event_type.startswith("table.")
+    }
+    missing = {
+        data["table_id"]
+        for _, data in events
+        if "table_id" in data and data["table_id"] not in locations
+    }
+    if missing:
+        query: Select = select(Table.id, Table.location).where(Table.id.in_(missing))
+        result = session.execute(query)
+        locations.update(result.tuples().all())
+
+    return [
+        (event_type, {**data, "location": locations.get(data["table_id"])})
+        if "table_id" in data
+        else (event_type, data)
+        for event_type, data in events
+    ]
+
+
+@event.listens_for(Session, "before_commit")
+def notify_stream(session: Session) -> None:
+    events = session.info.pop(PENDING_KEY, None)
+    if not events:
+        return
+
+    events = with_locations(session, events)
+    if settings.stream.listen:
+        # NOTIFY доставляется другим процессам только при фиксации транзакции
+        session.execute(
+            NOTIFY,
+            {
+                "channel": settings.stream.channel,
+                "messages": [
+                    json.dumps(
+                        {"origin": origin(), "type": event_type, "data": data},
+                        ensure_ascii=False,
+                        default=str,
+                    )
+                    for event_type, data in events
+                ],
+            },
+        )
+    session.info[COMMITTED_KEY] = events
+
+
+@event.listens_for(Session, "after_commit")
+def publish_stream(session: Session) -> None:
+    for event_type, data in session.info.pop(COMMITTED_KEY, ()):
+        broadcaster.publish(Message(event_type, data))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def discard_stream(session: Session, previous_transaction: Any) -> None:
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(COMMITTED_KEY, None)
+
+
+class StreamListener:
+    """
+    Получение изменений, зафиксированных другими процессами,
+    через LISTEN/NOTIFY.
+
+    Используется отдельное соединение вне пула (LISTEN требует постоянного
+    соединения и не работает через PgBouncer в режиме transaction pooling).
+    После разрыва соединения подписчики получают сообщение ``resync``:
+    изменения, сделанные за время переподключения, не доставляются.
+    """
+
+    def __init__(
+        self,
+        database_url: str,
+        channel: str = settings.stream.channel,
+        target: Broadcaster = broadcaster,
+        reconnect_interval: float = settings.stream.reconnect_interval,
+    ):
+        self.dsn = make_url(database_url).set(drivername="postgresql")
+        self.channel = channel
+        self.target = target
+        self.reconnect_interval = reconnect_interval
+        self.connection: Optional[Any] = None
+
+    def receive(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning("Некорректное уведомление в канале %s", channel)
+            return
+        if message.get("origin") != origin():
+            self.target.publish(Message(message["type"], message["data"]))
+
+    async def connect(self) -> None:
+        # драйвер БД загружается только при запуске приложения
+        import asyncpg  # pylint: disable=import-outside-toplevel
+
+        self.connection = await asyncpg.connect(
+            self.dsn.render_as_string(hide_password=False)
+        )
+        await self.connection.add_listener(self.channel, self.receive)
+
+    async def run(self) -> None:
+        """
+        Получение уведомлений до отмены задачи с переподключением
+        после разрыва соединения.
+
+        :return:
+        """
+
+        connected = self.connection is not None
+        try:
+            while True:
+                try:
+                    if self.connection is None or self.connection.is_closed():
+                        await self.connect()
+                        if connected:
+                            self.target.publish(Message(RESYNC, {}))
+                        connected = True
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception(
+                        "Не удалось подключиться к каналу %s", self.channel
+                    )
+                await asyncio.sleep(self.reconnect_interval)
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        if self.connection is not None and not self.connection.is_closed():
+            await self.connection.close()
+        self.connection = None
+
+
+def setup_stream(app: FastAPI) -> None:
+    """
+    Запуск получения изменений других процессов при запуске приложения.
+
+    :param app:
+    :return:
+    """
+
+    if not (settings.stream.enabled and settings.stream.listen):
+        return
+
+    listener = StreamListener(settings.database_url)
+    tasks = []
+
+    @app.on_event("startup")
+    async def start_listener() -> None:
+        tasks.append(asyncio.create_task(listener.run()))
+
+    @app.on_event("shutdown")
+    async def stop_listener() -> None:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,123 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Sequence
+
+
+@dataclass
+class Event:
+    """
+    Событие, отправляемое брокеру сообщений.
+    """
+
+    #: идентификатор записи outbox (для исключения повторов у получателя)
+    id: int
+    #: тип события
+    event_type: str
+    #: данные события
+    payload: Dict[str, Any]
+    #: дата и время создания события
+    created_at: datetime
+
+
+class EventTransport:
+    """
+    Способ доставки событий брокеру сообщений.
+
+    Метод :meth:`send` завершается только после того, как брокер принял
+    все события пачки, иначе выбрасывает исключение: тогда события остаются
+    в таблице outbox и отправляются повторно.
+    """
+
+    async def send(self, events: Sequence[Event]) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryTransport(EventTransport):
+    """
+    Накопление событий в памяти процесса (для тестов).
+    """
+
+    def __init__(self) -> None:
+        self.events: List[Event] = []
+
+    async def send(self, events: Sequence[Event]) -> None:
+        self.events.extend(events)
+
+
+class RabbitMQTransport(EventTransport):
+    """
+    Отправка событий в точку обмена RabbitMQ.
+
+    Клиент pika загружается при первой отправке, а не при импорте модуля.
+    Сообщения сохраняются брокером на диск (delivery_mode=2), отправка
+    ожидает подтверждения брокера (publisher confirms). Клиент pika
+    синхронный, поэтому он работает в отдельном потоке; соединение
+    открывается при первой отправке и переоткрывается после ошибки.
+    """
+
+    def __init__(self, url: str, exchange: str):
+        self.url = url
+        self.exchange = exchange
+        self._connection: Any = None
+        self._channel: Any = None
+        # соединение pika можно использовать только из одного потока
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    async def send(self, events: Sequence[Event]) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._send, events)
+
+    async def close(self) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._disconnect)
+        self._executor.shutdown(wait=False)
+
+    def _connect(self) -> Any:
+        import pika  # pylint: disable=import-outside-toplevel
+
+        if self._channel is None or not self._channel.is_open:
+            self._disconnect()
+            self._connection = pika.BlockingConnection(pika.URLParameters(self.url))
+            self._channel = self._connection.channel()
+            self._channel.confirm_delivery()
+            self._channel.exchange_declare(
+                self.exchange, exchange_type="topic", durable=True
+            )
+        return self._channel
+
+    def _disconnect(self) -> None:
+        if self._connection is not None and self._connection.is_open:
+            try:
+                self._connection.close()
+            except Exception:  # pylint: disable=broad-except
+                pass
+        self._connection = None
+        self._channel = None
+
+    def _send(self, events: Sequence[Event]) -> None:
+        import pika  # pylint: disable=import-outside-toplevel
+
+        try:
+            channel = self._connect()
+            for event in events:
+                channel.basic_publish(
+                    self.exchange,
+                    event.event_type,
+                    json.dumps(event.payload).encode(),
+                    pika.BasicProperties(
+                        content_type="application/json",
+                        delivery_mode=pika.DeliveryMode.Persistent,
+                        message_id=str(event.id),
+                        timestamp=int(event.created_at.timestamp()),
+                        type=event.event_type,
+                    ),
+                )
+        except Exception:
+            self._disconnect()
+            raise
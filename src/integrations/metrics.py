@@ -0,0 +1,231 @@
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from fastapi import FastAPI
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+#: путь, по которому отдаются метрики
+METRICS_PATH = "/metrics"
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ["method", "route", "status"],
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Время выполнения SQL-запроса",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "Количество SQL-запросов за HTTP-запрос",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds",
+    "Суммарное время SQL-запросов за HTTP-запрос",
+    ["route"],
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Время получения соединения из пула",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30),
+)
+API_ERRORS = Counter(
+    "api_errors_total",
+    "Количество ошибок API по кодам",
+    ["code"],
+)
+
+
+@dataclass
+class RequestStats:
+    """
+    Статистика SQL-запросов в рамках одного HTTP-запроса.
+    """
+
+    queries: int = 0
+    db_time: float = 0.0
+    #: время сериализации ответа
+    serialization_time: float = 0.0
+    #: момент завершения обработчика маршрута (time.perf_counter())
+    endpoint_finished_at: Optional[float] = None
+    #: журналирование всех SQL-запросов (профилирование по заголовку запроса)
+    profile: bool = False
+
+
+#: статистика текущего HTTP-запроса
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "request_stats", default=None
+)
+
+
+class DecayingAverage:
+    """
+    Экспоненциальное скользящее среднее, затухающее со временем.
+
+    Без новых значений среднее уменьшается вдвое за half_life секунд:
+    давняя перегрузка не влияет на текущие решения, даже если
+    значения перестали поступать.
+    """
+
+    def __init__(self, half_life: float = 1.0, alpha: float = 0.2):
+        self.half_life = half_life
+        self.alpha = alpha
+        self._value = 0.0
+        self._updated_at = time.monotonic()
+
+    def value(self, now: Optional[float] = None) -> float:
+        if now is None:
+            now = time.monotonic()
+        elapsed = max(0.0, now - self._updated_at)
+        return self._value * 0.5 ** (elapsed / self.half_life)
+
+    def add(self, sample: float, now: Optional[float] = None) -> None:
+        if now is None:
+            now = time.monotonic()
+        self._value = self.value(now) * (1 - self.alpha) + sample * self.alpha
+        self._updated_at = now
+
+
+#: среднее время ожидания соединения из пулов процесса
+pool_wait = DecayingAverage()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, измеряющий время ожидания свободного соединения.
+    """
+
+    def _do_get(self) -> Any:
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait = time.perf_counter() - started_at
+            POOL_CHECKOUT_WAIT.observe(wait)
+            pool_wait.add(wait)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Подключение измерения времени и количества SQL-запросов к движку БД.
+
+    :param engine: движок БД
+    :return:
+    """
+
+    # время начала хранится в контексте выполнения запроса: запрос,
+    # завершившийся ошибкой, не оставляет состояния в соединении пула
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(
+        conn: Any,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        context.query_started_at = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(
+        conn: Any,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        duration = time.perf_counter() - context.query_started_at
+        DB_QUERY_DURATION.observe(duration)
+
+        stats = request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += duration
+
+
+class MetricsMiddleware:
+    """
+    Измерение времени обработки запросов по маршрутам и количества
+    SQL-запросов на один HTTP-запрос.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] == METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+
+        stats = request_stats.get() or RequestStats()
+        token = request_stats.set(stats)
+        status = 500
+        started_at = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # шаблон маршрута, а не фактический путь: ограничивает число меток
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            REQUEST_LATENCY.labels(scope["method"], path, status).observe(
+                time.perf_counter() - started_at
+            )
+            DB_QUERIES_PER_REQUEST.labels(path).observe(stats.queries)
+            DB_TIME_PER_REQUEST.labels(path).observe(stats.db_time)
+            request_stats.reset(token)
+
+
+def setup_metrics(app: FastAPI) -> None:
+    """
+    Подключение сбора метрик и маршрута для их выдачи в формате Prometheus.
+
+    :param app:
+    :return:
+    """
+
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get(METRICS_PATH, include_in_schema=False)
+    async def metrics(request: Request) -> Response:
+        """
+        Метрики в текстовом формате Prometheus.
+
+        При запуске в несколько процессов (PROMETHEUS_MULTIPROC_DIR)
+        метрики всех процессов объединяются.
+        """
+
+        registry = None
+        if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)  # type: ignore[no-untyped-call]
+
+        data = generate_latest(registry) if registry else generate_latest()
+        return Response(content=data, media_type=CONTENT_TYPE_LATEST)
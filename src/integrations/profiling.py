@@ -0,0 +1,175 @@
+import asyncio
+import functools
+import hmac
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Coroutine, Iterator
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from integrations.metrics import RequestStats, request_stats
+from settings import settings
+
+
+@contextmanager
+def measure_serialization() -> Iterator[None]:
+    """
+    Учёт времени сериализации ответа в статистике текущего запроса.
+
+    :return:
+    """
+
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = request_stats.get()
+        if stats is not None:
+            stats.serialization_time += time.perf_counter() - started_at
+
+
+def mark_endpoint_finished(call: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Обёртка обработчика маршрута, отмечающая момент его завершения:
+    всё, что FastAPI делает после (проверка по response_model, кодирование
+    ответа), считается сериализацией.
+
+    :param call: обработчик маршрута
+    :return:
+    """
+
+    def finished() -> None:
+        stats = request_stats.get()
+        if stats is not None:
+            stats.endpoint_finished_at = time.perf_counter()
+
+    if asyncio.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def async_endpoint(*args: Any, **kwargs: Any) -> Any:
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                finished()
+
+        return async_endpoint
+
+    @functools.wraps(call)
+    def endpoint(*args: Any, **kwargs: Any) -> Any:
+        try:
+            return call(*args, **kwargs)
+        finally:
+            finished()
+
+    return endpoint
+
+
+class ProfiledRoute(APIRoute):
+    """
+    Маршрут, измеряющий время сериализации ответа.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        self.dependant.call = mark_endpoint_finished(self.endpoint)
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            response = await handler(request)
+            stats = request_stats.get()
+            if stats is not None and stats.endpoint_finished_at is not None:
+                stats.serialization_time += (
+                    time.perf_counter() - stats.endpoint_finished_at
+                )
+            return response
+
+        return route_handler
+
+
+def server_timing(stats: RequestStats, total: float) -> str:
+    """
+    Значение заголовка Server-Timing.
+
+    :param stats: статистика запроса
+    :param total: время обработки запроса в секундах
+    :return:
+    """
+
+    return ", ".join(
+        [
+            f"db;dur={stats.db_time * 1000:.2f}",
+            f'db-queries;desc="{stats.queries}"',
+            f"serialize;dur={stats.serialization_time * 1000:.2f}",
+            f"total;dur={total * 1000:.2f}",
+        ]
+    )
+
+
+class ProfilingMiddleware:
+    """
+    Профилирование запросов, заголовок ``header`` которых равен ``secret``:
+    SQL-запросы записываются в журнал, а в ответ добавляется заголовок
+    Server-Timing со временем SQL-запросов, их количеством и временем
+    сериализации ответа.
+    """
+
+    def __init__(self, app: ASGIApp, header: str, secret: str):
+        self.app = app
+        self.header = header
+        self.secret = secret.encode()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        value = Headers(scope=scope).get(self.header)
+        if value is None or not hmac.compare_digest(value.encode(), self.secret):
+            await self.app(scope, receive, send)
+            return
+
+        # статистика общая с MetricsMiddleware, если он подключён раньше
+        stats = request_stats.get() or RequestStats()
+        stats.profile = True
+        token = request_stats.set(stats)
+        started_at = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    server_timing(stats, time.perf_counter() - started_at),
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_stats.reset(token)
+
+
+def setup_profiling(app: FastAPI) -> None:
+    """
+    Подключение профилирования запросов по заголовку с секретом
+    (без секрета профилирование запросов отключено: журнал SQL-запросов
+    и Server-Timing не должны быть доступны любому клиенту).
+
+    Должно вызываться до setup_metrics: промежуточный слой профилирования
+    оказывается внутри слоя метрик и использует его статистику.
+
+    :param app:
+    :return:
+    """
+
+    config = settings.profiling
+    if config.request_header and config.request_secret:
+        app.add_middleware(
+            ProfilingMiddleware,
+            header=config.request_header,
+            secret=config.request_secret,
+        )
@@ -0,0 +1,310 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+from fastapi import FastAPI
+from starlette.responses import JSONResponse
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from exceptions import (
+    ApiHTTPException,
+    ServiceUnavailableException,
+    TooManyRequestsException,
+    format_exception,
+)
+from integrations.metrics import API_ERRORS, DecayingAverage, pool_wait
+from settings import LoadSheddingSettings, RateLimitSettings, RouteLimit, settings
+
+#: методы запросов на чтение (остальные — запросы на изменение)
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+#: ключ маршрута для запросов, не соответствующих ни одному маршруту
+UNMATCHED = "unmatched"
+#: количество запомненных соответствий пути маршруту
+ROUTE_CACHE_SIZE = 4096
+
+#: token bucket в Redis: время берётся на сервере, поэтому часы процессов
+#: не влияют на результат; ответ — время ожидания (0 — запрос разрешён)
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or burst
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(wait)
+"""
+
+
+class MemoryBuckets:
+    """
+    Корзины token bucket в памяти процесса.
+
+    Количество корзин ограничено: давно не использованная корзина
+    удаляется, и клиент при следующем запросе получает полную корзину.
+    """
+
+    def __init__(self, max_buckets: int):
+        self.max_buckets = max_buckets
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def acquire(self, key: str, rate: float, burst: int) -> float:
+        """
+        Получение токена из корзины.
+
+        :param key: ключ корзины
+        :param rate: пополнение корзины (токенов в секунду)
+        :param burst: ёмкость корзины
+        :return: время ожидания следующего токена в секундах (0 — токен получен)
+        """
+
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [burst, now]
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / rate
+
+
+class RedisBuckets:
+    """
+    Корзины token bucket в Redis, общие для всех процессов.
+
+    Корзина пополняется и уменьшается одним скриптом Lua (атомарно),
+    время жизни ключа — время полного пополнения корзины.
+    """
+
+    def __init__(self, client: Any, namespace: str = "rate_limit"):
+        self.client = client
+        self.namespace = namespace
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def __len__(self) -> int:
+        return 0
+
+    async def acquire(self, key: str, rate: float, burst: int) -> float:
+        wait = await self._script(
+            keys=[f"{self.namespace}:{key}"], args=[repr(rate), burst]
+        )
+        return float(wait)
+
+
+Buckets = Union[MemoryBuckets, RedisBuckets]
+
+
+def reject(exc: ApiHTTPException, retry_after: float) -> JSONResponse:
+    """
+    Ответ об отклонении запроса в формате ошибок API с заголовком Retry-After.
+
+    :param exc: исключение API
+    :param retry_after: время до повтора в секундах
+    :return:
+    """
+
+    API_ERRORS.labels(exc.code).inc()
+    return JSONResponse(
+        status_code=exc.status_code,
+        content=format_exception(exc.code, exc.detail),
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class RateLimitMiddleware:
+    """
+    Ограничение частоты запросов каждого клиента к каждому маршруту
+    (token bucket).
+
+    Маршрут определяется по шаблону пути (как в метриках), соответствие
+    пути маршруту запоминается, поэтому проверка обычно сводится
+    к поиску в словаре и обновлению корзины.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        routes: Sequence[BaseRoute],
+        buckets: Buckets,
+        config: RateLimitSettings = settings.rate_limit,
+    ):
+        self.app = app
+        self.routes = routes
+        self.buckets = buckets
+        self.default = RouteLimit(rate=config.rate, burst=config.burst)
+        self.limits = config.routes
+        self.client_header = (
+            config.client_header.lower().encode() if config.client_header else None
+        )
+        self._route_keys: Dict[Tuple[str, str], str] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self.route_key(scope)
+        limit = self.limits.get(route, self.default)
+        wait = await self.buckets.acquire(
+            f"{self.client(scope)}:{route}", limit.rate, limit.burst
+        )
+        if wait:
+            await reject(TooManyRequestsException(), wait)(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+    def route_key(self, scope: Scope) -> str:
+        """
+        Ключ маршрута запроса: "МЕТОД шаблон пути".
+
+        :param scope: запрос ASGI
+        :return:
+        """
+
+        cache_key = (scope["method"], scope["path"])
+        key = self._route_keys.get(cache_key)
+        if key is not None:
+            return key
+
+        path = UNMATCHED
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                path = getattr(route, "path", UNMATCHED)
+                break
+
+        key = f"{scope['method']} {path}"
+        # пути с идентификаторами не должны занимать неограниченную память
+        if len(self._route_keys) >= ROUTE_CACHE_SIZE:
+            self._route_keys.clear()
+        self._route_keys[cache_key] = key
+        return key
+
+    def client(self, scope: Scope) -> str:
+        if self.client_header is not None:
+            for name, value in scope["headers"]:
+                if name == self.client_header:
+                    return value.decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+
+class LoadShedder:
+    """
+    Решение об отклонении запроса по текущей нагрузке: количеству
+    обрабатываемых запросов и среднему времени ожидания соединения из пула.
+
+    Запросы на изменение (в том числе создание бронирований) отклоняются
+    при меньшей нагрузке, чем запросы на чтение, поэтому при перегрузке
+    чтение продолжает работать.
+    """
+
+    def __init__(
+        self,
+        config: LoadSheddingSettings = settings.load_shedding,
+        wait: DecayingAverage = pool_wait,
+    ):
+        self.config = config
+        self.wait = wait
+        self.in_flight = 0
+        self.write_limit = max(1, int(config.max_in_flight * config.write_share))
+
+    def overloaded(self, write: bool) -> bool:
+        if write:
+            return (
+                self.in_flight >= self.write_limit
+                or self.wait.value() >= self.config.max_pool_wait
+            )
+        return (
+            self.in_flight >= self.config.max_in_flight
+            or self.wait.value() >= self.config.max_read_pool_wait
+        )
+
+
+class LoadSheddingMiddleware:
+    """
+    Отклонение запросов с кодом 503 и заголовком Retry-After при перегрузке
+    (см. :class:`LoadShedder`).
+    """
+
+    def __init__(self, app: ASGIApp, shedder: LoadShedder):
+        self.app = app
+        self.shedder = shedder
+        self.exempt_paths = tuple(shedder.config.exempt_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        shedder = self.shedder
+        if shedder.overloaded(scope["method"] not in SAFE_METHODS):
+            exc = ServiceUnavailableException(detail="Сервис перегружен")
+            await reject(exc, shedder.config.retry_after)(scope, receive, send)
+            return
+
+        shedder.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            shedder.in_flight -= 1
+
+
+def create_buckets(config: RateLimitSettings) -> Buckets:
+    """
+    Создание хранилища корзин по настройкам.
+
+    :param config: настройки ограничения частоты запросов
+    :return:
+    """
+
+    if config.redis_url:
+        # клиент Redis нужен только при использовании общего хранилища
+        from redis import asyncio as redis  # pylint: disable=import-outside-toplevel
+
+        return RedisBuckets(redis.from_url(config.redis_url))
+    return MemoryBuckets(config.max_buckets)
+
+
+def setup_rate_limit(app: FastAPI) -> None:
+    """
+    Подключение ограничения частоты запросов и отклонения запросов
+    при перегрузке.
+
+    Отклонение при перегрузке подключается внешним: оно не обращается
+    к хранилищу корзин и защищает в том числе его.
+
+    :param app:
+    :return:
+    """
+
+    if settings.rate_limit.enabled:
+        app.add_middleware(
+            RateLimitMiddleware,
+            routes=app.router.routes,
+            buckets=create_buckets(settings.rate_limit),
+        )
+    if settings.load_shedding.enabled:
+        app.add_middleware(LoadSheddingMiddleware, shedder=LoadShedder())
@@ -0,0 +1,29 @@
+"""Reservation period index for occupancy queries
+
+Revision ID: 4f2d8b6c9e31
+Revises: 3e8d5a7b1c64
+Create Date: 2025-05-06 11:02:47.318254
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "4f2d8b6c9e31"
+down_revision = "3e8d5a7b1c64"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # поиск бронирований, пересекающих интервал, по всем столикам
+    # (индекс ограничения-исключения начинается со столика)
+    op.create_index(
+        "ix_reservation_period",
+        "reservation",
+        ["period"],
+        postgresql_using="gist",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_reservation_period", table_name="reservation")
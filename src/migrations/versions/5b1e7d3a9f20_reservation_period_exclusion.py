@@ -0,0 +1,59 @@
+"""Reservation period exclusion constraint
+
+Revision ID: 5b1e7d3a9f20
+Revises: c5734debbfbe
+Create Date: 2025-04-18 12:10:42.114205
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import TSTZRANGE
+
+# revision identifiers, used by Alembic.
+revision = "5b1e7d3a9f20"
+down_revision = "c5734debbfbe"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # сложение timestamptz + interval помечено в PostgreSQL как STABLE,
+    # поэтому для генерируемого столбца используется IMMUTABLE-обёртка
+    # (интервал в минутах не зависит от временной зоны)
+    op.execute(
+        """
+        CREATE FUNCTION reservation_period(start_at timestamptz, minutes integer)
+        RETURNS tstzrange
+        LANGUAGE sql
+        IMMUTABLE
+        PARALLEL SAFE
+        AS $$ SELECT tstzrange(start_at, start_at + make_interval(mins => minutes), '[)') $$
+        """
+    )
+    op.add_column(
+        "reservation",
+        sa.Column(
+            "period",
+            TSTZRANGE(),
+            sa.Computed("reservation_period(reservation_time, duration_minutes)"),
+            nullable=False,
+        ),
+    )
+    # int4range(table_id) вместо table_id позволяет обойтись без расширения
+    # btree_gist: оператор "=" для диапазонов входит в GiST range_ops
+    op.execute(
+        """
+        ALTER TABLE reservation
+        ADD CONSTRAINT reservation_table_period_excl
+        EXCLUDE USING gist (
+            int4range(table_id, table_id, '[]') WITH =,
+            period WITH &&
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("reservation_table_period_excl", "reservation")
+    op.drop_column("reservation", "period")
+    op.execute("DROP FUNCTION reservation_period(timestamptz, integer)")
@@ -0,0 +1,39 @@
+"""Reservation table_id indexes
+
+Revision ID: 6a3e9b2c4d15
+Revises: 2f9a6c1d7e48
+Create Date: 2025-04-25 09:18:44.120537
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "6a3e9b2c4d15"
+down_revision = "2f9a6c1d7e48"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # списки бронирований столика и проверка внешнего ключа при удалении столика
+    op.create_index(
+        "ix_reservation_table_id_reservation_time_id",
+        "reservation",
+        ["table_id", "reservation_time", "id"],
+    )
+    # поиск текущих и будущих бронирований столика: table_id = ? AND
+    # upper(period) > now(); частичный индекс по now() невозможен
+    # (условие индекса должно быть неизменяемым)
+    op.create_index(
+        "ix_reservation_table_id_period_end",
+        "reservation",
+        ["table_id", sa.text("upper(period)")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_reservation_table_id_period_end", table_name="reservation")
+    op.drop_index(
+        "ix_reservation_table_id_reservation_time_id", table_name="reservation"
+    )
@@ -0,0 +1,37 @@
+"""Collection versions for conditional requests
+
+Revision ID: 7b3c9e1f5a24
+Revises: 4f2d8b6c9e31
+Create Date: 2025-05-08 15:27:31.604118
+
+"""
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7b3c9e1f5a24"
+down_revision = "4f2d8b6c9e31"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "collection_version",
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("name", sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False),
+        sa.Column("version", sa.BigInteger(), server_default="0", nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.execute(
+        """
+        INSERT INTO collection_version (name, created_at, updated_at)
+        VALUES ('table', now(), now()), ('reservation', now(), now())
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("collection_version")
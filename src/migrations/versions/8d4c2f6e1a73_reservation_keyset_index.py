@@ -0,0 +1,26 @@
+"""Reservation keyset pagination index
+
+Revision ID: 8d4c2f6e1a73
+Revises: 5b1e7d3a9f20
+Create Date: 2025-04-22 10:41:05.583127
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8d4c2f6e1a73"
+down_revision = "5b1e7d3a9f20"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_reservation_reservation_time_id",
+        "reservation",
+        ["reservation_time", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_reservation_reservation_time_id", table_name="reservation")
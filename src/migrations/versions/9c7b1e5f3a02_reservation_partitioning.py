@@ -0,0 +1,234 @@
+"""Partition reservation by month
+
+Revision ID: 9c7b1e5f3a02
+Revises: 6a3e9b2c4d15
+Create Date: 2025-04-28 15:02:19.447310
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9c7b1e5f3a02"
+down_revision = "6a3e9b2c4d15"
+branch_labels = None
+depends_on = None
+
+#: столбцы, копируемые между таблицами (period вычисляется)
+COLUMNS = (
+    "created_at, updated_at, id, customer_name, table_id, "
+    "reservation_time, duration_minutes"
+)
+
+INDEXES = {
+    "ix_reservation_reservation_time_id": "reservation_time, id",
+    "ix_reservation_table_id_reservation_time_id": "table_id, reservation_time, id",
+    "ix_reservation_table_id_period_end": "table_id, upper(period)",
+}
+
+
+def create_indexes() -> None:
+    for name, columns in INDEXES.items():
+        op.execute(f"CREATE INDEX {name} ON reservation ({columns})")
+
+
+def drop_indexes() -> None:
+    for name in INDEXES:
+        op.execute(f"DROP INDEX {name}")
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE reservation RENAME TO reservation_unpartitioned")
+    op.execute(
+        "ALTER TABLE reservation_unpartitioned "
+        "DROP CONSTRAINT reservation_table_period_excl"
+    )
+    op.execute(
+        "ALTER TABLE reservation_unpartitioned "
+        "RENAME CONSTRAINT reservation_pkey TO reservation_unpartitioned_pkey"
+    )
+    drop_indexes()
+
+    # первичный ключ секционированной таблицы должен включать ключ секционирования;
+    # уникальность id обеспечивает последовательность
+    op.execute(
+        """
+        CREATE TABLE reservation (
+            created_at timestamptz NOT NULL,
+            updated_at timestamptz,
+            id integer NOT NULL DEFAULT nextval('reservation_id_seq'),
+            customer_name varchar(100) NOT NULL,
+            table_id integer NOT NULL
+                CONSTRAINT reservation_table_id_fkey REFERENCES "table" (id),
+            reservation_time timestamptz NOT NULL,
+            duration_minutes integer NOT NULL,
+            period tstzrange NOT NULL GENERATED ALWAYS AS
+                (reservation_period(reservation_time, duration_minutes)) STORED,
+            CONSTRAINT reservation_pkey PRIMARY KEY (id, reservation_time)
+        ) PARTITION BY RANGE (reservation_time)
+        """
+    )
+    op.execute("ALTER SEQUENCE reservation_id_seq OWNED BY reservation.id")
+    create_indexes()
+
+    # ограничение-исключение нельзя создать на секционированной таблице
+    # (оно не содержит ключ секционирования со сравнением "="), поэтому
+    # оно создаётся в каждой секции
+    op.execute("CREATE TABLE reservation_default PARTITION OF reservation DEFAULT")
+    op.execute(
+        """
+        ALTER TABLE reservation_default
+            ADD CONSTRAINT reservation_default_table_period_excl
+            EXCLUDE USING gist (
+                int4range(table_id, table_id, '[]') WITH =,
+                period WITH &&
+            )
+        """
+    )
+
+    # секция месяца (UTC); строки этого месяца из секции по умолчанию
+    # переносятся в новую секцию
+    op.execute(
+        f"""
+        CREATE FUNCTION reservation_create_partition(month date)
+        RETURNS text
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            partition text := format('reservation_y%sm%s',
+                to_char(month, 'YYYY'), to_char(month, 'MM'));
+            lower_bound timestamptz :=
+                date_trunc('month', month)::timestamp AT TIME ZONE 'UTC';
+            upper_bound timestamptz :=
+                (date_trunc('month', month) + interval '1 month')::timestamp
+                AT TIME ZONE 'UTC';
+        BEGIN
+            -- параллельный запуск из нескольких процессов
+            PERFORM pg_advisory_xact_lock(hashtext('reservation_create_partition'));
+            IF to_regclass(partition) IS NOT NULL THEN
+                RETURN NULL;
+            END IF;
+
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE reservation INCLUDING DEFAULTS INCLUDING GENERATED)',
+                partition
+            );
+            EXECUTE format(
+                'ALTER TABLE %I ADD CONSTRAINT %I EXCLUDE USING gist ('
+                '    int4range(table_id, table_id, ''[]'') WITH =, period WITH &&)',
+                partition, partition || '_table_period_excl'
+            );
+            EXECUTE format(
+                'WITH moved AS ('
+                '    DELETE FROM reservation_default'
+                '    WHERE reservation_time >= $1 AND reservation_time < $2'
+                '    RETURNING {COLUMNS})'
+                ' INSERT INTO %I ({COLUMNS}) SELECT {COLUMNS} FROM moved',
+                partition
+            ) USING lower_bound, upper_bound;
+            EXECUTE format(
+                'ALTER TABLE reservation ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                partition, lower_bound, upper_bound
+            );
+
+            RETURN partition;
+        END
+        $$
+        """
+    )
+
+    # пересечения внутри секции проверяет её ограничение-исключение,
+    # пересечения с бронированиями других секций (через границу месяца) —
+    # триггер; блокировка по столику исключает гонку между секциями
+    op.execute(
+        """
+        CREATE FUNCTION reservation_check_overlap()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            new_period tstzrange :=
+                reservation_period(NEW.reservation_time, NEW.duration_minutes);
+        BEGIN
+            PERFORM pg_advisory_xact_lock(hashtext('reservation'), NEW.table_id);
+            IF EXISTS (
+                SELECT 1 FROM reservation
+                WHERE int4range(table_id, table_id, '[]')
+                        = int4range(NEW.table_id, NEW.table_id, '[]')
+                    AND period && new_period
+                    AND reservation_time < upper(new_period)
+                    AND tableoid <> TG_RELID
+            ) THEN
+                RAISE EXCEPTION 'reservation overlaps an existing reservation'
+                    USING ERRCODE = 'exclusion_violation';
+            END IF;
+            RETURN NEW;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER reservation_check_overlap
+            BEFORE INSERT ON reservation
+            FOR EACH ROW EXECUTE FUNCTION reservation_check_overlap()
+        """
+    )
+
+    # секции для имеющихся данных и на три месяца вперёд
+    op.execute(
+        """
+        SELECT reservation_create_partition(month::date)
+        FROM generate_series(
+            date_trunc('month', coalesce(
+                (SELECT min(reservation_time) FROM reservation_unpartitioned),
+                now()
+            ) AT TIME ZONE 'UTC'),
+            date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months',
+            interval '1 month'
+        ) AS month
+        """
+    )
+    op.execute(
+        f"INSERT INTO reservation ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM reservation_unpartitioned"
+    )
+    op.execute("DROP TABLE reservation_unpartitioned")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE reservation RENAME TO reservation_partitioned")
+    op.execute(
+        "ALTER TABLE reservation_partitioned "
+        "RENAME CONSTRAINT reservation_pkey TO reservation_partitioned_pkey"
+    )
+    drop_indexes()
+    op.execute(
+        """
+        CREATE TABLE reservation (
+            created_at timestamptz NOT NULL,
+            updated_at timestamptz,
+            id integer NOT NULL DEFAULT nextval('reservation_id_seq'),
+            customer_name varchar(100) NOT NULL,
+            table_id integer NOT NULL
+                CONSTRAINT reservation_table_id_fkey REFERENCES "table" (id),
+            reservation_time timestamptz NOT NULL,
+            duration_minutes integer NOT NULL,
+            period tstzrange NOT NULL GENERATED ALWAYS AS
+                (reservation_period(reservation_time, duration_minutes)) STORED,
+            CONSTRAINT reservation_pkey PRIMARY KEY (id),
+            CONSTRAINT reservation_table_period_excl EXCLUDE USING gist (
+                int4range(table_id, table_id, '[]') WITH =,
+                period WITH &&
+            )
+        )
+        """
+    )
+    op.execute("ALTER SEQUENCE reservation_id_seq OWNED BY reservation.id")
+    create_indexes()
+    op.execute(
+        f"INSERT INTO reservation ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM reservation_partitioned"
+    )
+    op.execute("DROP TABLE reservation_partitioned")
+    op.execute("DROP FUNCTION reservation_check_overlap()")
+    op.execute("DROP FUNCTION reservation_create_partition(date)")
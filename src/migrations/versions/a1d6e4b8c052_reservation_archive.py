@@ -0,0 +1,68 @@
+"""Reservation archive
+
+Revision ID: a1d6e4b8c052
+Revises: 7b3c9e1f5a24
+Create Date: 2025-05-12 10:41:08.226917
+
+"""
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "a1d6e4b8c052"
+down_revision = "7b3c9e1f5a24"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "reservation_archive",
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column(
+            "customer_name",
+            sqlmodel.sql.sqltypes.AutoString(length=100),
+            nullable=False,
+        ),
+        sa.Column("table_id", sa.Integer(), nullable=False),
+        sa.Column("reservation_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("duration_minutes", sa.Integer(), nullable=False),
+        sa.Column(
+            "period",
+            postgresql.TSTZRANGE(),
+            sa.Computed("reservation_period(reservation_time, duration_minutes)"),
+            nullable=False,
+        ),
+        sa.Column(
+            "archived_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_reservation_archive_reservation_time_id",
+        "reservation_archive",
+        ["reservation_time", "id"],
+    )
+    op.create_index(
+        "ix_reservation_archive_table_id_reservation_time_id",
+        "reservation_archive",
+        ["table_id", "reservation_time", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_reservation_archive_table_id_reservation_time_id",
+        table_name="reservation_archive",
+    )
+    op.drop_index(
+        "ix_reservation_archive_reservation_time_id", table_name="reservation_archive"
+    )
+    op.drop_table("reservation_archive")
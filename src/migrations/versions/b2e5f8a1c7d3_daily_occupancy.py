@@ -0,0 +1,92 @@
+"""Daily occupancy summary
+
+Revision ID: b2e5f8a1c7d3
+Revises: a1d6e4b8c052
+Create Date: 2025-05-14 11:02:47.319204
+
+"""
+import sqlalchemy as sa
+import sqlmodel
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b2e5f8a1c7d3"
+down_revision = "a1d6e4b8c052"
+branch_labels = None
+depends_on = None
+
+#: таблицы бронирований, изменения которых попадают в сводку
+SOURCES = ("reservation", "reservation_archive")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "daily_occupancy",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column(
+            "location", sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False
+        ),
+        sa.Column("reservations", sa.Integer(), nullable=False),
+        sa.Column("seats", sa.Integer(), nullable=False),
+        sa.Column("booked_minutes", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_daily_occupancy_day_location", "daily_occupancy", ["day", "location"]
+    )
+
+    # триггер уровня запроса: массовая вставка или удаление добавляет
+    # одну запись на день и зал; перенос в архив (удаление из reservation
+    # и вставка в reservation_archive) взаимно погашается
+    op.execute(
+        """
+        CREATE FUNCTION daily_occupancy_apply()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            sign integer := CASE TG_OP WHEN 'INSERT' THEN 1 ELSE -1 END;
+        BEGIN
+            INSERT INTO daily_occupancy
+                (day, location, reservations, seats, booked_minutes)
+            SELECT
+                (changed.reservation_time AT TIME ZONE 'UTC')::date,
+                t.location,
+                sign * count(*),
+                sign * sum(t.seats),
+                sign * sum(changed.duration_minutes)
+            FROM changed_rows AS changed
+            JOIN "table" AS t ON t.id = changed.table_id
+            GROUP BY 1, 2;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    for source in SOURCES:
+        op.execute(
+            f"""
+            CREATE TRIGGER {source}_daily_occupancy_insert
+                AFTER INSERT ON {source}
+                REFERENCING NEW TABLE AS changed_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION daily_occupancy_apply()
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER {source}_daily_occupancy_delete
+                AFTER DELETE ON {source}
+                REFERENCING OLD TABLE AS changed_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION daily_occupancy_apply()
+            """
+        )
+
+
+def downgrade() -> None:
+    for source in SOURCES:
+        op.execute(f"DROP TRIGGER {source}_daily_occupancy_delete ON {source}")
+        op.execute(f"DROP TRIGGER {source}_daily_occupancy_insert ON {source}")
+    op.execute("DROP FUNCTION daily_occupancy_apply()")
+    op.drop_index("ix_daily_occupancy_day_location", table_name="daily_occupancy")
+    op.drop_table("daily_occupancy")
@@ -0,0 +1,78 @@
+"""Reservation archive boundary
+
+Revision ID: c8e4f1a9d2b6
+Revises: b2e5f8a1c7d3
+Create Date: 2025-05-16 09:18:35.520611
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c8e4f1a9d2b6"
+down_revision = "b2e5f8a1c7d3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "reservation_archive_boundary",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("archived_until", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    # секции, ранее отсоединённые в схему archive, наследуют архив
+    op.execute(
+        r"""
+        DO $$
+        DECLARE
+            partition regclass;
+        BEGIN
+            FOR partition IN
+                SELECT c.oid::regclass
+                FROM pg_class AS c
+                JOIN pg_namespace AS n ON n.oid = c.relnamespace
+                WHERE n.nspname = 'archive'
+                    AND c.relkind = 'r'
+                    AND c.relname ~ '^reservation_y\d{4}m\d{2}$'
+            LOOP
+                EXECUTE format(
+                    'ALTER TABLE %s ADD COLUMN IF NOT EXISTS archived_at '
+                    'timestamptz NOT NULL DEFAULT now()',
+                    partition
+                );
+                EXECUTE format('ALTER TABLE %s INHERIT reservation_archive', partition);
+            END LOOP;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO reservation_archive_boundary (id, archived_until)
+        SELECT 1, max(upper(period)) FROM reservation_archive HAVING count(*) > 0
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            partition regclass;
+        BEGIN
+            FOR partition IN
+                SELECT inhrelid::regclass
+                FROM pg_inherits
+                WHERE inhparent = 'reservation_archive'::regclass
+            LOOP
+                EXECUTE format('ALTER TABLE %s NO INHERIT reservation_archive', partition);
+            END LOOP;
+        END
+        $$
+        """
+    )
+    op.drop_table("reservation_archive_boundary")
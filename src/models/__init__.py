@@ -1 +1,10 @@
-from .models import Reservation, Table  # noqa: F401
+from .models import (  # noqa: F401
+    CollectionVersion,
+    DailyOccupancy,
+    IdempotencyKey,
+    OutboxEvent,
+    Reservation,
+    ReservationArchive,
+    ReservationArchiveBoundary,
+    Table,
+)
@@ -1,7 +1,19 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import Any, Dict, Optional
 
-from sqlalchemy import Column, DateTime, Integer
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Computed,
+    Date,
+    DateTime,
+    Identity,
+    Index,
+    Integer,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB, TSTZRANGE
 from sqlmodel import Field, Relationship, SQLModel
 
 from models.mixins import TimeStampMixin
@@ -27,8 +39,30 @@ class Table(SQLModel, TimeStampMixin, table=True):
 class Reservation(SQLModel, TimeStampMixin, table=True):
     """
     Модель для бронирования столика.
+
+    Таблица секционирована по месяцам reservation_time (см. миграцию
+    9c7b1e5f3a02 и :mod:`integrations.db.partitions`), первичный ключ
+    в БД — (id, reservation_time). Пересечение бронирований одного столика
+    запрещено на уровне БД: внутри секции — ограничением-исключением
+    по (столик, период), между секциями — триггером.
     """
 
+    __table_args__ = (
+        Index("ix_reservation_reservation_time_id", "reservation_time", "id"),
+        Index(
+            "ix_reservation_table_id_reservation_time_id",
+            "table_id",
+            "reservation_time",
+            "id",
+        ),
+        Index(
+            "ix_reservation_table_id_period_end",
+            "table_id",
+            text("upper(period)"),
+        ),
+        Index("ix_reservation_period", "period", postgresql_using="gist"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True, title="Идентификатор")
     customer_name: str = Field(title="Имя клиента", min_length=1, max_length=100)
     table_id: int = Field(foreign_key="table.id", title="ID столика")
@@ -37,5 +71,174 @@ class Reservation(SQLModel, TimeStampMixin, table=True):
         sa_column=Column(DateTime(timezone=True), nullable=False),
     )
     duration_minutes: int = Field(title="Длительность в минутах")
+    period: Optional[Any] = Field(
+        default=None,
+        title="Период бронирования",
+        sa_column=Column(
+            TSTZRANGE,
+            Computed("reservation_period(reservation_time, duration_minutes)"),
+            nullable=False,
+        ),
+    )
 
     table: Optional[Table] = Relationship(back_populates="reservations")
+
+
+class IdempotencyKey(SQLModel, table=True):  # type: ignore[call-arg, misc]
+    """
+    Сохранённый ответ на запрос с заголовком Idempotency-Key.
+
+    Повтор запроса с тем же ключом получает сохранённый ответ
+    без повторного выполнения.
+    """
+
+    __tablename__ = "idempotency_key"
+    __table_args__ = (Index("ix_idempotency_key_expires_at", "expires_at"),)
+
+    key: str = Field(primary_key=True, max_length=255, title="Ключ идемпотентности")
+    request_hash: str = Field(max_length=64, title="Хеш запроса")
+    status_code: int = Field(title="Код статуса ответа")
+    response: Dict[str, Any] = Field(
+        title="Тело ответа", sa_column=Column(JSONB, nullable=False)
+    )
+    expires_at: datetime = Field(
+        title="Срок хранения",
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+    )
+
+
+class OutboxEvent(SQLModel, table=True):  # type: ignore[call-arg, misc]
+    """
+    Событие, ожидающее отправки брокеру сообщений (transactional outbox).
+
+    Запись добавляется той же транзакцией, что и изменение данных,
+    и удаляется после подтверждения отправки (см. :mod:`integrations.events`).
+    """
+
+    __tablename__ = "outbox_event"
+
+    id: Optional[int] = Field(
+        default=None,
+        title="Идентификатор",
+        sa_column=Column(BigInteger, Identity(), primary_key=True),
+    )
+    event_type: str = Field(max_length=100, title="Тип события")
+    payload: Dict[str, Any] = Field(
+        title="Данные события", sa_column=Column(JSONB, nullable=False)
+    )
+    created_at: Optional[datetime] = Field(
+        default=None,
+        title="Дата и время создания события",
+        sa_column=Column(
+            DateTime(timezone=True), server_default=func.now(), nullable=False
+        ),
+    )
+
+
+class CollectionVersion(SQLModel, TimeStampMixin, table=True):  # type: ignore[call-arg]
+    """
+    Версия коллекции (столиков или бронирований), увеличиваемая при каждом
+    создании и удалении её записей. Используется для условных HTTP-запросов
+    (ETag, Last-Modified).
+    """
+
+    __tablename__ = "collection_version"
+
+    name: str = Field(primary_key=True, max_length=50, title="Коллекция")
+    version: int = Field(
+        default=0,
+        title="Версия",
+        sa_column=Column(BigInteger, nullable=False, server_default="0"),
+    )
+
+
+class ReservationArchive(SQLModel, TimeStampMixin, table=True):  # type: ignore[call-arg]
+    """
+    Архивированное бронирование (см. :mod:`services.retention`).
+
+    Бронирование переносится из таблицы reservation той же транзакцией,
+    поэтому находится ровно в одной из таблиц. Внешнего ключа на столик
+    нет: архив не мешает удалять столики. Секции reservation, отсоединённые
+    :mod:`integrations.db.partitions`, наследуют эту таблицу, и запросы
+    к архиву читают и их.
+    """
+
+    __tablename__ = "reservation_archive"
+    __table_args__ = (
+        Index("ix_reservation_archive_reservation_time_id", "reservation_time", "id"),
+        Index(
+            "ix_reservation_archive_table_id_reservation_time_id",
+            "table_id",
+            "reservation_time",
+            "id",
+        ),
+    )
+
+    id: int = Field(primary_key=True, title="Идентификатор")
+    customer_name: str = Field(title="Имя клиента", max_length=100)
+    table_id: int = Field(title="ID столика")
+    reservation_time: datetime = Field(
+        title="Время бронирования",
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+    )
+    duration_minutes: int = Field(title="Длительность в минутах")
+    period: Optional[Any] = Field(
+        default=None,
+        title="Период бронирования",
+        sa_column=Column(
+            TSTZRANGE,
+            Computed("reservation_period(reservation_time, duration_minutes)"),
+            nullable=False,
+        ),
+    )
+    archived_at: Optional[datetime] = Field(
+        default=None,
+        title="Дата и время архивации",
+        sa_column=Column(
+            DateTime(timezone=True), server_default=func.now(), nullable=False
+        ),
+    )
+
+
+class ReservationArchiveBoundary(SQLModel, table=True):  # type: ignore[call-arg, misc]
+    """
+    Граница архива бронирований (одна запись): все архивированные
+    бронирования закончились не позже неё. Граница только растёт
+    и сдвигается той же транзакцией, что и перенос в архив, поэтому
+    запросам за интервалы, начинающиеся не раньше неё, архив не нужен.
+    """
+
+    __tablename__ = "reservation_archive_boundary"
+
+    id: int = Field(default=1, primary_key=True, title="Идентификатор")
+    archived_until: datetime = Field(
+        title="Время окончания последнего архивированного бронирования",
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+    )
+
+
+class DailyOccupancy(SQLModel, table=True):  # type: ignore[call-arg, misc]
+    """
+    Изменение занятости зала за день (см. :mod:`services.daily_occupancy`).
+
+    Записи добавляются триггерами таблиц reservation и reservation_archive
+    той же транзакцией, что и изменение бронирований: одна запись на день
+    и зал для каждого запроса INSERT или DELETE (при удалении — с обратным
+    знаком). Записи только добавляются, поэтому параллельные бронирования
+    не блокируют друг друга; итог за день — сумма записей, которые
+    периодически сворачиваются в одну.
+    """
+
+    __tablename__ = "daily_occupancy"
+    __table_args__ = (Index("ix_daily_occupancy_day_location", "day", "location"),)
+
+    id: Optional[int] = Field(
+        default=None,
+        title="Идентификатор",
+        sa_column=Column(BigInteger, Identity(), primary_key=True),
+    )
+    day: date = Field(title="День (UTC)", sa_column=Column(Date, nullable=False))
+    location: str = Field(title="Расположение", max_length=255)
+    reservations: int = Field(title="Количество бронирований")
+    seats: int = Field(title="Забронированные места")
+    booked_minutes: int = Field(title="Забронированные минуты")
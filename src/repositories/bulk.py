@@ -0,0 +1,58 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Column, Table, bindparam, column, func, select
+from sqlalchemy.dialects.postgresql import ARRAY, Insert, insert
+from sqlalchemy.sql.selectable import TableValuedAlias
+
+
+def unnest_insert(table: Table, columns: Sequence[Column]) -> Insert:
+    """
+    Запрос INSERT ... SELECT FROM unnest(...) для массовой вставки.
+
+    Значения каждого столбца передаются одним параметром-массивом, поэтому
+    текст запроса не зависит от размера пачки: он компилируется один раз
+    и переиспользуется как подготовленное выражение.
+
+    :param table: таблица
+    :param columns: вставляемые столбцы
+    :return:
+    """
+
+    rows = unnest_rows(columns, "rows")
+    return insert(table).from_select([item.key for item in columns], select(rows))
+
+
+def unnest_rows(
+    columns: Sequence[Column], name: str, ordinality: Optional[str] = None
+) -> TableValuedAlias:
+    """
+    Строки пачки, переданные параметрами-массивами (см. :func:`to_columns`),
+    как табличное выражение unnest(...).
+
+    :param columns: столбцы (имена параметров совпадают с именами столбцов)
+    :param name: псевдоним табличного выражения
+    :param ordinality: имя столбца с номером строки пачки (начиная с 1)
+    :return:
+    """
+
+    rows = func.unnest(
+        *(bindparam(item.key, type_=ARRAY(item.type)) for item in columns)
+    ).table_valued(
+        *(column(item.key, item.type) for item in columns),
+        with_ordinality=ordinality,
+    )
+    return rows.render_derived(name=name)
+
+
+def to_columns(
+    rows: Sequence[Dict[str, Any]], columns: Sequence[Column]
+) -> Dict[str, List[Any]]:
+    """
+    Преобразование строк в параметры-массивы для unnest_insert().
+
+    :param rows: значения полей по строкам
+    :param columns: вставляемые столбцы
+    :return:
+    """
+
+    return {item.key: [row[item.key] for row in rows] for item in columns}
@@ -0,0 +1,146 @@
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Date, cast, delete, func, insert, or_, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Delete, Insert, Select
+from sqlalchemy.sql.selectable import CTE
+
+from models.models import DailyOccupancy, Reservation, ReservationArchive, Table
+
+#: суммируемые показатели сводки
+TOTALS = ("reservations", "seats", "booked_minutes")
+#: столбцы записи сводки
+COLUMNS = [getattr(DailyOccupancy, field) for field in ("day", "location", *TOTALS)]
+
+
+def keep_in_summary(removed: CTE) -> Insert:
+    """
+    Записи сводки, погашающие записи триггера удаления бронирований removed
+    (удаление без переноса в архив, например выгрузка архива в файл):
+    бронирования остаются в сводке.
+
+    :param removed: удалённые бронирования (DELETE ... RETURNING
+        с полями table_id, reservation_time, duration_minutes)
+    :return: запрос INSERT ... SELECT
+    """
+
+    day = cast(func.timezone("UTC", removed.c.reservation_time), Date)
+    totals: Select = select(
+        day,
+        Table.location,
+        func.count(),
+        func.sum(Table.seats),
+        func.sum(removed.c.duration_minutes),
+    ).join(Table, Table.id == removed.c.table_id)
+    totals = totals.group_by(day, Table.location)
+    statement: Insert = insert(DailyOccupancy).from_select(COLUMNS, totals)
+    return statement
+
+
+class DailyOccupancyRepository:
+    """
+    Сводка занятости залов по дням (таблица daily_occupancy).
+
+    Сводку пополняют триггеры БД, репозиторий её читает, сворачивает
+    и пересчитывает.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_daily(
+        self, day_from: date, day_to: date, location: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Занятость залов по дням [day_from, day_to) только по сводке.
+
+        :param day_from: первый день
+        :param day_to: день после последнего
+        :param location: расположение (None — все залы)
+        :return: записи с полями day, location, reservations, seats, booked_minutes
+        """
+
+        query: Select = select(
+            DailyOccupancy.day,
+            DailyOccupancy.location,
+            *(
+                func.sum(getattr(DailyOccupancy, field)).label(field)
+                for field in TOTALS
+            ),
+        ).where(DailyOccupancy.day >= day_from, DailyOccupancy.day < day_to)
+        query = query.group_by(DailyOccupancy.day, DailyOccupancy.location)
+        # день, все бронирования которого удалены до свёртки
+        query = query.having(func.sum(DailyOccupancy.reservations) > 0)
+        query = query.order_by(DailyOccupancy.day, DailyOccupancy.location)
+        if location is not None:
+            query = query.where(DailyOccupancy.location == location)
+
+        result = await self.session.execute(query)
+        return [dict(row) for row in result.mappings()]
+
+    async def compact(self) -> int:
+        """
+        Свёртка записей каждого дня и зала в одну (DELETE ... RETURNING
+        и INSERT в одном запросе). Записи, добавленные параллельными
+        транзакциями после начала запроса, остаются до следующей свёртки.
+
+        :return: количество свёрнутых пар (день, зал), кроме взаимно погашенных
+        """
+
+        duplicated: Select = select(DailyOccupancy.day, DailyOccupancy.location)
+        duplicated = duplicated.group_by(DailyOccupancy.day, DailyOccupancy.location)
+        duplicated = duplicated.having(func.count() > 1)
+        groups = duplicated.cte("groups")
+        deletion: Delete = delete(DailyOccupancy).where(
+            DailyOccupancy.day == groups.c.day,
+            DailyOccupancy.location == groups.c.location,
+        )
+        moved = deletion.returning(*COLUMNS).cte("moved")
+        sums = [func.sum(moved.c[field]) for field in TOTALS]
+        totals: Select = select(moved.c.day, moved.c.location, *sums)
+        totals = totals.group_by(moved.c.day, moved.c.location)
+        totals = totals.having(or_(*(value != 0 for value in sums)))
+
+        statement: Insert = insert(DailyOccupancy).from_select(COLUMNS, totals)
+        result = await self.session.execute(statement.returning(DailyOccupancy.id))
+        compacted = len(result.all())
+        await self.session.commit()
+        return compacted
+
+    async def rebuild(self) -> int:
+        """
+        Пересчёт сводки по бронированиям и архиву бронирований.
+
+        Согласованность с параллельными изменениями обеспечивает вызывающий
+        (транзакция REPEATABLE READ: удаляются записи и учитываются
+        бронирования одного снимка). Архивированные бронирования удалённых
+        столиков и бронирования, выгруженные в файл архива, в пересчёт
+        не попадают: расположение берётся из столика, а выгруженных
+        бронирований нет в БД.
+
+        :return: количество пар (день, зал)
+        """
+
+        source = union_all(
+            *(
+                select(model.reservation_time, model.table_id, model.duration_minutes)
+                for model in (Reservation, ReservationArchive)
+            )
+        ).subquery("source")
+        day = cast(func.timezone("UTC", source.c.reservation_time), Date)
+        totals: Select = select(
+            day,
+            Table.location,
+            func.count(),
+            func.sum(Table.seats),
+            func.sum(source.c.duration_minutes),
+        ).join(Table, Table.id == source.c.table_id)
+        totals = totals.group_by(day, Table.location)
+
+        await self.session.execute(delete(DailyOccupancy))
+        statement: Insert = insert(DailyOccupancy).from_select(COLUMNS, totals)
+        result = await self.session.execute(statement.returning(DailyOccupancy.id))
+        rebuilt = len(result.all())
+        await self.session.commit()
+        return rebuilt
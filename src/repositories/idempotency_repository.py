@@ -0,0 +1,82 @@
+from typing import Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Delete, Select
+
+from models.models import IdempotencyKey
+
+
+class IdempotencyRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get(self, key: str) -> Optional[IdempotencyKey]:
+        """
+        Получение действующего (не устаревшего) ключа идемпотентности.
+
+        :param key: ключ идемпотентности
+        :return:
+        """
+
+        query: Select = select(IdempotencyKey).where(
+            IdempotencyKey.key == key, IdempotencyKey.expires_at > func.now()
+        )
+        result = await self.session.execute(query)
+        return result.scalars().first()
+
+    async def add(self, record: IdempotencyKey) -> None:
+        """
+        Добавление ключа в сессию без фиксации транзакции.
+
+        Ключ сохраняется той же транзакцией, что и результат запроса,
+        поэтому результат не может быть сохранён без ключа и наоборот.
+        Устаревшая запись с тем же ключом (ещё не удалённая очисткой)
+        удаляется в этой же транзакции; действующая запись остаётся
+        и приводит к нарушению уникальности при фиксации.
+
+        :param record: ключ идемпотентности с ответом
+        :return:
+        """
+
+        await self.session.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.key == record.key,
+                IdempotencyKey.expires_at <= func.now(),
+            ),
+            execution_options={"synchronize_session": False},
+        )
+        self.session.add(record)
+
+    async def delete_expired(self, batch_size: int) -> int:
+        """
+        Удаление устаревших ключей пачками по batch_size записей.
+
+        Каждая пачка удаляется отдельной транзакцией, чтобы не держать
+        долгих блокировок; строки, заблокированные другим процессом,
+        пропускаются.
+
+        :param batch_size: количество ключей в одной пачке
+        :return: количество удалённых ключей
+        """
+
+        expired: Select = select(IdempotencyKey.key).where(
+            IdempotencyKey.expires_at <= func.now()
+        )
+        expired = expired.limit(batch_size)
+        expired = expired.with_for_update(skip_locked=True)
+        query: Delete = delete(IdempotencyKey).where(
+            IdempotencyKey.key.in_(expired.scalar_subquery())
+        )
+
+        deleted = 0
+        while True:
+            result = await self.session.execute(
+                query.returning(IdempotencyKey.key),
+                execution_options={"synchronize_session": False},
+            )
+            batch = len(result.all())
+            await self.session.commit()
+            deleted += batch
+            if batch < batch_size:
+                return deleted
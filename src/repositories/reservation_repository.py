@@ -1,50 +1,801 @@
-from datetime import datetime, timedelta
-from typing import List, Optional
+import asyncio
+import bisect
+import random
+from datetime import datetime, timedelta, timezone
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
-from sqlalchemy import and_, func, select
+from sqlalchemy import Integer, and_, cast, func, literal, select, tuple_, union_all
+from sqlalchemy.exc import DBAPIError, IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
 
-from exceptions import ConflictException, ObjectNotFoundException
-from models.models import Reservation, Table
+from exceptions import (
+    ApiHTTPException,
+    ConflictException,
+    ObjectNotFoundException,
+    ServiceUnavailableException,
+)
+from integrations.events.producer import (
+    RESERVATION_CREATED,
+    RESERVATION_DELETED,
+    EventProducer,
+)
+from models.models import (
+    Reservation,
+    ReservationArchive,
+    ReservationArchiveBoundary,
+    Table,
+)
+from repositories.bulk import to_columns, unnest_insert, unnest_rows
+from services.collection_versions import RESERVATIONS, collection_versions
+from services.free_slot_cache import Interval, availability_cache, days_between
+from settings import (
+    ConcurrencySettings,
+    ConcurrencyStrategy,
+    RetentionSettings,
+    settings,
+)
+
+T = TypeVar("T")
+
+#: код ошибки PostgreSQL при нарушении уникальности
+UNIQUE_VIOLATION = "23505"
+#: код ошибки PostgreSQL при нарушении внешнего ключа
+FOREIGN_KEY_VIOLATION = "23503"
+#: код ошибки PostgreSQL при нарушении ограничения-исключения
+EXCLUSION_VIOLATION = "23P01"
+#: код ошибки PostgreSQL при взаимоблокировке
+DEADLOCK_DETECTED = "40P01"
+#: коды ошибок PostgreSQL, после которых транзакцию SERIALIZABLE можно повторить
+#: (ошибка сериализации и взаимоблокировка)
+RETRYABLE_ERRORS = ("40001", DEADLOCK_DETECTED)
+
+#: столбцы, заполняемые при массовой загрузке
+BULK_COLUMNS = [
+    Reservation.__table__.c.customer_name,
+    Reservation.__table__.c.table_id,
+    Reservation.__table__.c.reservation_time,
+    Reservation.__table__.c.duration_minutes,
+]
+#: столбцы, выбираемые для списков бронирований (в порядке полей ReservationRead)
+READ_FIELDS = (
+    "customer_name",
+    "table_id",
+    "reservation_time",
+    "duration_minutes",
+    "id",
+)
+#: столбцы, общие для таблицы бронирований и архива
+SOURCE_FIELDS = (*READ_FIELDS, "period")
+#: массовая вставка с пропуском пересекающихся бронирований
+BULK_INSERT = (
+    unnest_insert(Reservation.__table__, BULK_COLUMNS)
+    .on_conflict_do_nothing()
+    .returning(Reservation.id, Reservation.table_id, Reservation.reservation_time)
+)
+#: бронирования пачки (номера строк начиная с 1), пересекающиеся
+#: с существующими бронированиями того же столика в любой секции
+BULK_CANDIDATES = unnest_rows(BULK_COLUMNS[1:], "candidate", "position")
+BULK_CONFLICTS: Select = select(Reservation.id).where(
+    Reservation.table_id == BULK_CANDIDATES.c.table_id,
+    Reservation.period.overlaps(
+        func.reservation_period(
+            BULK_CANDIDATES.c.reservation_time,
+            BULK_CANDIDATES.c.duration_minutes,
+        )
+    ),
+)
+BULK_OVERLAPS: Select = select(BULK_CANDIDATES.c.position).where(
+    BULK_CONFLICTS.exists()
+)
+#: количество попыток массовой вставки при параллельной вставке
+#: пересекающегося бронирования в другую секцию
+BULK_ATTEMPTS = 3
+#: шаг почасовой статистики занятости
+ONE_HOUR = timedelta(hours=1)
+MICROSECOND = timedelta(microseconds=1)
+#: поля бронирования в данных событий
+EVENT_FIELDS = (
+    "id",
+    "table_id",
+    "customer_name",
+    "reservation_time",
+    "duration_minutes",
+)
+
+
+def archive_cutoff(horizon_days: int) -> datetime:
+    """
+    Граница архивации: бронирования, закончившиеся до неё, могут быть
+    перенесены в архив.
+
+    :param horizon_days: горизонт хранения в днях
+    :return:
+    """
+
+    return datetime.now(timezone.utc) - timedelta(days=horizon_days)
+
+
+def booked_minutes(period: Any, window: Any) -> Any:
+    """
+    Сумма минут пересечения периодов бронирований с интервалом (агрегат SQL).
+
+    :param period: столбец периода бронирования
+    :param window: интервал (tstzrange)
+    :return:
+    """
+
+    overlap = period.op("*")(window)
+    return cast(
+        func.sum(func.extract("epoch", func.upper(overlap) - func.lower(overlap)) / 60),
+        Integer,
+    )
+
+
+def to_values(reservation: Reservation) -> Dict[str, Any]:
+    return {column.name: getattr(reservation, column.name) for column in BULK_COLUMNS}
+
+
+def period(row: Dict[str, Any]) -> Tuple[datetime, datetime]:
+    start = row["reservation_time"]
+    return start, start + timedelta(minutes=row["duration_minutes"])
+
+
+def to_event(reservation: Union[Reservation, Dict[str, Any]]) -> Dict[str, Any]:
+    if isinstance(reservation, dict):
+        return {field: reservation[field] for field in EVENT_FIELDS}
+    return {field: getattr(reservation, field) for field in EVENT_FIELDS}
+
+
+def to_api_exception(exc: IntegrityError) -> Optional[ApiHTTPException]:
+    """
+    Преобразование ошибки ограничения БД при создании бронирования.
+
+    :param exc: ошибка
+    :return: исключение API или None, если ограничение неизвестно
+    """
+
+    sqlstate = getattr(exc.orig, "sqlstate", None)
+    if sqlstate == FOREIGN_KEY_VIOLATION:
+        return ObjectNotFoundException(detail="Столик не найден")
+    if sqlstate == EXCLUSION_VIOLATION:
+        return ConflictException(
+            detail="Столик уже забронирован в указанный временной промежуток"
+        )
+    if sqlstate == UNIQUE_VIOLATION:
+        return ConflictException()
+    return None
+
+
+def first_without_overlaps(rows: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Строки пачки без пересечений друг с другом: из пересекающихся строк
+    одного столика остаётся первая (как при ON CONFLICT DO NOTHING).
+
+    Принятые интервалы столика не пересекаются, поэтому хранятся
+    упорядоченными по началу, и каждая строка проверяется только
+    с соседними интервалами.
+
+    :param rows: значения полей бронирований
+    :return:
+    """
+
+    accepted: List[Dict[str, Any]] = []
+    starts: Dict[int, List[datetime]] = {}
+    ends: Dict[int, List[datetime]] = {}
+    for row in rows:
+        start, end = period(row)
+        table_starts = starts.setdefault(row["table_id"], [])
+        table_ends = ends.setdefault(row["table_id"], [])
+        position = bisect.bisect_right(table_starts, start)
+        if position and table_ends[position - 1] > start:
+            continue
+        if position < len(table_starts) and table_starts[position] < end:
+            continue
+        table_starts.insert(position, start)
+        table_ends.insert(position, end)
+        accepted.append(row)
+    return accepted
+
+
+def lock_keys(
+    table_id: int, start: datetime, end: datetime, per_day: bool
+) -> List[str]:
+    """
+    Ключи рекомендательных блокировок для проверки пересечений.
+
+    Пересекающиеся бронирования всегда имеют общий день, поэтому
+    блокировки по дням исключают гонку так же, как блокировка столика.
+    Ключи упорядочены, что исключает взаимоблокировки.
+
+    :param table_id: идентификатор столика
+    :param start: начало бронирования
+    :param end: конец бронирования
+    :param per_day: блокировка по дням (UTC) вместо всего столика
+    :return:
+    """
+
+    if not per_day:
+        return [f"reservation:{table_id}"]
+    return [f"reservation:{table_id}:{day}" for day in days_between(start, end)]
 
 
 class ReservationRepository:
-    def __init__(self, session: AsyncSession):
+    def __init__(
+        self,
+        session: AsyncSession,
+        concurrency: ConcurrencySettings = settings.concurrency,
+        retention: RetentionSettings = settings.retention,
+    ):
         self.session = session
+        self.events = EventProducer(session)
+        self.concurrency = concurrency
+        self.retention = retention
 
     async def get_all(self) -> List[Reservation]:
         result = await self.session.execute(select(Reservation))
         return result.scalars().all()
 
-    async def get_by_id(self, reservation_id: int) -> Optional[Reservation]:
-        return await self.session.get(Reservation, reservation_id)
+    async def get_page(
+        self,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None,
+        table_id: Optional[int] = None,
+        time_from: Optional[datetime] = None,
+        time_to: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Получение страницы бронирований, упорядоченных по (времени, идентификатору).
+
+        Выбираются только столбцы :data:`READ_FIELDS`, записи возвращаются
+        словарями без создания объектов ORM. Интервал, начинающийся раньше
+        границы архивации, включает архивированные бронирования.
+
+        :param limit: максимальное количество записей
+        :param after: ключ (время, идентификатор) последней записи предыдущей страницы
+        :param table_id: идентификатор столика
+        :param time_from: начало интервала времени бронирования (включительно)
+        :param time_to: конец интервала времени бронирования (не включительно)
+        :return:
+        """
+
+        source = self._source(time_from)
+        query = self._filter(source, table_id, time_from, time_to)
+        if after is not None:
+            query = query.where(
+                tuple_(source.c.reservation_time, source.c.id)
+                > tuple_(*map(literal, after))
+            )
+        query = query.order_by(source.c.reservation_time, source.c.id)
+
+        result = await self.session.execute(query.limit(limit))
+        return [dict(row) for row in result.mappings()]
+
+    async def stream(
+        self,
+        chunk_size: int,
+        table_id: Optional[int] = None,
+        time_from: Optional[datetime] = None,
+        time_to: Optional[datetime] = None,
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Потоковое чтение бронирований порциями через серверный курсор.
+
+        Записи возвращаются словарями из столбцов :data:`READ_FIELDS`,
+        с архивированными бронированиями, как в :meth:`get_page`.
+
+        :param chunk_size: размер порции
+        :param table_id: идентификатор столика
+        :param time_from: начало интервала времени бронирования (включительно)
+        :param time_to: конец интервала времени бронирования (не включительно)
+        :return:
+        """
+
+        source = self._source(time_from)
+        query = self._filter(source, table_id, time_from, time_to)
+        query = query.order_by(source.c.reservation_time, source.c.id)
+
+        result = await self.session.stream(
+            query.execution_options(yield_per=chunk_size)
+        )
+        async for chunk in result.mappings().partitions():
+            yield [dict(row) for row in chunk]
 
-    async def create(self, reservation: Reservation) -> Reservation:
-        table = await self.session.get(Table, reservation.table_id)
-        if not table:
-            raise ObjectNotFoundException(detail="Столик не найден")
+    async def get_busy_intervals(
+        self, time_from: datetime, time_to: datetime, table_id: Optional[int] = None
+    ) -> List[Tuple[int, Interval]]:
+        """
+        Получение занятых интервалов столиков, пересекающих [time_from, time_to).
 
-        conflict_query = select(Reservation).where(
+        :param time_from: начало интервала
+        :param time_to: конец интервала
+        :param table_id: идентификатор столика (None — все столики)
+        :return: пары (идентификатор столика, занятый интервал)
+        """
+
+        source = self._source(time_from)
+        query: Select = select(
+            source.c.table_id,
+            func.lower(source.c.period),
+            func.upper(source.c.period),
+        ).where(
+            *self._overlapping(
+                source, func.tstzrange(time_from, time_to), time_to, table_id
+            )
+        )
+
+        result = await self.session.execute(query)
+        return [(table_id, (start, end)) for table_id, start, end in result.all()]
+
+    async def get_occupancy_by_table(
+        self, time_from: datetime, time_to: datetime, table_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Занятость столиков за интервал [time_from, time_to): количество
+        пересекающих его бронирований и занятые в нём минуты.
+
+        Агрегация выполняется в БД, столики без бронирований не возвращаются.
+
+        :param time_from: начало интервала
+        :param time_to: конец интервала
+        :param table_id: идентификатор столика (None — все столики)
+        :return: записи с полями table_id, reservations, booked_minutes
+        """
+
+        source = self._source(time_from)
+        window = func.tstzrange(time_from, time_to)
+        query: Select = select(
+            source.c.table_id,
+            func.count().label("reservations"),
+            booked_minutes(source.c.period, window).label("booked_minutes"),
+        ).where(*self._overlapping(source, window, time_to, table_id))
+        query = query.group_by(source.c.table_id)
+        query = query.order_by(source.c.table_id)
+
+        result = await self.session.execute(query)
+        return [dict(row) for row in result.mappings()]
+
+    async def get_occupancy_by_hour(
+        self, time_from: datetime, time_to: datetime, table_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Почасовая занятость за интервал [time_from, time_to): для каждого часа
+        (generate_series, в том числе без бронирований) количество
+        пересекающих его бронирований и занятые в нём минуты.
+
+        :param time_from: начало интервала (округляется вниз до часа)
+        :param time_to: конец интервала
+        :param table_id: идентификатор столика (None — все столики)
+        :return: записи с полями start, reservations, booked_minutes
+        """
+
+        first_hour = func.date_trunc("hour", time_from)
+        hours = (
+            func.generate_series(
+                first_hour,
+                time_to - MICROSECOND,
+                ONE_HOUR,
+            )
+            .table_valued("start")
+            .render_derived(name="hour")
+        )
+        hour = func.tstzrange(hours.c.start, hours.c.start + ONE_HOUR)
+        window = func.tstzrange(first_hour, time_to)
+        source = self._source(time_from - ONE_HOUR)
+        query: Select = select(
+            hours.c.start,
+            func.count(source.c.id).label("reservations"),
+            func.coalesce(booked_minutes(source.c.period, hour), 0).label(
+                "booked_minutes"
+            ),
+        ).select_from(hours)
+        query = query.outerjoin(
+            source,
             and_(
-                Reservation.table_id == reservation.table_id,
+                source.c.period.overlaps(hour),
+                *self._overlapping(source, window, time_to, table_id),
+            ),
+        )
+        query = query.group_by(hours.c.start)
+        query = query.order_by(hours.c.start)
+
+        result = await self.session.execute(query)
+        return [dict(row) for row in result.mappings()]
+
+    def _source(self, time_from: Optional[datetime]) -> Any:
+        """
+        Источник бронирований для запроса за интервал, начинающийся
+        с time_from: объединение таблицы reservation с архивом (UNION ALL,
+        условия запроса применяются к каждой таблице по её индексам).
+
+        Архив читается, только если интервал начинается раньше границы
+        архива (см. :class:`ReservationArchiveBoundary`): условие
+        вычисляется в том же запросе один раз, и при его невыполнении
+        PostgreSQL не обращается к архиву. Граница сдвигается вместе
+        с переносом, поэтому запрос видит перенесённые бронирования
+        при любом горизонте архивации.
+
+        :param time_from: начало интервала (None — без ограничения)
+        :return: таблица или подзапрос со столбцами :data:`SOURCE_FIELDS`
+        """
+
+        live = Reservation.__table__
+        if not self.retention.archive_reads:
+            return live
+
+        archive = ReservationArchive.__table__
+        archived_until = select(
+            ReservationArchiveBoundary.archived_until
+        ).scalar_subquery()
+        archived = (
+            archived_until.is_not(None)
+            if time_from is None
+            else archived_until > time_from
+        )
+        return union_all(
+            select(*(live.c[field] for field in SOURCE_FIELDS)),
+            select(*(archive.c[field] for field in SOURCE_FIELDS)).where(archived),
+        ).subquery("reservation")
+
+    @staticmethod
+    def _overlapping(
+        source: Any, window: Any, time_to: datetime, table_id: Optional[int]
+    ) -> List[Any]:
+        conditions = [
+            source.c.period.overlaps(window),
+            # условие по ключу секционирования исключает более поздние секции
+            source.c.reservation_time < time_to,
+        ]
+        if table_id is not None:
+            conditions.append(source.c.table_id == table_id)
+        return conditions
+
+    async def get_by_id(self, reservation_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Получение бронирования по идентификатору, в том числе архивированного.
+
+        Запись возвращается словарём из столбцов :data:`READ_FIELDS`,
+        как в :meth:`get_page`.
+
+        :param reservation_id: идентификатор бронирования
+        :return:
+        """
+
+        source = self._source(None)
+        query: Select = select(*(source.c[field] for field in READ_FIELDS)).where(
+            source.c.id == reservation_id
+        )
+        result = await self.session.execute(query)
+        row = result.mappings().first()
+        return dict(row) if row else None
+
+    async def create(
+        self,
+        reservation: Reservation,
+        before_commit: Optional[Callable[[Reservation], Awaitable[None]]] = None,
+    ) -> Reservation:
+        """
+        Создание бронирования.
+
+        Существование столика и отсутствие пересечений проверяются самой БД
+        (внешний ключ и ограничение-исключение по периоду бронирования),
+        поэтому конкурентные запросы не могут забронировать столик дважды.
+        Стратегии advisory_lock и serializable (см. :class:`ConcurrencySettings`)
+        дополнительно проверяют пересечения до вставки, что исключает двойное
+        бронирование и без ограничения-исключения. Событие о создании
+        записывается в outbox той же транзакцией.
+
+        :param reservation: новое бронирование
+        :param before_commit: асинхронная функция, вызываемая после вставки
+            бронирования (идентификатор уже назначен) до фиксации транзакции;
+            добавленные ею в сессию записи сохраняются той же транзакцией
+        :return:
+        """
+
+        values = to_values(reservation)
+        pending = [reservation]
+
+        async def attempt() -> Reservation:
+            # объект отменённой вставки не используется повторно
+            current = pending.pop() if pending else Reservation(**values)
+            await self._create([current], before_commit)
+            await self.session.refresh(current)
+            return current
+
+        return await self._with_retries(attempt)
+
+    async def create_many(
+        self, reservations: Sequence[Reservation]
+    ) -> List[Dict[str, Any]]:
+        """
+        Создание нескольких бронирований одной транзакцией.
+
+        Бронирования вставляются одним запросом с той же стратегией
+        исключения двойного бронирования, что и :meth:`create`; если хотя бы
+        одно пересекается с другим бронированием, не создаётся ни одно.
+
+        :param reservations: новые бронирования
+        :return: созданные бронирования словарями с полями ReservationRead
+        """
+
+        values = [to_values(reservation) for reservation in reservations]
+        pending = [list(reservations)]
+
+        async def attempt() -> List[Dict[str, Any]]:
+            current = (
+                pending.pop() if pending else [Reservation(**row) for row in values]
             )
+            return await self._create(current, None)
+
+        return await self._with_retries(attempt)
+
+    async def _with_retries(self, attempt: Callable[[], Awaitable[T]]) -> T:
+        """
+        Выполнение попытки создания бронирований; для стратегии serializable —
+        с повторами после ошибки сериализации или взаимоблокировки.
+
+        :param attempt: попытка (каждый раз с новыми объектами бронирований)
+        :return: результат попытки
+        """
+
+        if self.concurrency.strategy != ConcurrencyStrategy.SERIALIZABLE:
+            return await attempt()
+
+        delay = self.concurrency.retry_delay
+        for _ in range(self.concurrency.max_retries):
+            try:
+                return await attempt()
+            except DBAPIError as exc:
+                if getattr(exc.orig, "sqlstate", None) not in RETRYABLE_ERRORS:
+                    raise
+            # случайная пауза разводит повторы конкурирующих транзакций
+            await asyncio.sleep(random.uniform(0, delay))
+            delay = min(delay * 2, self.concurrency.retry_max_delay)
+
+        try:
+            return await attempt()
+        except DBAPIError as exc:
+            if getattr(exc.orig, "sqlstate", None) not in RETRYABLE_ERRORS:
+                raise
+            raise ServiceUnavailableException(
+                detail="Не удалось выполнить бронирование из-за конкурентных "
+                "запросов, повторите запрос"
+            ) from exc
+
+    async def _create(
+        self,
+        reservations: List[Reservation],
+        before_commit: Optional[Callable[[Reservation], Awaitable[None]]],
+    ) -> List[Dict[str, Any]]:
+        rows = [to_values(reservation) for reservation in reservations]
+        strategy = self.concurrency.strategy
+
+        try:
+            if strategy == ConcurrencyStrategy.SERIALIZABLE:
+                if self.session.in_transaction():
+                    await self.session.commit()
+                await self.session.connection(
+                    execution_options={"isolation_level": "SERIALIZABLE"}
+                )
+            elif strategy == ConcurrencyStrategy.ADVISORY_LOCK:
+                # общий порядок ключей исключает взаимоблокировки пачек
+                keys = {
+                    key
+                    for row in rows
+                    for key in lock_keys(
+                        row["table_id"], *period(row), self.concurrency.lock_per_day
+                    )
+                }
+                for key in sorted(keys):
+                    await self.session.execute(
+                        select(
+                            func.pg_advisory_xact_lock(func.hashtextextended(key, 0))
+                        )
+                    )
+
+            if strategy != ConcurrencyStrategy.CONSTRAINT and await self._overlaps(
+                rows
+            ):
+                await self.session.rollback()
+                raise ConflictException(
+                    detail="Столик уже забронирован в указанный временной промежуток"
+                )
+
+            self.session.add_all(reservations)
+            await self.session.flush()
+            created = [to_event(reservation) for reservation in reservations]
+            self.events.publish(RESERVATION_CREATED, *created)
+            if before_commit is not None:
+                for reservation in reservations:
+                    await before_commit(reservation)
+            await self.session.commit()
+        except IntegrityError as exc:
+            await self.session.rollback()
+            error = to_api_exception(exc)
+            if error is None:
+                raise
+            raise error from exc
+        except DBAPIError:
+            await self.session.rollback()
+            raise
+
+        await collection_versions.bump(self.session, RESERVATIONS)
+        for row in rows:
+            availability_cache.invalidate(*period(row))
+        return created
+
+    async def _overlaps(self, rows: List[Dict[str, Any]]) -> bool:
+        """
+        Пересекаются ли бронирования друг с другом или с существующими.
+
+        :param rows: значения полей бронирований
+        :return:
+        """
+
+        if len(first_without_overlaps(rows)) < len(rows):
+            return True
+        if len(rows) > 1:
+            query = select(BULK_OVERLAPS.exists())
+            return bool(
+                await self.session.scalar(query, to_columns(rows, BULK_COLUMNS[1:]))
+            )
+
+        start, end = period(rows[0])
+        # условие в форме ограничения-исключения секций: поиск по его
+        # GiST-индексу читает только пересекающиеся бронирования столика,
+        # а не все его строки, и при SERIALIZABLE не блокирует предикатом
+        # всю секцию (ложные конфликты с бронированиями других столиков)
+        query = select(Reservation.id).where(
+            func.int4range(Reservation.table_id, Reservation.table_id, "[]")
+            == func.int4range(rows[0]["table_id"], rows[0]["table_id"], "[]"),
+            Reservation.period.overlaps(func.tstzrange(start, end)),
+            Reservation.reservation_time < end,
+        )
+        return bool(await self.session.scalar(select(query.exists())))
+
+    async def bulk_create(
+        self, rows: Sequence[Dict[str, Any]]
+    ) -> List[Union[int, ApiHTTPException]]:
+        """
+        Создание пачки бронирований одним запросом INSERT ... SELECT FROM unnest.
+
+        Строки, пересекающиеся с существующими бронированиями (одним запросом
+        для всей пачки) или с предыдущими строками пачки, пропускаются до вставки:
+        пересечения между секциями проверяет триггер, ошибку которого
+        не подавляет ON CONFLICT. Пересечения с бронированиями, вставленными
+        параллельно, в той же секции пропускаются ON CONFLICT DO NOTHING,
+        в другой секции — приводят к повтору проверки и вставки. Строки
+        вставляются в порядке (столик, время), поэтому параллельные пачки
+        блокируют столики в одном порядке; взаимоблокировка также приводит
+        к повтору.
+
+        :param rows: значения полей бронирований
+        :return: для каждой строки идентификатор созданного бронирования
+            или исключение с причиной отказа
+        """
+
+        query: Select = select(Table.id).where(
+            Table.id.in_({row["table_id"] for row in rows})
         )
+        result = await self.session.execute(query)
+        table_ids = set(result.scalars().all())
+
+        inserted: Dict[Tuple[int, datetime], int] = {}
+        candidates = [row for row in rows if row["table_id"] in table_ids]
+        if candidates:
+            inserted = await self._bulk_insert(candidates)
 
-        conflicts = await self.session.execute(conflict_query)
-        if conflicts.scalars().all():
-            raise ConflictException(
-                detail="Столик уже забронирован в указанный временной промежуток"
+        outcomes: List[Union[int, ApiHTTPException]] = []
+        created: List[Dict[str, Any]] = []
+        for row in rows:
+            # у бронирований-дубликатов одинаковый ключ, идентификатор
+            # достаётся только первому из них
+            reservation_id = inserted.pop(
+                (row["table_id"], row["reservation_time"]), None
             )
+            if row["table_id"] not in table_ids:
+                outcomes.append(ObjectNotFoundException(detail="Столик не найден"))
+            elif reservation_id is None:
+                outcomes.append(
+                    ConflictException(
+                        detail="Столик уже забронирован в указанный временной промежуток"
+                    )
+                )
+            else:
+                outcomes.append(reservation_id)
+                created.append(to_event({**row, "id": reservation_id}))
 
-        self.session.add(reservation)
-        await self.session.commit()
-        await self.session.refresh(reservation)
-        return reservation
+        if candidates:
+            self.events.publish(RESERVATION_CREATED, *created)
+            await self.session.commit()
+        if created:
+            await collection_versions.bump(self.session, RESERVATIONS)
+
+        for row in created:
+            availability_cache.invalidate(
+                row["reservation_time"],
+                row["reservation_time"] + timedelta(minutes=row["duration_minutes"]),
+            )
+        return outcomes
+
+    async def _bulk_insert(
+        self, candidates: List[Dict[str, Any]]
+    ) -> Dict[Tuple[int, datetime], int]:
+        for attempt in range(1, BULK_ATTEMPTS + 1):
+            result = await self.session.execute(
+                BULK_OVERLAPS, to_columns(candidates, BULK_COLUMNS[1:])
+            )
+            overlapping = {position - 1 for position in result.scalars()}
+            accepted = first_without_overlaps(
+                [
+                    row
+                    for index, row in enumerate(candidates)
+                    if index not in overlapping
+                ]
+            )
+            if not accepted:
+                return {}
+            # триггер пересечений блокирует столики в порядке вставки строк:
+            # общий порядок исключает взаимоблокировку параллельных пачек
+            accepted.sort(key=lambda row: (row["table_id"], row["reservation_time"]))
+
+            try:
+                async with self.session.begin_nested():
+                    result = await self.session.execute(
+                        BULK_INSERT, to_columns(accepted, BULK_COLUMNS)
+                    )
+                    return {
+                        (table_id, reservation_time): reservation_id
+                        for reservation_id, table_id, reservation_time in result.all()
+                    }
+            except DBAPIError as exc:
+                sqlstate = getattr(exc.orig, "sqlstate", None)
+                retryable = sqlstate in (EXCLUSION_VIOLATION, DEADLOCK_DETECTED)
+                if not retryable or attempt == BULK_ATTEMPTS:
+                    raise
+        return {}
 
     async def delete(self, reservation_id: int) -> None:
-        reservation = await self.get_by_id(reservation_id)
+        reservation = await self.session.get(Reservation, reservation_id)
         if not reservation:
             raise ValueError("Бронирование не найдено")
 
+        start = reservation.reservation_time
+        end = start + timedelta(minutes=reservation.duration_minutes)
+
+        self.events.publish(RESERVATION_DELETED, to_event(reservation))
         await self.session.delete(reservation)
         await self.session.commit()
+        await collection_versions.bump(self.session, RESERVATIONS)
+        availability_cache.invalidate(start, end)
+
+    @staticmethod
+    def _filter(
+        source: Any,
+        table_id: Optional[int],
+        time_from: Optional[datetime],
+        time_to: Optional[datetime],
+    ) -> Select:
+        # явные метки: ключи записей — обычные строки (orjson не принимает
+        # метки SQLAlchemy, которые серверный курсор возвращает для подзапроса)
+        query = select(*(source.c[field].label(field) for field in READ_FIELDS))
+        if table_id is not None:
+            query = query.where(source.c.table_id == table_id)
+        if time_from is not None:
+            query = query.where(source.c.reservation_time >= time_from)
+        if time_to is not None:
+            query = query.where(source.c.reservation_time < time_to)
+
+        return query
@@ -1,41 +1,254 @@
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+)
 
-from sqlalchemy import select
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Delete, Select
 
 from exceptions import ConflictException, ObjectNotFoundException
-from models.models import Reservation, Table
+from integrations.events.producer import (
+    RESERVATION_DELETED,
+    TABLE_CREATED,
+    TABLE_DELETED,
+    EventProducer,
+)
+from models.models import Reservation, ReservationArchive, Table
+from repositories.bulk import to_columns, unnest_insert
+from repositories.reservation_repository import EVENT_FIELDS as RESERVATION_FIELDS
+from services.collection_versions import RESERVATIONS, TABLES, collection_versions
+from services.free_slot_cache import availability_cache
+from services.retention import extend_boundary, move_to_archive
+from services.table_cache import table_cache
+
+#: столбцы, заполняемые при массовой загрузке
+BULK_COLUMNS = [
+    Table.__table__.c.name,
+    Table.__table__.c.seats,
+    Table.__table__.c.location,
+]
+#: массовая вставка столиков
+BULK_INSERT = unnest_insert(Table.__table__, BULK_COLUMNS).returning(Table.id)
+#: поля столика, сохраняемые в кэше каталога (в порядке полей TableRead)
+CACHED_FIELDS = ("name", "seats", "location", "id")
+#: столбцы, выбираемые для списков столиков
+READ_COLUMNS = [getattr(Table, field) for field in CACHED_FIELDS]
+
+
+def to_cached(tables: Sequence[Table]) -> List[Dict[str, Any]]:
+    return [
+        {field: getattr(table, field) for field in CACHED_FIELDS} for table in tables
+    ]
+
+
+def from_cached(rows: Sequence[Dict[str, Any]]) -> List[Table]:
+    return [Table(**row) for row in rows]
 
 
 class TableRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
+        self.events = EventProducer(session)
 
     async def get_all(self) -> List[Table]:
         result = await self.session.execute(select(Table))
         return result.scalars().all()
 
+    async def get_page(
+        self, limit: int, after: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Получение страницы столиков, упорядоченных по идентификатору.
+
+        Выбираются только столбцы :data:`READ_COLUMNS`, записи возвращаются
+        словарями без создания объектов ORM. Результат кэшируется в кэше
+        каталога (см. :data:`table_cache`).
+
+        :param limit: максимальное количество записей
+        :param after: идентификатор последней записи предыдущей страницы
+        :return:
+        """
+
+        async def load() -> List[Dict[str, Any]]:
+            query: Select = select(*READ_COLUMNS)
+            if after is not None:
+                query = query.where(Table.id > after)
+
+            query = query.order_by(Table.id)
+            result = await self.session.execute(query.limit(limit))
+            return [dict(row) for row in result.mappings()]
+
+        return await self._cached(f"page:{limit}:{after}", load)
+
+    async def stream(self, chunk_size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Потоковое чтение столиков порциями через серверный курсор.
+
+        Записи возвращаются словарями из столбцов :data:`READ_COLUMNS`.
+
+        :param chunk_size: размер порции
+        :return:
+        """
+
+        query: Select = select(*READ_COLUMNS).order_by(Table.id)
+        query = query.execution_options(yield_per=chunk_size)
+        result = await self.session.stream(query)
+        async for chunk in result.mappings().partitions():
+            yield [dict(row) for row in chunk]
+
+    async def search(
+        self, seats: Optional[int] = None, location: Optional[str] = None
+    ) -> List[Table]:
+        """
+        Поиск столиков по вместимости и расположению.
+
+        Результат кэшируется в кэше каталога (см. :data:`table_cache`).
+
+        :param seats: минимальное количество мест
+        :param location: расположение
+        :return:
+        """
+
+        async def load() -> List[Dict[str, Any]]:
+            query: Select = select(Table)
+            if seats is not None:
+                query = query.where(Table.seats >= seats)
+            if location is not None:
+                query = query.where(Table.location == location)
+
+            query = query.order_by(Table.id)
+            result = await self.session.execute(query)
+            return to_cached(result.scalars().all())
+
+        rows = await self._cached(f"search:{seats}:{location}", load)
+        return from_cached(rows)
+
     async def get_by_id(self, table_id: int) -> Optional[Table]:
-        return await self.session.get(Table, table_id)
+        """
+        Получение столика по идентификатору через кэш каталога.
+
+        Возвращаемый объект не привязан к сессии и предназначен только для чтения.
+
+        :param table_id: идентификатор столика
+        :return:
+        """
+
+        async def load() -> List[Dict[str, Any]]:
+            table = await self.session.get(Table, table_id)
+            return to_cached([table] if table else [])
+
+        rows = await self._cached(f"id:{table_id}", load)
+        return from_cached(rows)[0] if rows else None
+
+    async def _cached(self, key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Чтение через кэш каталога по ключу с версией коллекции столиков.
+
+        Версия та же, что в заголовке ETag ответа: изменение в другом
+        процессе не сбрасывает кэш этого процесса, но меняет версию,
+        и устаревшая запись не попадает в ответ с новым ETag.
+
+        :param key: ключ записи без версии
+        :param load: загрузка значения из БД
+        :return:
+        """
+
+        version = await collection_versions.get(self.session, TABLES)
+        if version is not None:
+            key = f"{version.number}:{key}"
+        return await table_cache.get_or_load(key, load)
 
     async def create(self, table: Table) -> Table:
         self.session.add(table)
+        await self.session.flush()
+        self.events.publish(TABLE_CREATED, to_cached([table])[0])
         await self.session.commit()
+        await collection_versions.bump(self.session, TABLES)
         await self.session.refresh(table)
+        await table_cache.clear()
         return table
 
+    async def bulk_create(self, rows: Sequence[Dict[str, Any]]) -> List[int]:
+        """
+        Создание пачки столиков одним запросом INSERT ... SELECT FROM unnest.
+
+        :param rows: значения полей столиков
+        :return: идентификаторы созданных столиков в порядке строк
+        """
+
+        result = await self.session.execute(BULK_INSERT, to_columns(rows, BULK_COLUMNS))
+        table_ids = list(result.scalars())
+        self.events.publish(
+            TABLE_CREATED,
+            *({**row, "id": table_id} for row, table_id in zip(rows, table_ids)),
+        )
+        await self.session.commit()
+        await collection_versions.bump(self.session, TABLES)
+        await table_cache.clear()
+        return table_ids
+
     async def delete(self, table_id: int) -> None:
-        table = await self.get_by_id(table_id)
+        """
+        Удаление столика с переносом его прошедших бронирований в архив.
+
+        Удаление запрещено, пока у столика есть текущие или будущие
+        бронирования. Проверка выполняется запросом EXISTS по индексу
+        (table_id, upper(period)) без загрузки бронирований. Бронирование,
+        созданное параллельно с удалением, не даст удалить столик
+        (нарушение внешнего ключа). Прошедшие бронирования переносятся
+        в reservation_archive (история и сводка занятости по дням
+        сохраняются) той же транзакцией, что и удаление столика, вместе
+        со сдвигом границы архива. События об удалении бронирований
+        и столика записываются в outbox той же транзакцией.
+
+        :param table_id: идентификатор столика
+        :return:
+        """
+
+        table = await self.session.get(Table, table_id)
         if not table:
             raise ObjectNotFoundException(detail="Столик не найден")
 
-        result = await self.session.execute(
-            select(Reservation).where(Reservation.table_id == table_id)
+        period_end = func.upper(Reservation.period)
+        active: Select = select(Reservation.id).where(
+            Reservation.table_id == table_id, period_end > func.now()
         )
-        if result.scalars().first():
+        if await self.session.scalar(select(active.exists())):
             raise ConflictException(
                 detail="Невозможно удалить столик с активными бронированиями"
             )
 
-        await self.session.delete(table)
-        await self.session.commit()
+        past: Delete = delete(Reservation).where(
+            Reservation.table_id == table_id, period_end <= func.now()
+        )
+        result = await self.session.execute(
+            move_to_archive(past).returning(
+                *(getattr(ReservationArchive, field) for field in RESERVATION_FIELDS)
+            )
+        )
+        archived = [dict(row) for row in result.mappings()]
+        if archived:
+            await self.session.execute(extend_boundary(datetime.now(timezone.utc)))
+        self.events.publish(RESERVATION_DELETED, *archived)
+        self.events.publish(TABLE_DELETED, to_cached([table])[0])
+        await self.session.execute(delete(Table).where(Table.id == table_id))
+        try:
+            await self.session.commit()
+        except IntegrityError as exc:
+            await self.session.rollback()
+            raise ConflictException(
+                detail="Невозможно удалить столик с активными бронированиями"
+            ) from exc
+
+        await collection_versions.bump(self.session, TABLES, RESERVATIONS)
+        await table_cache.clear()
+        availability_cache.clear()
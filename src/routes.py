@@ -1,10 +1,12 @@
 from fastapi import FastAPI
 
-from transport.handlers import reservations, tables
+from transport.handlers import reports, reservations, stream, tables
+from transport.handlers.reports import tag_reports
 from transport.handlers.reservations import tag_reservations
+from transport.handlers.stream import tag_stream
 from transport.handlers.tables import tag_tables
 
-metadata_tags = [tag_tables, tag_reservations]
+metadata_tags = [tag_tables, tag_reservations, tag_stream, tag_reports]
 
 
 def setup_routes(app: FastAPI) -> None:
@@ -18,3 +20,9 @@ def setup_routes(app: FastAPI) -> None:
         prefix="/api/v1/reservations",
         tags=[tag_reservations["name"]],
     )
+    app.include_router(
+        stream.router, prefix="/api/v1/stream", tags=[tag_stream["name"]]
+    )
+    app.include_router(
+        reports.router, prefix="/api/v1/reports", tags=[tag_reports["name"]]
+    )
@@ -0,0 +1,63 @@
+import base64
+import binascii
+import json
+from typing import Any, Callable, Generic, List, Optional, Sequence, TypeVar
+
+from fastapi import Query
+from pydantic import BaseModel
+from pydantic.generics import GenericModel
+
+from exceptions import ValidationErrorException
+
+T = TypeVar("T")
+
+
+class CursorParams(BaseModel):
+    """
+    Параметры постраничного (keyset) вывода.
+    """
+
+    #: курсор, полученный в поле next_page предыдущей страницы
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы")
+    #: количество записей на странице
+    size: int = Query(50, ge=1, le=500, description="Размер страницы")
+
+
+class CursorPage(GenericModel, Generic[T]):
+    """
+    Страница списка с курсором для получения следующей страницы.
+    """
+
+    items: Sequence[T]
+    #: курсор следующей страницы (отсутствует на последней странице)
+    next_page: Optional[str] = None
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Кодирование значений ключа последней записи страницы в непрозрачный курсор.
+
+    :param values: значения ключа сортировки
+    :return:
+    """
+
+    raw = json.dumps(values, default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str, *parsers: Callable[[Any], Any]) -> List[Any]:
+    """
+    Декодирование курсора в значения ключа сортировки.
+
+    :param cursor: курсор из параметров запроса
+    :param parsers: функции преобразования для каждого значения ключа
+    :return:
+    """
+
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError(cursor)
+        return [parse(value) for parse, value in zip(parsers, values)]
+    except (binascii.Error, TypeError, ValueError) as exc:
+        raise ValidationErrorException(detail="Некорректный курсор") from exc
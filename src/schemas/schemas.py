@@ -1,5 +1,5 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import Any, List, Optional
 
 from pydantic import BaseModel, Field, validator
 from pytz import timezone
@@ -22,6 +22,15 @@ class TableRead(TableBase):
         from_attributes = True
 
 
+class FreeInterval(BaseModel):
+    start: datetime
+    end: datetime
+
+
+class TableAvailability(TableRead):
+    free: List[FreeInterval]
+
+
 class ReservationBase(BaseModel):
     customer_name: str = Field(..., min_length=1, max_length=100)
     table_id: int
@@ -49,3 +58,42 @@ class ReservationRead(ReservationBase):
 
     class Config:
         from_attributes = True
+
+
+class Occupancy(BaseModel):
+    #: идентификатор столика (при группировке по столикам)
+    table_id: Optional[int] = None
+    #: начало часа (при группировке по часам)
+    start: Optional[datetime] = None
+    #: количество бронирований, пересекающих интервал
+    reservations: int
+    #: занятые минуты внутри интервала (сумма по бронированиям)
+    booked_minutes: int
+
+
+class DailyOccupancyRead(BaseModel):
+    #: день (UTC), в который начинаются бронирования
+    day: date
+    #: расположение (зал)
+    location: str
+    #: количество бронирований
+    reservations: int
+    #: забронированные места (сумма мест столиков)
+    seats: int
+    #: забронированные минуты
+    booked_minutes: int
+
+
+class BulkItemResult(BaseModel):
+    #: порядковый номер записи во входных данных
+    index: int
+    #: "created" или код ошибки
+    status: str
+    id: Optional[int] = None
+    detail: Optional[Any] = None
+
+
+class BulkResult(BaseModel):
+    created: int
+    failed: int
+    items: List[BulkItemResult]
@@ -0,0 +1,232 @@
+"""
+Запуск приложения в production-режиме.
+
+Приложение импортируется и сокет открывается в главном процессе, после чего
+запускается --workers рабочих процессов uvicorn (fork). Пулы соединений с БД
+создаются в каждом рабочем процессе при запуске приложения, поэтому
+соединения не наследуются между процессами. uvloop и httptools
+используются, если установлены.
+
+По SIGTERM (или SIGINT) рабочие процессы перестают принимать соединения,
+дожидаются завершения начатых запросов (и фиксации их транзакций),
+выполняют события shutdown приложения (в том числе закрытие пулов) и
+завершаются. Процессы, не завершившиеся за --graceful-timeout секунд,
+принудительно останавливаются. Упавший рабочий процесс перезапускается.
+
+Пример::
+
+    python -m server --host 0.0.0.0 --port 8000 --workers 4
+
+Для общих метрик всех процессов задайте PROMETHEUS_MULTIPROC_DIR до запуска.
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+#: сигналы, по которым сервер плавно завершает работу
+SHUTDOWN_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+#: файл настройки логирования (как в docker-compose)
+LOG_CONFIG = "logging.conf"
+
+
+def default_workers() -> int:
+    """
+    Количество рабочих процессов по умолчанию: по одному на ядро процессора.
+
+    :return:
+    """
+
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+
+class Supervisor:
+    """
+    Главный процесс: запуск, перезапуск и остановка рабочих процессов.
+    """
+
+    def __init__(
+        self,
+        config: uvicorn.Config,
+        sockets: List[socket.socket],
+        workers: int,
+        graceful_timeout: float,
+    ):
+        self.config = config
+        self.sockets = sockets
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.children: Dict[int, int] = {}
+        self.should_exit = False
+
+    def spawn(self, number: int) -> None:
+        pid = os.fork()
+        if pid:
+            self.children[pid] = number
+            return
+
+        # рабочий процесс: обработчики сигналов устанавливает uvicorn
+        for signum in SHUTDOWN_SIGNALS:
+            signal.signal(signum, signal.SIG_DFL)
+        exit_code = 0
+        try:
+            uvicorn.Server(self.config).run(sockets=self.sockets)
+        except BaseException:  # pylint: disable=broad-except
+            logger.exception("Ошибка рабочего процесса %s", number)
+            exit_code = 1
+        finally:
+            os._exit(exit_code)  # pylint: disable=protected-access
+
+    def handle_exit(self, signum: int, _frame: object) -> None:
+        self.should_exit = True
+
+    def run(self) -> int:
+        for signum in SHUTDOWN_SIGNALS:
+            signal.signal(signum, self.handle_exit)
+
+        for number in range(self.workers):
+            self.spawn(number)
+        logger.info("Запущено рабочих процессов: %s", self.workers)
+
+        while not self.should_exit:
+            pid, status = self.reap()
+            if pid and not self.should_exit:
+                number = self.children.pop(pid)
+                logger.warning(
+                    "Рабочий процесс %s (pid %s) завершился с кодом %s, перезапуск",
+                    number,
+                    pid,
+                    os.waitstatus_to_exitcode(status),
+                )
+                self.spawn(number)
+            elif not pid:
+                time.sleep(0.2)
+
+        return self.stop()
+
+    def reap(self) -> Tuple[int, int]:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return 0, 0
+        if pid and "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+            # метрики-gauge завершённого процесса больше не учитываются
+            from prometheus_client import (  # pylint: disable=import-outside-toplevel
+                multiprocess,
+            )
+
+            multiprocess.mark_process_dead(pid)  # type: ignore[no-untyped-call]
+        return pid, status
+
+    def stop(self) -> int:
+        """
+        Плавная остановка рабочих процессов.
+
+        :return: код завершения (0, если все процессы завершились вовремя)
+        """
+
+        logger.info("Остановка рабочих процессов")
+        for pid in self.children:
+            os.kill(pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + self.graceful_timeout
+        while self.children and time.monotonic() < deadline:
+            pid, _ = self.reap()
+            if pid:
+                self.children.pop(pid, None)
+            else:
+                time.sleep(0.1)
+
+        for pid in self.children:
+            logger.warning("Рабочий процесс (pid %s) остановлен принудительно", pid)
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        return 1 if self.children else 0
+
+
+def build_config(args: argparse.Namespace) -> uvicorn.Config:
+    # приложение импортируется до fork: рабочие процессы получают его готовым,
+    # а движки БД создаются уже в них (см. integrations.db.session.Database)
+    from main import app  # pylint: disable=import-outside-toplevel
+
+    config = uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        loop="auto",
+        http="auto",
+        lifespan="on",
+        log_config=LOG_CONFIG if os.path.exists(LOG_CONFIG) else None,
+        access_log=args.access_log,
+        proxy_headers=True,
+        forwarded_allow_ips=args.forwarded_allow_ips,
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+    )
+    config.load()
+    return config
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="0.0.0.0", help="адрес")
+    parser.add_argument("--port", type=int, default=8000, help="порт")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=default_workers(),
+        help="количество рабочих процессов (по умолчанию — по числу ядер)",
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=float,
+        default=30,
+        help="время на завершение начатых запросов при остановке в секундах",
+    )
+    parser.add_argument(
+        "--keep-alive", type=int, default=5, help="время keep-alive в секундах"
+    )
+    parser.add_argument(
+        "--backlog", type=int, default=2048, help="длина очереди соединений"
+    )
+    parser.add_argument(
+        "--forwarded-allow-ips",
+        default=None,
+        help="адреса прокси, которым доверяются заголовки X-Forwarded-*",
+    )
+    parser.add_argument(
+        "--no-access-log",
+        dest="access_log",
+        action="store_false",
+        help="не записывать журнал запросов",
+    )
+    args = parser.parse_args(argv)
+
+    config = build_config(args)
+    if args.workers <= 1:
+        uvicorn.Server(config).run()
+        return 0
+
+    sock = config.bind_socket()
+    supervisor = Supervisor(config, [sock], args.workers, args.graceful_timeout)
+    try:
+        return supervisor.run()
+    finally:
+        sock.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from exceptions import ValidationErrorException
+from models.models import Table
+from repositories.reservation_repository import ReservationRepository
+from repositories.table_repository import TableRepository
+from services.free_slot_cache import (
+    BusyIntervals,
+    FreeSlotCache,
+    Interval,
+    availability_cache,
+    day_start,
+    days_between,
+)
+
+#: максимальная длина интервала поиска свободного времени
+MAX_WINDOW = timedelta(days=31)
+
+
+def free_intervals(
+    busy: Iterable[Interval], start: datetime, end: datetime
+) -> List[Interval]:
+    """
+    Вычисление свободных интервалов внутри [start, end).
+
+    Занятые интервалы сортируются и сливаются за один проход,
+    промежутки между ними возвращаются как свободные.
+
+    :param busy: занятые интервалы (могут пересекаться и идти в любом порядке)
+    :param start: начало окна
+    :param end: конец окна
+    :return:
+    """
+
+    free = []
+    cursor = start
+    for busy_start, busy_end in sorted(busy):
+        if busy_start >= end:
+            break
+        if busy_start > cursor:
+            free.append((cursor, busy_start))
+        cursor = max(cursor, busy_end)
+    if cursor < end:
+        free.append((cursor, end))
+
+    return free
+
+
+class AvailabilityService:
+    """
+    Поиск свободного времени столиков.
+    """
+
+    def __init__(
+        self,
+        table_repository: TableRepository,
+        reservation_repository: ReservationRepository,
+        cache: FreeSlotCache = availability_cache,
+    ):
+        self.table_repository = table_repository
+        self.reservation_repository = reservation_repository
+        self.cache = cache
+
+    async def search(
+        self,
+        time_from: datetime,
+        time_to: datetime,
+        seats: Optional[int] = None,
+        location: Optional[str] = None,
+    ) -> List[Tuple[Table, List[Interval]]]:
+        """
+        Поиск свободных интервалов подходящих столиков в окне [time_from, time_to).
+
+        :param time_from: начало окна
+        :param time_to: конец окна
+        :param seats: минимальное количество мест
+        :param location: расположение
+        :return: пары (столик, свободные интервалы)
+        """
+
+        # время без временной зоны считается временем UTC
+        time_from, time_to = (
+            value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+            for value in (time_from, time_to)
+        )
+        if time_from >= time_to:
+            raise ValidationErrorException(
+                detail="Начало интервала должно быть раньше его окончания"
+            )
+        if time_to - time_from > MAX_WINDOW:
+            raise ValidationErrorException(
+                detail=f"Интервал поиска не может превышать {MAX_WINDOW.days} дней"
+            )
+
+        tables = await self.table_repository.search(seats=seats, location=location)
+        busy = await self._get_busy(time_from, time_to)
+
+        return [
+            (table, free_intervals(busy.get(table.id, ()), time_from, time_to))
+            for table in tables
+        ]
+
+    async def _get_busy(
+        self, time_from: datetime, time_to: datetime
+    ) -> Dict[int, Set[Interval]]:
+        if not self.cache.enabled:
+            rows = await self.reservation_repository.get_busy_intervals(
+                time_from, time_to
+            )
+            busy: Dict[int, Set[Interval]] = defaultdict(set)
+            for table_id, interval in rows:
+                busy[table_id].add(interval)
+            return busy
+
+        cached = {day: self.cache.get(day) for day in days_between(time_from, time_to)}
+        missing = [day for day, day_busy in cached.items() if day_busy is None]
+        loaded = await self._load_days(missing[0], missing[-1]) if missing else {}
+
+        # бронирование через полночь попадает в несколько дней
+        busy = defaultdict(set)
+        for day, day_busy in cached.items():
+            if day_busy is None:
+                day_busy = loaded[day]
+            for table_id, intervals in day_busy.items():
+                busy[table_id].update(intervals)
+        return busy
+
+    async def _load_days(self, first: date, last: date) -> Dict[date, BusyIntervals]:
+        """
+        Загрузка занятых интервалов за дни [first, last] одним запросом
+        и сохранение их в кэш.
+
+        :param first: первый день
+        :param last: последний день
+        :return:
+        """
+
+        rows = await self.reservation_repository.get_busy_intervals(
+            day_start(first), day_start(last) + timedelta(days=1)
+        )
+
+        loaded: Dict[date, BusyIntervals] = {}
+        day = first
+        while day <= last:
+            loaded[day] = defaultdict(list)
+            day += timedelta(days=1)
+
+        for table_id, (start, end) in rows:
+            for day in days_between(start, end):
+                if day in loaded:
+                    loaded[day][table_id].append((start, end))
+
+        for day, day_busy in loaded.items():
+            self.cache.set(day, dict(day_busy))
+
+        return loaded
@@ -0,0 +1,192 @@
+import asyncio
+from datetime import timedelta
+from typing import Any, AsyncContextManager, Callable, Dict, List, Tuple
+
+from fastapi import FastAPI
+
+from exceptions import ConflictException
+from integrations.db.session import async_session
+from models.models import Reservation
+from repositories.reservation_repository import ReservationRepository
+from schemas.schemas import ReservationCreate
+from services.free_slot_cache import Interval
+from settings import settings
+
+#: запрос на бронирование и ожидающий его результата обработчик
+BookingRequest = Tuple[ReservationCreate, "asyncio.Future[Dict[str, Any]]"]
+
+
+def period(reservation: ReservationCreate) -> Interval:
+    start = reservation.reservation_time
+    return start, start + timedelta(minutes=reservation.duration_minutes)
+
+
+def overlaps(interval: Interval, busy: List[Interval]) -> bool:
+    start, end = interval
+    return any(start < busy_end and busy_start < end for busy_start, busy_end in busy)
+
+
+class BookingCoordinator:
+    """
+    Объединение одновременных запросов бронирования одного столика.
+
+    Запросы к одному столику ставятся в его очередь и обрабатываются
+    пачками по одной: занятые интервалы столика читаются одним запросом,
+    пересечения внутри пачки и с существующими бронированиями проверяются
+    в памяти, проигравшие запросы сразу получают 409, а победители
+    сохраняются одной транзакцией. Так на «популярный» столик приходится
+    одна транзакция на пачку вместо транзакции (и блокировки) на каждый
+    запрос.
+
+    Окончательную проверку по-прежнему выполняет БД: если пачка
+    столкнулась с бронированием, созданным другим процессом, её
+    бронирования создаются по одному.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncContextManager[Any]] = async_session,
+        batch_size: int = settings.booking.batch_size,
+        batch_window: float = settings.booking.batch_window,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self._queues: Dict[int, "asyncio.Queue[BookingRequest]"] = {}
+        self._workers: Dict[int, "asyncio.Task[None]"] = {}
+
+    async def submit(self, reservation: ReservationCreate) -> Dict[str, Any]:
+        """
+        Создание бронирования через очередь столика.
+
+        :param reservation: данные бронирования
+        :return: созданное бронирование словарём с полями ReservationRead
+        """
+
+        future: "asyncio.Future[Dict[str, Any]]" = (
+            asyncio.get_running_loop().create_future()
+        )
+        table_id = reservation.table_id
+        queue = self._queues.get(table_id)
+        if queue is None:
+            queue = self._queues[table_id] = asyncio.Queue()
+            self._workers[table_id] = asyncio.create_task(self._work(table_id, queue))
+        queue.put_nowait((reservation, future))
+        return await future
+
+    async def drain(self) -> None:
+        """
+        Ожидание обработки всех поставленных в очереди запросов.
+
+        :return:
+        """
+
+        while self._workers:
+            await asyncio.gather(*self._workers.values(), return_exceptions=True)
+
+    async def _work(
+        self, table_id: int, queue: "asyncio.Queue[BookingRequest]"
+    ) -> None:
+        try:
+            while not queue.empty():
+                if self.batch_window:
+                    await asyncio.sleep(self.batch_window)
+                batch = [queue.get_nowait()]
+                while len(batch) < self.batch_size and not queue.empty():
+                    batch.append(queue.get_nowait())
+                await self._process(table_id, batch)
+        finally:
+            # между проверкой пустой очереди и удалением нет переключений,
+            # поэтому новый запрос либо попадёт в эту очередь, либо создаст новую
+            del self._queues[table_id]
+            del self._workers[table_id]
+
+    async def _process(self, table_id: int, batch: List[BookingRequest]) -> None:
+        # запросы, обработчики которых уже отменены, не выполняются
+        batch = [
+            (reservation, future) for reservation, future in batch if not future.done()
+        ]
+        if not batch:
+            return
+
+        try:
+            winners = await self._commit_batch(table_id, batch)
+        except ConflictException:
+            # пачка столкнулась с бронированием другого процесса
+            for reservation, future in batch:
+                if not future.done():
+                    await self._create_one(reservation, future)
+        except Exception as exc:  # pylint: disable=broad-except
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            for (_, future), created in winners:
+                if not future.done():
+                    future.set_result(created)
+
+    async def _commit_batch(
+        self, table_id: int, batch: List[BookingRequest]
+    ) -> List[Tuple[BookingRequest, Dict[str, Any]]]:
+        periods = [period(reservation) for reservation, _ in batch]
+        async with self.session_factory() as session:
+            repository = ReservationRepository(session)
+            intervals = await repository.get_busy_intervals(
+                min(start for start, _ in periods),
+                max(end for _, end in periods),
+                table_id=table_id,
+            )
+            busy = [interval for _, interval in intervals]
+
+            winners = []
+            for request, interval in zip(batch, periods):
+                if overlaps(interval, busy):
+                    if not request[1].done():
+                        request[1].set_exception(
+                            ConflictException(
+                                detail="Столик уже забронирован в указанный временной промежуток"
+                            )
+                        )
+                else:
+                    busy.append(interval)
+                    winners.append(request)
+
+            if not winners:
+                return []
+            created = await repository.create_many(
+                [Reservation(**reservation.dict()) for reservation, _ in winners]
+            )
+        return list(zip(winners, created))
+
+    async def _create_one(
+        self,
+        reservation: ReservationCreate,
+        future: "asyncio.Future[Dict[str, Any]]",
+    ) -> None:
+        try:
+            async with self.session_factory() as session:
+                created = await ReservationRepository(session).create_many(
+                    [Reservation(**reservation.dict())]
+                )
+        except Exception as exc:  # pylint: disable=broad-except
+            if not future.done():
+                future.set_exception(exc)
+        else:
+            if not future.done():
+                future.set_result(created[0])
+
+
+booking_coordinator = BookingCoordinator()
+
+
+def setup_booking(app: FastAPI) -> None:
+    """
+    Ожидание записи начатых бронирований при остановке приложения.
+
+    :param app:
+    :return:
+    """
+
+    @app.on_event("shutdown")
+    async def drain_bookings() -> None:
+        await booking_coordinator.drain()
@@ -0,0 +1,81 @@
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Sequence,
+    Type,
+    Union,
+)
+
+from pydantic import BaseModel, ValidationError
+
+from exceptions import ApiHTTPException, ValidationErrorException
+
+#: создание пачки записей: для каждой записи идентификатор или причина отказа
+CreateBatch = Callable[
+    [List[Dict[str, Any]]], Awaitable[Sequence[Union[int, ApiHTTPException]]]
+]
+
+
+async def bulk_import(
+    items: AsyncIterator[Any],
+    schema: Type[BaseModel],
+    create_batch: CreateBatch,
+    batch_size: int,
+) -> Dict[str, Any]:
+    """
+    Массовая загрузка записей пачками.
+
+    Каждая запись проверяется схемой, корректные записи накапливаются
+    и передаются в create_batch по batch_size штук.
+
+    :param items: записи во входном формате
+    :param schema: схема проверки записи
+    :param create_batch: создание пачки записей
+    :param batch_size: размер пачки
+    :return: результат по каждой записи в формате схемы BulkResult
+    """
+
+    # результаты собираются словарями, а не моделями: на десятках тысяч
+    # записей создание и повторная валидация моделей заметно дороже вставки
+    results: List[Dict[str, Any]] = []
+    batch: List[Dict[str, Any]] = []
+    batch_indexes: List[int] = []
+
+    async def flush() -> None:
+        outcomes = await create_batch(batch)
+        for index, outcome in zip(batch_indexes, outcomes):
+            if isinstance(outcome, ApiHTTPException):
+                results.append(
+                    {"index": index, "status": outcome.code, "detail": outcome.detail}
+                )
+            else:
+                results.append({"index": index, "status": "created", "id": outcome})
+        batch.clear()
+        batch_indexes.clear()
+
+    index = 0
+    async for item in items:
+        try:
+            batch.append(schema.parse_obj(item).dict())
+            batch_indexes.append(index)
+        except ValidationError as exc:
+            results.append(
+                {
+                    "index": index,
+                    "status": ValidationErrorException.code,
+                    "detail": exc.errors(),
+                }
+            )
+        if len(batch) >= batch_size:
+            await flush()
+        index += 1
+    if batch:
+        await flush()
+
+    results.sort(key=lambda result: result["index"])
+    created = sum(1 for result in results if result["status"] == "created")
+    return {"created": created, "failed": len(results) - created, "items": results}
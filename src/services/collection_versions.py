@@ -0,0 +1,129 @@
+import logging
+import time
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select, Update
+
+from models.models import CollectionVersion
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+#: коллекция столиков
+TABLES = "table"
+#: коллекция бронирований
+RESERVATIONS = "reservation"
+
+
+class Version(NamedTuple):
+    #: номер версии
+    number: int
+    #: время последнего изменения коллекции
+    updated_at: Optional[datetime]
+
+
+class CollectionVersions:
+    """
+    Версии коллекций для условных HTTP-запросов.
+
+    Версия хранится в БД (таблица collection_version) и увеличивается
+    отдельной короткой транзакцией сразу после фиксации каждого изменения
+    коллекции, поэтому клиент, получивший версию, получает данные не старше
+    неё. Строка версии общая для всей коллекции: её изменение в транзакции
+    изменения коллекции выстраивало бы в очередь все записи (при уровне
+    изоляции SERIALIZABLE — с конфликтами сериализации и ответами 503).
+    Если процесс завершится между фиксацией изменения и увеличением версии,
+    версия изменится только со следующим изменением коллекции.
+    Прочитанная версия хранится в памяти процесса ``ttl`` секунд, так что
+    ответ 304 обычно не требует запросов к БД; изменение коллекции в этом
+    процессе сбрасывает сохранённую версию.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = settings.http_cache.enabled,
+        ttl: float = settings.http_cache.version_ttl,
+    ):
+        self.enabled = enabled
+        self.ttl = ttl
+        self._versions: Dict[str, Tuple[float, Version]] = {}
+
+    async def get(self, session: AsyncSession, name: str) -> Optional[Version]:
+        """
+        Текущая версия коллекции.
+
+        Версию следует читать до чтения данных и той же сессией.
+
+        :param session: сессия БД (та же, что для чтения данных)
+        :param name: коллекция
+        :return: версия (None, если версии отключены)
+        """
+
+        if not self.enabled:
+            return None
+
+        now = time.monotonic()
+        cached = self._versions.get(name)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        query: Select = select(
+            CollectionVersion.version, CollectionVersion.updated_at
+        ).where(CollectionVersion.name == name)
+        result = await session.execute(query)
+        row = result.one_or_none()
+        version = Version(*row) if row else Version(0, None)
+        if self.ttl:
+            self._versions[name] = (now + self.ttl, version)
+        return version
+
+    async def bump(self, session: AsyncSession, *names: str) -> None:
+        """
+        Увеличение версий коллекций после фиксации их изменения.
+
+        Версии увеличиваются отдельной транзакцией сессии на уровне изоляции
+        по умолчанию, строки версий блокируются только на время этой
+        транзакции. Ошибка увеличения записывается в журнал и не отменяет
+        зафиксированное изменение. Версии, сохранённые в памяти процесса,
+        сбрасываются (:meth:`forget`).
+
+        :param session: сессия БД, зафиксировавшая изменение коллекций
+        :param names: изменённые коллекции
+        :return:
+        """
+
+        if self.enabled:
+            statement: Update = update(CollectionVersion).where(
+                CollectionVersion.name.in_(names)
+            )
+            try:
+                await session.execute(
+                    statement.values(version=CollectionVersion.version + 1)
+                )
+                await session.commit()
+            except DBAPIError:
+                await session.rollback()
+                logger.exception("Не удалось увеличить версии коллекций %s", names)
+
+        self.forget(*names)
+
+    def forget(self, *names: str) -> None:
+        """
+        Сброс версий коллекций, сохранённых в памяти процесса.
+
+        :param names: изменённые коллекции
+        :return:
+        """
+
+        for name in names:
+            self._versions.pop(name, None)
+
+    def clear(self) -> None:
+        self._versions.clear()
+
+
+collection_versions = CollectionVersions()
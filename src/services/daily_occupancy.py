@@ -0,0 +1,153 @@
+"""
+Сводка занятости залов по дням (таблица daily_occupancy).
+
+Сводку пополняют триггеры БД при каждом изменении бронирований. Команда
+пересчитывает сводку по бронированиям и архиву (rebuild — после миграции
+и для исправления расхождений) или сворачивает её записи (compact).
+
+Пример::
+
+    python -m services.daily_occupancy rebuild
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import FastAPI
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from exceptions import ValidationErrorException
+from integrations.db.session import async_session, database
+from repositories.daily_occupancy_repository import DailyOccupancyRepository
+from repositories.reservation_repository import RETRYABLE_ERRORS
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+#: максимальная длина интервала отчёта
+MAX_WINDOW = timedelta(days=366)
+#: количество попыток пересчёта при конфликте со свёрткой
+REBUILD_ATTEMPTS = 3
+
+
+class DailyOccupancyService:
+    """
+    Отчёт о занятости залов по дням.
+    """
+
+    def __init__(self, repository: DailyOccupancyRepository):
+        self.repository = repository
+
+    async def get(
+        self, day_from: date, day_to: date, location: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Занятость залов по дням [day_from, day_to).
+
+        :param day_from: первый день
+        :param day_to: день после последнего
+        :param location: расположение (None — все залы)
+        :return:
+        """
+
+        if day_from >= day_to:
+            raise ValidationErrorException(
+                detail="Начало интервала должно быть раньше его окончания"
+            )
+        if day_to - day_from > MAX_WINDOW:
+            raise ValidationErrorException(
+                detail=f"Интервал отчёта не может превышать {MAX_WINDOW.days} дней"
+            )
+        return await self.repository.get_daily(day_from, day_to, location)
+
+
+async def compact(session_factory: Callable[[], AsyncSession] = async_session) -> int:
+    async with session_factory() as session:
+        return await DailyOccupancyRepository(session).compact()
+
+
+async def rebuild(session_factory: Callable[[], AsyncSession] = async_session) -> int:
+    """
+    Пересчёт сводки одной транзакцией REPEATABLE READ: бронирования,
+    зафиксированные после её снимка, остаются в сводке записями триггеров,
+    поэтому пересчёт не останавливает бронирование. Конфликт
+    с параллельной свёрткой повторяется.
+
+    :param session_factory: фабрика сессий БД
+    :return: количество пар (день, зал)
+    """
+
+    for attempt in range(1, REBUILD_ATTEMPTS + 1):
+        async with session_factory() as session:
+            await session.connection(
+                execution_options={"isolation_level": "REPEATABLE READ"}
+            )
+            try:
+                return await DailyOccupancyRepository(session).rebuild()
+            except DBAPIError as exc:
+                retryable = getattr(exc.orig, "sqlstate", None) in RETRYABLE_ERRORS
+                if not retryable or attempt == REBUILD_ATTEMPTS:
+                    raise
+    return 0
+
+
+def setup_daily_occupancy(app: FastAPI) -> None:
+    """
+    Периодическая свёртка сводки занятости по дням.
+
+    :param app:
+    :return:
+    """
+
+    config = settings.daily_occupancy
+    if not config.compact:
+        return
+
+    async def run() -> None:
+        while True:
+            await asyncio.sleep(config.compact_interval)
+            try:
+                await compact()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Ошибка свёртки сводки занятости")
+
+    tasks = []
+
+    @app.on_event("startup")
+    async def start_compaction() -> None:
+        tasks.append(asyncio.create_task(run()))
+
+    @app.on_event("shutdown")
+    async def stop_compaction() -> None:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def main_async(command: str) -> None:
+    changed = await (rebuild() if command == "rebuild" else compact())
+    await database.dispose()
+    logger.info("Сводка занятости (%s): пар (день, зал) — %s", command, changed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "command",
+        choices=["rebuild", "compact"],
+        help="пересчёт сводки или свёртка её записей",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main_async(args.command))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from settings import settings
+
+#: интервал времени (начало, конец)
+Interval = Tuple[datetime, datetime]
+#: занятые интервалы по идентификаторам столиков
+BusyIntervals = Dict[int, List[Interval]]
+
+
+def days_between(start: datetime, end: datetime) -> Iterator[date]:
+    """
+    Перечисление дней (UTC), которые пересекает интервал [start, end).
+
+    :param start: начало интервала
+    :param end: конец интервала
+    :return:
+    """
+
+    day = start.astimezone(timezone.utc).date()
+    last = (end.astimezone(timezone.utc) - timedelta(microseconds=1)).date()
+    while day <= last:
+        yield day
+        day += timedelta(days=1)
+
+
+def day_start(day: date) -> datetime:
+    """
+    Начало дня в UTC.
+
+    :param day: день
+    :return:
+    """
+
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+class FreeSlotCache:
+    """
+    Кэш занятых интервалов столиков по дням (UTC).
+
+    Свободные интервалы вычисляются из занятых, поэтому кэшируются только
+    занятые. День сбрасывается при создании или удалении бронирования,
+    которое его затрагивает, а также по истечении времени жизни (для
+    согласованности между несколькими процессами).
+    """
+
+    def __init__(self, ttl: float):
+        #: время жизни записи в секундах (0 — кэш отключён)
+        self.ttl = ttl
+        self._days: Dict[date, Tuple[float, BusyIntervals]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, day: date) -> Optional[BusyIntervals]:
+        entry = self._days.get(day)
+        if entry is None:
+            return None
+
+        expires_at, busy = entry
+        if expires_at < time.monotonic():
+            self._days.pop(day, None)
+            return None
+
+        return busy
+
+    def set(self, day: date, busy: BusyIntervals) -> None:
+        if self.enabled:
+            self._days[day] = (time.monotonic() + self.ttl, busy)
+
+    def invalidate(self, start: datetime, end: datetime) -> None:
+        """
+        Сброс дней, которые пересекает интервал [start, end).
+
+        :param start: начало интервала
+        :param end: конец интервала
+        :return:
+        """
+
+        for day in days_between(start, end):
+            self._days.pop(day, None)
+
+    def clear(self) -> None:
+        self._days.clear()
+
+
+# кэш занятых интервалов, общий для процесса
+availability_cache = FreeSlotCache(ttl=settings.availability_cache_ttl)
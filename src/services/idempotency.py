@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+from exceptions import ValidationErrorException
+from integrations.cache.backends import MISSING, MemoryBackend
+from integrations.db.session import async_session
+from models.models import IdempotencyKey
+from repositories.idempotency_repository import IdempotencyRepository
+from settings import settings
+
+logger = logging.getLogger(__name__)
+
+#: заголовок ответа, отмечающий повтор сохранённого ответа
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+@dataclass
+class StoredResponse:
+    """
+    Ответ, сохранённый для ключа идемпотентности.
+    """
+
+    request_hash: str
+    status_code: int
+    body: Any
+    expires_at: datetime
+
+
+def request_fingerprint(path: str, payload: Any) -> str:
+    """
+    Хеш запроса для проверки, что ключ повторно используется с тем же запросом.
+
+    :param path: путь запроса
+    :param payload: данные запроса
+    :return:
+    """
+
+    raw = json.dumps(
+        [path, jsonable_encoder(payload)], sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+# последние ответы в памяти процесса: повтор не обращается к БД
+idempotency_cache = MemoryBackend(
+    ttl=settings.idempotency.ttl, max_size=settings.idempotency.cache_size
+)
+
+
+class IdempotencyService:
+    """
+    Выполнение запросов с заголовком Idempotency-Key.
+
+    Успешный ответ сохраняется вместе с результатом запроса в одной
+    транзакции. Повтор запроса с тем же ключом возвращает сохранённый ответ
+    одним обращением к кэшу или к таблице ключей. Ответы с ошибкой
+    не сохраняются, такой запрос можно повторить.
+    """
+
+    def __init__(
+        self,
+        repository: IdempotencyRepository,
+        cache: MemoryBackend = idempotency_cache,
+    ):
+        self.repository = repository
+        self.cache = cache
+
+    async def lookup(self, key: str, request_hash: str) -> Optional[StoredResponse]:
+        """
+        Поиск сохранённого ответа.
+
+        :param key: ключ идемпотентности
+        :param request_hash: хеш запроса
+        :return: сохранённый ответ или None, если запрос ещё не выполнялся
+        """
+
+        stored = await self.cache.get(key)
+        if stored is MISSING:
+            record = await self.repository.get(key)
+            if record is None:
+                return None
+            stored = StoredResponse(
+                record.request_hash,
+                record.status_code,
+                record.response,
+                record.expires_at,
+            )
+            await self.cache.set(key, stored)
+
+        if stored.expires_at <= datetime.now(timezone.utc):
+            return None
+        if stored.request_hash != request_hash:
+            raise ValidationErrorException(
+                detail="Ключ идемпотентности уже использован с другим запросом"
+            )
+        return stored
+
+    async def remember(
+        self, key: str, request_hash: str, status_code: int, response: BaseModel
+    ) -> None:
+        """
+        Сохранение ответа в текущей транзакции (без её фиксации).
+
+        :param key: ключ идемпотентности
+        :param request_hash: хеш запроса
+        :param status_code: код статуса ответа
+        :param response: ответ
+        :return:
+        """
+
+        await self.repository.add(
+            IdempotencyKey(
+                key=key,
+                request_hash=request_hash,
+                status_code=status_code,
+                response=jsonable_encoder(response),
+                expires_at=datetime.now(timezone.utc)
+                + timedelta(seconds=settings.idempotency.ttl),
+            )
+        )
+
+    @staticmethod
+    def replay(stored: StoredResponse) -> JSONResponse:
+        return JSONResponse(
+            content=stored.body,
+            status_code=stored.status_code,
+            headers={REPLAYED_HEADER: "true"},
+        )
+
+
+def setup_idempotency_cleanup(app: FastAPI) -> None:
+    """
+    Периодическое удаление устаревших ключей идемпотентности.
+
+    :param app:
+    :return:
+    """
+
+    interval = settings.idempotency.cleanup_interval
+    if not interval:
+        return
+
+    async def cleanup() -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with async_session() as session:
+                    deleted = await IdempotencyRepository(session).delete_expired(
+                        settings.idempotency.cleanup_batch_size
+                    )
+                logger.info("Удалено устаревших ключей идемпотентности: %s", deleted)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Ошибка удаления ключей идемпотентности")
+
+    tasks = []
+
+    @app.on_event("startup")
+    async def start_cleanup() -> None:
+        tasks.append(asyncio.create_task(cleanup()))
+
+    @app.on_event("shutdown")
+    async def stop_cleanup() -> None:
+        for task in tasks:
+            task.cancel()
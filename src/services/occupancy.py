@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from exceptions import ValidationErrorException
+from repositories.reservation_repository import ReservationRepository
+
+#: максимальная длина интервала статистики занятости
+MAX_WINDOW = timedelta(days=92)
+
+
+class OccupancyGroup(str, Enum):
+    """
+    Группировка статистики занятости.
+    """
+
+    #: по столикам
+    TABLE = "table"
+    #: по часам
+    HOUR = "hour"
+
+
+class OccupancyService:
+    """
+    Статистика занятости столиков за интервал времени.
+    """
+
+    def __init__(self, reservation_repository: ReservationRepository):
+        self.reservation_repository = reservation_repository
+
+    async def get(
+        self,
+        time_from: datetime,
+        time_to: datetime,
+        group_by: OccupancyGroup = OccupancyGroup.TABLE,
+        table_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Количество бронирований и занятые минуты в интервале [time_from, time_to)
+        по столикам или по часам.
+
+        :param time_from: начало интервала
+        :param time_to: конец интервала
+        :param group_by: группировка
+        :param table_id: идентификатор столика (None — все столики)
+        :return:
+        """
+
+        # время без временной зоны считается временем UTC
+        time_from, time_to = (
+            value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+            for value in (time_from, time_to)
+        )
+        if time_from >= time_to:
+            raise ValidationErrorException(
+                detail="Начало интервала должно быть раньше его окончания"
+            )
+        if time_to - time_from > MAX_WINDOW:
+            raise ValidationErrorException(
+                detail=f"Интервал статистики не может превышать {MAX_WINDOW.days} дней"
+            )
+
+        if group_by == OccupancyGroup.HOUR:
+            return await self.reservation_repository.get_occupancy_by_hour(
+                time_from, time_to, table_id
+            )
+        return await self.reservation_repository.get_occupancy_by_table(
+            time_from, time_to, table_id
+        )
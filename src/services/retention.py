@@ -0,0 +1,324 @@
+"""
+Архивация прошедших бронирований.
+
+Бронирования, закончившиеся раньше --horizon-days дней назад, переносятся
+пачками в таблицу reservation_archive или в сжатый файл NDJSON
+(--target file, бронирования удаляются из БД, но остаются в сводке
+занятости по дням).
+
+Пример::
+
+    python -m services.retention --horizon-days 365 --batch-size 1000
+"""
+
+import argparse
+import asyncio
+import gzip
+import logging
+import os
+from datetime import datetime, timezone
+from io import BufferedIOBase
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import orjson
+from fastapi import FastAPI
+from sqlalchemy import delete, func, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import Insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Delete, Select
+
+from integrations.db.session import async_session, database
+from models.models import Reservation, ReservationArchive, ReservationArchiveBoundary
+from repositories.daily_occupancy_repository import keep_in_summary
+from repositories.reservation_repository import archive_cutoff
+from services.collection_versions import RESERVATIONS, collection_versions
+from settings import RetentionSettings, RetentionTarget, settings
+
+logger = logging.getLogger(__name__)
+
+#: столбцы, переносимые в архив (period вычисляется)
+ARCHIVE_FIELDS = (
+    "id",
+    "customer_name",
+    "table_id",
+    "reservation_time",
+    "duration_minutes",
+    "created_at",
+    "updated_at",
+)
+
+
+def extend_boundary(archived_until: datetime) -> Insert:
+    """
+    Сдвиг границы архива (см. :class:`ReservationArchiveBoundary`)
+    не раньше archived_until.
+
+    :param archived_until: время, не позже которого закончились
+        перенесённые бронирования
+    :return: запрос INSERT ... ON CONFLICT DO UPDATE
+    """
+
+    boundary = ReservationArchiveBoundary
+    statement: Insert = pg_insert(boundary).values(id=1, archived_until=archived_until)
+    return statement.on_conflict_do_update(
+        index_elements=[boundary.id],
+        set_={
+            "archived_until": func.greatest(
+                boundary.archived_until, statement.excluded.archived_until
+            )
+        },
+    )
+
+
+def move_to_archive(deletion: Delete) -> Insert:
+    """
+    Перенос в таблицу reservation_archive бронирований, удаляемых запросом
+    deletion (DELETE ... RETURNING и INSERT в одном запросе). Записи сводки
+    занятости по дням при переносе взаимно погашаются.
+
+    :param deletion: удаление бронирований из таблицы reservation
+    :return: запрос INSERT ... SELECT
+    """
+
+    moved = deletion.returning(
+        *(getattr(Reservation, field) for field in ARCHIVE_FIELDS)
+    ).cte("moved")
+    columns = [getattr(ReservationArchive, field) for field in ARCHIVE_FIELDS]
+    statement: Insert = pg_insert(ReservationArchive).from_select(
+        columns, select(*(moved.c[field] for field in ARCHIVE_FIELDS))
+    )
+    return statement
+
+
+class ReservationArchiver:
+    """
+    Перенос прошедших бронирований в архив.
+
+    Каждая пачка выбирается по ключу (reservation_time, id) после последней
+    перенесённой записи и переносится одной короткой транзакцией
+    (DELETE ... RETURNING и INSERT в одном запросе), между пачками
+    выдерживается пауза. Строки выбираются FOR UPDATE SKIP LOCKED:
+    архивация не ждёт транзакций приложения, а несколько процессов
+    переносят разные строки. Перенос в таблицу той же транзакцией сдвигает
+    границу архива, по которой запросы решают, читать ли архив, поэтому
+    архивация с горизонтом короче настроек не скрывает бронирования.
+    """
+
+    def __init__(
+        self,
+        config: RetentionSettings = settings.retention,
+        session_factory: Callable[[], AsyncSession] = async_session,
+    ):
+        self.config = config
+        self.session_factory = session_factory
+
+    async def archive_batch(
+        self,
+        session: AsyncSession,
+        cutoff: datetime,
+        after: Optional[Tuple[datetime, int]] = None,
+        output: Optional[BufferedIOBase] = None,
+    ) -> List[Tuple[datetime, int]]:
+        """
+        Перенос одной пачки бронирований, закончившихся до cutoff.
+
+        :param session: сессия БД
+        :param cutoff: граница архивации
+        :param after: ключ последнего перенесённого бронирования
+        :param output: файл архива (None — таблица reservation_archive)
+        :return: ключи (время, идентификатор) перенесённых бронирований
+        """
+
+        query: Select = select(Reservation.reservation_time, Reservation.id).where(
+            Reservation.reservation_time < cutoff,
+            func.upper(Reservation.period) <= cutoff,
+        )
+        if after is not None:
+            query = query.where(
+                tuple_(Reservation.reservation_time, Reservation.id)
+                > tuple_(*map(literal, after))
+            )
+        query = query.order_by(Reservation.reservation_time, Reservation.id)
+        query = query.limit(self.config.batch_size)
+        query = query.with_for_update(skip_locked=True)
+        batch = query.cte("batch")
+        deletion: Delete = delete(Reservation).where(
+            Reservation.reservation_time == batch.c.reservation_time,
+            Reservation.id == batch.c.id,
+        )
+
+        if output is None:
+            result = await session.execute(
+                move_to_archive(deletion).returning(
+                    ReservationArchive.reservation_time, ReservationArchive.id
+                )
+            )
+            keys = [(time, archive_id) for time, archive_id in result.all()]
+            if keys:
+                await session.execute(extend_boundary(cutoff))
+        else:
+            removed = deletion.returning(
+                *(getattr(Reservation, field) for field in ARCHIVE_FIELDS)
+            ).cte("removed")
+            # бронирования удаляются из БД, но остаются в сводке занятости
+            kept = keep_in_summary(removed).cte("kept")
+            exported: Select = select(*(removed.c[field] for field in ARCHIVE_FIELDS))
+            result = await session.execute(exported.add_cte(kept))
+            rows = [dict(row) for row in result.mappings()]
+            # файл дописывается до фиксации: при сбое фиксации пачка останется
+            # в БД и попадёт в архив повторно (получатель исключает повторы по id)
+            await asyncio.to_thread(write_rows, output, rows)
+            keys = [(row["reservation_time"], row["id"]) for row in rows]
+
+        await session.commit()
+        if keys:
+            await collection_versions.bump(session, RESERVATIONS)
+        return sorted(keys)
+
+    async def run(self, output: Optional[BufferedIOBase] = None) -> int:
+        """
+        Архивация всех бронирований, закончившихся до границы архивации.
+
+        :param output: файл архива (None — таблица reservation_archive)
+        :return: количество перенесённых бронирований
+        """
+
+        cutoff = archive_cutoff(self.config.horizon_days)
+        total = 0
+        after = None
+        while True:
+            async with self.session_factory() as session:
+                keys = await self.archive_batch(session, cutoff, after, output)
+                # неполная пачка не означает конец: строки, заблокированные
+                # транзакциями приложения, пропускаются (SKIP LOCKED)
+                if not keys:
+                    return total
+                total += len(keys)
+                after = keys[-1]
+            await asyncio.sleep(self.config.batch_pause)
+
+
+def write_rows(output: BufferedIOBase, rows: List[Dict[str, Any]]) -> None:
+    output.write(b"".join(orjson.dumps(row) + b"\n" for row in rows))
+    output.flush()
+
+
+def archive_path(directory: str) -> str:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    return os.path.join(directory, f"reservation-{stamp}.ndjson.gz")
+
+
+async def archive(config: RetentionSettings) -> int:
+    """
+    Архивация в место хранения из настроек.
+
+    :param config: настройки архивации
+    :return: количество перенесённых бронирований
+    """
+
+    archiver = ReservationArchiver(config)
+    if config.target == RetentionTarget.table:
+        return await archiver.run()
+
+    os.makedirs(config.directory, exist_ok=True)
+    path = archive_path(config.directory)
+    with gzip.open(path, "wb") as output:
+        archived = await archiver.run(output)
+    if not archived:
+        os.remove(path)
+    return archived
+
+
+def setup_retention(app: FastAPI) -> None:
+    """
+    Периодическая архивация прошедших бронирований.
+
+    :param app:
+    :return:
+    """
+
+    config = settings.retention
+    if not config.enabled:
+        return
+
+    async def run() -> None:
+        while True:
+            await asyncio.sleep(config.interval)
+            try:
+                archived = await archive(config)
+                logger.info("Архивировано бронирований: %s", archived)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Ошибка архивации бронирований")
+
+    tasks = []
+
+    @app.on_event("startup")
+    async def start_retention() -> None:
+        tasks.append(asyncio.create_task(run()))
+
+    @app.on_event("shutdown")
+    async def stop_retention() -> None:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def main_async(config: RetentionSettings) -> None:
+    archived = await archive(config)
+    await database.dispose()
+    logger.info("Архивировано бронирований: %s", archived)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    config = settings.retention
+    parser.add_argument(
+        "--horizon-days",
+        type=int,
+        default=config.horizon_days,
+        help="архивировать бронирования, закончившиеся раньше этого количества дней",
+    )
+    parser.add_argument(
+        "--target",
+        choices=[target.value for target in RetentionTarget],
+        default=config.target.value,
+        help="место хранения архива",
+    )
+    parser.add_argument(
+        "--directory", default=config.directory, help="каталог файлов архива"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=config.batch_size,
+        help="количество бронирований в одной транзакции",
+    )
+    parser.add_argument(
+        "--batch-pause",
+        type=float,
+        default=config.batch_pause,
+        help="пауза между пачками в секундах",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(
+        main_async(
+            config.copy(
+                update={
+                    "horizon_days": args.horizon_days,
+                    "target": RetentionTarget(args.target),
+                    "directory": args.directory,
+                    "batch_size": args.batch_size,
+                    "batch_pause": args.batch_pause,
+                }
+            )
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+from integrations.cache.cache import create_cache
+from settings import settings
+
+# кэш каталога столиков, общий для процесса
+table_cache = create_cache("tables", settings.table_cache)
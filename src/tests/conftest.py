@@ -3,8 +3,12 @@ from httpx import AsyncClient
 from pytest_mock import MockerFixture
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 
-from integrations.db.session import get_session
+from integrations.db.session import get_read_session, get_session
 from main import app
+from services.collection_versions import collection_versions
+from services.free_slot_cache import availability_cache
+from services.idempotency import idempotency_cache
+from services.table_cache import table_cache
 from settings import settings
 
 
@@ -25,6 +29,13 @@ async def session():
     await async_session.begin_nested()
 
     app.dependency_overrides[get_session] = lambda: async_session
+    app.dependency_overrides[get_read_session] = lambda: async_session
+
+    # данные тестов добавляются в обход репозиториев и не сбрасывают кэши
+    availability_cache.clear()
+    collection_versions.clear()
+    await table_cache.clear()
+    await idempotency_cache.clear()
 
     yield async_session
 
@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta
+
+from services.availability import free_intervals
+
+START = datetime(2030, 1, 1, 12)
+
+
+def hours(value: float) -> datetime:
+    return START + timedelta(hours=value)
+
+
+def test_free_intervals_merges_overlapping_busy():
+    busy = [(hours(3), hours(5)), (hours(1), hours(2)), (hours(1.5), hours(2.5))]
+
+    assert free_intervals(busy, hours(0), hours(6)) == [
+        (hours(0), hours(1)),
+        (hours(2.5), hours(3)),
+        (hours(5), hours(6)),
+    ]
+
+
+def test_free_intervals_clips_to_window():
+    busy = [(hours(-1), hours(1)), (hours(5), hours(8))]
+
+    assert free_intervals(busy, hours(0), hours(6)) == [(hours(1), hours(5))]
+
+
+def test_free_intervals_fully_busy():
+    assert free_intervals([(hours(-1), hours(7))], hours(0), hours(6)) == []
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from benchmarks import ratelimit
+from benchmarks.results import percentile, summarize, write_results
+from benchmarks.schemas import cases, measure
+
+
+def test_percentile():
+    values = [float(number) for number in range(1, 101)]
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([], 50) == 0
+
+
+def test_summarize_and_write_results(tmp_path):
+    result = summarize("scenario", [0.002, 0.001, 0.003], 0.5, {200: 2, 409: 1})
+
+    assert result["operations"] == 3
+    assert result["throughput_per_s"] == 6
+    assert result["p50_ms"] == 2
+    assert result["statuses"] == {"200": 2, "409": 1}
+
+    path = tmp_path / "results.json"
+    write_results(str(path), "api", {"clients": 1}, [result])
+    report = json.loads(path.read_text(encoding="utf-8"))
+    assert report["suite"] == "api"
+    assert report["results"] == [result]
+
+
+def test_schema_benchmarks_run():
+    for name, case in cases(batch=2).items():
+        result = measure(name, case, number=2, repeat=2)
+        assert result["operations"] == 4
+
+
+@pytest.mark.asyncio
+async def test_ratelimit_benchmark_runs():
+    results = await ratelimit.run(number=10, repeat=2, clients=3, ids=2)
+
+    assert [result["name"] for result in results] == [
+        "baseline",
+        "rate_limit",
+        "load_shedding",
+        "rate_limit+load_shedding",
+    ]
+    assert all(result["operations"] == 20 for result in results)
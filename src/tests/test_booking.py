@@ -0,0 +1,117 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from exceptions import ConflictException, ObjectNotFoundException
+from models.models import Reservation, Table
+from schemas.schemas import ReservationCreate
+from services.booking import BookingCoordinator, booking_coordinator
+from settings import settings
+
+START = datetime(2030, 1, 1, 12, tzinfo=timezone.utc)
+
+
+def shared_session(session):
+    @asynccontextmanager
+    async def session_factory():
+        yield session
+
+    return session_factory
+
+
+@pytest.fixture
+def coordinator(session):
+    return BookingCoordinator(shared_session(session))
+
+
+async def create_table(session) -> int:
+    table = Table(name="Test Table", seats=4, location="Main Hall")
+    session.add(table)
+    await session.commit()
+    await session.refresh(table)
+    return table.id
+
+
+def booking(table_id: int, offset_minutes: int) -> ReservationCreate:
+    return ReservationCreate(
+        customer_name="Test User",
+        table_id=table_id,
+        reservation_time=START + timedelta(minutes=offset_minutes),
+        duration_minutes=60,
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_bookings_batched(session, coordinator):
+    table_id = await create_table(session)
+    session.add(
+        Reservation(
+            customer_name="Existing",
+            table_id=table_id,
+            reservation_time=START + timedelta(hours=3),
+            duration_minutes=60,
+        )
+    )
+    await session.commit()
+
+    # 0 и 60 не пересекаются, 30 пересекается с 0, 180 — с существующим
+    offsets = [0, 30, 60, 30, 180]
+    results = await asyncio.gather(
+        *(coordinator.submit(booking(table_id, offset)) for offset in offsets),
+        return_exceptions=True,
+    )
+
+    assert results[0]["reservation_time"] == START
+    assert results[2]["reservation_time"] == START + timedelta(minutes=60)
+    assert all(isinstance(results[i], ConflictException) for i in (1, 3, 4))
+    count = await session.scalar(
+        select(func.count(Reservation.id)).where(Reservation.table_id == table_id)
+    )
+    assert count == 3
+
+
+@pytest.mark.asyncio
+async def test_booking_unknown_table(coordinator):
+    with pytest.raises(ObjectNotFoundException):
+        await coordinator.submit(booking(0, 0))
+
+
+@pytest.mark.asyncio
+async def test_create_reservation_through_queue(client, session, monkeypatch):
+    monkeypatch.setattr(settings.booking, "queue", True)
+    monkeypatch.setattr(booking_coordinator, "session_factory", shared_session(session))
+    table_id = await create_table(session)
+
+    response = await client.post(
+        "/api/v1/reservations/",
+        json={
+            "customer_name": "Test User",
+            "table_id": table_id,
+            "reservation_time": "2030-01-01T12:00:00Z",
+            "duration_minutes": 60,
+        },
+    )
+    assert response.status_code == 200
+    assert response.json()["table_id"] == table_id
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_queued_bookings(session, coordinator):
+    table_id = await create_table(session)
+
+    submitted = [
+        asyncio.create_task(coordinator.submit(booking(table_id, offset)))
+        for offset in (0, 60)
+    ]
+    await asyncio.sleep(0)
+    await coordinator.drain()
+
+    assert all(task.done() for task in submitted)
+    assert not coordinator._workers  # pylint: disable=protected-access
+    count = await session.scalar(
+        select(func.count(Reservation.id)).where(Reservation.table_id == table_id)
+    )
+    assert count == 2
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from fakeredis import aioredis
+
+from integrations.cache.backends import MISSING, MemoryBackend, RedisBackend
+from integrations.cache.cache import Cache
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(ttl=60, max_size=2)
+    await backend.set("a", 1)
+    await backend.set("b", 2)
+    assert await backend.get("a") == 1
+
+    await backend.set("c", 3)
+
+    assert await backend.get("b") is MISSING
+    assert await backend.get("a") == 1
+    assert await backend.get("c") == 3
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_expires_items():
+    backend = MemoryBackend(ttl=0.01, max_size=2)
+    await backend.set("a", None)
+    assert await backend.get("a") is None
+
+    await asyncio.sleep(0.02)
+
+    assert await backend.get("a") is MISSING
+
+
+@pytest.mark.asyncio
+async def test_cache_coalesces_concurrent_misses():
+    cache = Cache(MemoryBackend(ttl=60, max_size=10))
+    loads = 0
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.01)
+        return "value"
+
+    values = await asyncio.gather(*(cache.get_or_load("key", load) for _ in range(5)))
+
+    assert values == ["value"] * 5
+    assert loads == 1
+    assert await cache.get_or_load("key", load) == "value"
+    assert cache.stats() == {"hits": 1, "misses": 5, "size": 1}
+
+
+@pytest.mark.asyncio
+async def test_cache_does_not_store_value_loaded_before_clear():
+    cache = Cache(MemoryBackend(ttl=60, max_size=10))
+
+    async def load():
+        await cache.clear()
+        return "stale"
+
+    assert await cache.get_or_load("key", load) == "stale"
+    assert await cache.backend.get("key") is MISSING
+
+
+@pytest.mark.asyncio
+async def test_cache_propagates_loader_error():
+    cache = Cache(MemoryBackend(ttl=60, max_size=10))
+
+    async def load():
+        raise RuntimeError("db is down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load("key", load)
+    assert await cache.backend.get("key") is MISSING
+
+
+@pytest.mark.asyncio
+async def test_redis_backend():
+    backend = RedisBackend(aioredis.FakeRedis(), "tables", ttl=60)
+    assert await backend.get("page") is MISSING
+
+    await backend.set("page", [{"id": 1, "name": "Test Table"}])
+    assert await backend.get("page") == [{"id": 1, "name": "Test Table"}]
+
+    # каждая запись — отдельный ключ со временем жизни
+    client = backend.client
+    keys = [key async for key in client.scan_iter("tables:*")]
+    assert keys == [b"tables:0:page"]
+    assert 0 < await client.ttl(b"tables:0:page") <= 60
+
+    await backend.clear()
+    assert await backend.get("page") is MISSING
+    await backend.set("page", [])
+    assert await backend.get("page") == []
+    assert await client.exists(b"tables:1:page")
@@ -0,0 +1,198 @@
+import asyncio
+import random
+import uuid
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.api import SEED_STEP, cleanup, seed
+from benchmarks.concurrency import stress, unconstrained
+from exceptions import ConflictException
+from models.models import Reservation
+from repositories.reservation_repository import ReservationRepository, lock_keys
+from settings import ConcurrencySettings, ConcurrencyStrategy, settings
+
+#: засеянных бронирований на столик
+SEEDED = 300
+
+
+def test_lock_keys_per_day():
+    start = datetime(2030, 1, 1, 23, tzinfo=timezone.utc)
+    end = datetime(2030, 1, 2, 1, tzinfo=timezone.utc)
+
+    assert lock_keys(1, start, end, per_day=False) == ["reservation:1"]
+    assert lock_keys(1, start, end, per_day=True) == [
+        "reservation:1:2030-01-01",
+        "reservation:1:2030-01-02",
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "config",
+    [
+        ConcurrencySettings(strategy=ConcurrencyStrategy.CONSTRAINT),
+        ConcurrencySettings(strategy=ConcurrencyStrategy.ADVISORY_LOCK),
+        ConcurrencySettings(
+            strategy=ConcurrencyStrategy.ADVISORY_LOCK, lock_per_day=True
+        ),
+        ConcurrencySettings(strategy=ConcurrencyStrategy.SERIALIZABLE),
+    ],
+    ids=lambda config: config.strategy.value + ("_per_day" * config.lock_per_day),
+)
+async def test_no_double_bookings(config):
+    # без ограничения-исключения и триггера пересечения исключает только
+    # стратегия; constraint проверяется на исходной таблице
+    protected = config.strategy == ConcurrencyStrategy.CONSTRAINT
+    result = await run_stress(config, protected)
+
+    assert result["double_bookings"] == 0
+    assert set(result["statuses"]) <= {"200", "409", "503"}
+    assert 0 < result["statuses"]["200"] <= 2 * 8
+
+
+@pytest.mark.asyncio
+async def test_unprotected_table_allows_double_bookings():
+    # проверка самого стресс-теста: без стратегии и защиты БД
+    # пересекающиеся бронирования создаются
+    config = ConcurrencySettings(strategy=ConcurrencyStrategy.CONSTRAINT)
+    result = await run_stress(config, protected=False)
+
+    assert result["double_bookings"] > 0
+    assert result["statuses"] == {"200": 100}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "strategy", [ConcurrencyStrategy.ADVISORY_LOCK, ConcurrencyStrategy.SERIALIZABLE]
+)
+async def test_create_many_uses_strategy(strategy):
+    # пакетное создание (очередь бронирований) исключает пересечения
+    # стратегией, а не ограничением-исключением
+    config = ConcurrencySettings(strategy=strategy)
+    start = datetime(2030, 1, 1, 12, tzinfo=timezone.utc)
+    db_engine = create_async_engine(settings.database_url)
+    (table_id,) = await seed(db_engine, f"test-{uuid.uuid4().hex[:8]}-", 1, 0)
+
+    def reservation(offset_minutes: int) -> Reservation:
+        return Reservation(
+            customer_name="Test User",
+            table_id=table_id,
+            reservation_time=start + timedelta(minutes=offset_minutes),
+            duration_minutes=60,
+        )
+
+    try:
+        async with unconstrained(settings.database_url) as stress_engine:
+            make_session = sessionmaker(
+                stress_engine, class_=AsyncSession, expire_on_commit=False
+            )
+            async with make_session() as session:
+                repository = ReservationRepository(session, config)
+                await repository.create_many([reservation(0)])
+                # пересечение с созданным бронированием и внутри пакета
+                for batch in ([reservation(30)], [reservation(120), reservation(150)]):
+                    with pytest.raises(ConflictException):
+                        await repository.create_many(batch)
+
+                count = await session.scalar(
+                    select(func.count()).where(Reservation.table_id == table_id)
+                )
+                assert count == 1
+    finally:
+        await cleanup(db_engine, table_ids=[table_id])
+        await db_engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_serializable_disjoint_bookings():
+    # бронирования разных столиков не конкурируют друг с другом (в том числе
+    # за версию коллекции), поэтому повторы не исчерпываются и ответов 503 нет
+    config = ConcurrencySettings(strategy=ConcurrencyStrategy.SERIALIZABLE)
+    db_engine = create_async_engine(settings.database_url)
+    # засеянные бронирования разносят записи столиков по разным страницам
+    # индексов: иначе SSI находит ложные конфликты по общей странице
+    table_ids = await seed(db_engine, f"test-{uuid.uuid4().hex[:8]}-", 20, 20 * SEEDED)
+    # свободные часы между засеянными бронированиями (см. benchmarks.api.seed)
+    start = datetime.now(timezone.utc).replace(
+        minute=0, second=0, microsecond=0
+    ) + timedelta(days=1, hours=1)
+    make_session = sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def client(table_id: int) -> None:
+        for slot in range(10):
+            async with make_session() as session:
+                await ReservationRepository(session, config).create(
+                    Reservation(
+                        customer_name="Test User",
+                        table_id=table_id,
+                        reservation_time=start + slot * SEED_STEP,
+                        duration_minutes=60,
+                    )
+                )
+
+    try:
+        errors = await asyncio.gather(
+            *(client(table_id) for table_id in table_ids), return_exceptions=True
+        )
+        assert [error for error in errors if error is not None] == []
+    finally:
+        await cleanup(db_engine, table_ids=table_ids)
+        await db_engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_opposite_orders():
+    # две пачки по одним столикам в обратном порядке: триггер пересечений
+    # блокирует столики по порядку вставки строк
+    start = datetime(2030, 1, 1, 12, tzinfo=timezone.utc)
+    db_engine = create_async_engine(settings.database_url)
+    table_ids = await seed(db_engine, f"test-{uuid.uuid4().hex[:8]}-", 200, 0)
+    make_session = sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def import_batch(order, offset_hours: int):
+        async with make_session() as session:
+            return await ReservationRepository(session).bulk_create(
+                [
+                    {
+                        "customer_name": "Test User",
+                        "table_id": table_id,
+                        "reservation_time": start + timedelta(hours=offset_hours),
+                        "duration_minutes": 60,
+                    }
+                    for table_id in order
+                ]
+            )
+
+    try:
+        for _ in range(5):
+            outcomes = await asyncio.gather(
+                import_batch(table_ids, 0), import_batch(table_ids[::-1], 2)
+            )
+            assert all(isinstance(outcome, int) for outcome in sum(outcomes, []))
+            start += timedelta(days=1)
+    finally:
+        await cleanup(db_engine, table_ids=table_ids)
+        await db_engine.dispose()
+
+
+async def run_stress(config: ConcurrencySettings, protected: bool):
+    # параллельные транзакции требуют отдельных соединений, поэтому тест
+    # работает с БД напрямую и удаляет свои данные
+    db_engine = create_async_engine(settings.database_url)
+    table_ids = await seed(db_engine, f"test-{uuid.uuid4().hex[:8]}-", 2, 0)
+    engines = (
+        nullcontext(db_engine) if protected else unconstrained(settings.database_url)
+    )
+    try:
+        async with engines as stress_engine:
+            return await stress(
+                stress_engine, config, table_ids, 10, 100, 8, random.Random(1)
+            )
+    finally:
+        await cleanup(db_engine, table_ids)
+        await db_engine.dispose()
@@ -0,0 +1,184 @@
+import gzip
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from models.models import DailyOccupancy, Reservation, ReservationArchive, Table
+from repositories.daily_occupancy_repository import DailyOccupancyRepository
+from services.retention import ReservationArchiver
+from settings import RetentionSettings
+
+START = datetime(2030, 3, 1, 12, tzinfo=timezone.utc)
+OLD = datetime(2001, 1, 10, 19, tzinfo=timezone.utc)
+
+
+async def create_table(session, location: str, seats: int = 4) -> int:
+    table = Table(name="Test Table", seats=seats, location=location)
+    session.add(table)
+    await session.commit()
+    await session.refresh(table)
+    return table.id
+
+
+async def create_reservations(session, table_id: int, *starts) -> None:
+    session.add_all(
+        Reservation(
+            customer_name="Test User",
+            table_id=table_id,
+            reservation_time=start,
+            duration_minutes=60,
+        )
+        for start in starts
+    )
+    await session.commit()
+
+
+async def report(client, day_from: date, days: int = 3, **params):
+    response = await client.get(
+        "/api/v1/reports/occupancy",
+        params={
+            "from": day_from.isoformat(),
+            "to": (day_from + timedelta(days=days)).isoformat(),
+            **params,
+        },
+    )
+    assert response.status_code == 200
+    return [
+        (row["day"], row["location"], row["reservations"], row["seats"])
+        for row in response.json()
+    ]
+
+
+async def summary_rows(session) -> int:
+    return await session.scalar(select(func.count()).select_from(DailyOccupancy))
+
+
+@pytest.mark.asyncio
+async def test_summary_follows_reservations(client, session):
+    hall = await create_table(session, "Summary Hall")
+    terrace = await create_table(session, "Summary Terrace", seats=2)
+    await create_reservations(
+        session,
+        hall,
+        START,
+        START + timedelta(hours=2),
+        # начало дня определяет день в сводке
+        START + timedelta(hours=11, minutes=30),
+    )
+
+    for table_id, start in ((hall, START + timedelta(hours=4)), (terrace, START)):
+        response = await client.post(
+            "/api/v1/reservations/",
+            json={
+                "customer_name": "Test User",
+                "table_id": table_id,
+                "reservation_time": start.isoformat(),
+                "duration_minutes": 90,
+            },
+        )
+        assert response.status_code == 200
+    reservation_id = response.json()["id"]
+
+    expected = [
+        ("2030-03-01", "Summary Hall", 4, 16),
+        ("2030-03-01", "Summary Terrace", 1, 2),
+    ]
+    assert await report(client, START.date()) == expected
+    assert await report(client, START.date(), location="Summary Terrace") == [
+        expected[1]
+    ]
+
+    response = await client.delete(f"/api/v1/reservations/{reservation_id}")
+    assert response.status_code == 204
+    assert await report(client, START.date()) == expected[:1]
+
+    # свёртка оставляет одну запись на день и зал (отменённые взаимно
+    # погашаются), итог не меняется
+    repository = DailyOccupancyRepository(session)
+    assert await repository.compact() == 1
+    assert await summary_rows(session) == 1
+    assert await report(client, START.date()) == expected[:1]
+
+    assert await repository.rebuild() == 1
+    assert await report(client, START.date()) == expected[:1]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_and_archive(client, session):
+    table_id = await create_table(session, "Archive Hall")
+    await create_reservations(session, table_id, OLD, OLD + timedelta(hours=2))
+    await session.execute(DailyOccupancy.__table__.delete())
+    await session.commit()
+    assert await report(client, OLD.date()) == []
+
+    assert await DailyOccupancyRepository(session).rebuild() == 1
+    expected = [("2001-01-10", "Archive Hall", 2, 8)]
+    assert await report(client, OLD.date()) == expected
+
+    @asynccontextmanager
+    async def session_factory():
+        yield session
+
+    # перенос в архив не меняет сводку
+    config = RetentionSettings(horizon_days=365, batch_pause=0)
+    assert await ReservationArchiver(config, session_factory).run() == 2
+    assert await report(client, OLD.date()) == expected
+    assert await DailyOccupancyRepository(session).rebuild() == 1
+    assert await report(client, OLD.date()) == expected
+
+
+@pytest.mark.asyncio
+async def test_archive_to_file_keeps_summary(client, session, tmp_path):
+    table_id = await create_table(session, "Export Hall")
+    await create_reservations(session, table_id, OLD, OLD + timedelta(hours=2))
+    expected = [("2001-01-10", "Export Hall", 2, 8)]
+    assert await report(client, OLD.date()) == expected
+
+    @asynccontextmanager
+    async def session_factory():
+        yield session
+
+    # выгрузка в файл удаляет бронирования из БД, но не из сводки
+    config = RetentionSettings(horizon_days=365, batch_pause=0)
+    with gzip.open(tmp_path / "archive.ndjson.gz", "wb") as output:
+        assert await ReservationArchiver(config, session_factory).run(output) == 2
+    assert await report(client, OLD.date()) == expected
+    assert await DailyOccupancyRepository(session).compact() == 1
+    assert await report(client, OLD.date()) == expected
+
+
+@pytest.mark.asyncio
+async def test_report_window(client, session):
+    response = await client.get(
+        "/api/v1/reports/occupancy", params={"from": "2030-03-02", "to": "2030-03-01"}
+    )
+    assert response.status_code == 422
+
+    response = await client.get(
+        "/api/v1/reports/occupancy", params={"from": "2030-01-01", "to": "2031-06-01"}
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_delete_table_keeps_history(client, session):
+    table_id = await create_table(session, "Deleted Hall")
+    yesterday = datetime.now(timezone.utc) - timedelta(days=1)
+    await create_reservations(session, table_id, yesterday)
+    expected = await report(client, yesterday.date(), days=1)
+    assert expected == [(yesterday.date().isoformat(), "Deleted Hall", 1, 4)]
+
+    # прошедшие бронирования удалённого столика переносятся в архив
+    response = await client.delete(f"/api/v1/tables/{table_id}")
+    assert response.status_code == 204
+    assert (
+        await session.scalar(
+            select(func.count())
+            .select_from(ReservationArchive)
+            .where(ReservationArchive.table_id == table_id)
+        )
+        == 1
+    )
+    assert await report(client, yesterday.date(), days=1) == expected
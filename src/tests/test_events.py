@@ -0,0 +1,106 @@
+from typing import Sequence
+
+import pytest
+from sqlalchemy import select
+
+from integrations.events.dispatcher import OutboxDispatcher
+from integrations.events.transport import Event, EventTransport, InMemoryTransport
+from models.models import OutboxEvent
+from settings import settings
+
+
+class FailingTransport(EventTransport):
+    async def send(self, events: Sequence[Event]) -> None:
+        raise ConnectionError("broker is unavailable")
+
+
+@pytest.fixture
+def events_enabled(monkeypatch):
+    monkeypatch.setattr(settings.events, "enabled", True)
+
+
+async def outbox(session):
+    result = await session.execute(
+        select(OutboxEvent.event_type, OutboxEvent.payload).order_by(OutboxEvent.id)
+    )
+    return result.all()
+
+
+async def create_reservation(client) -> int:
+    response = await client.post(
+        "/api/v1/tables/",
+        json={"name": "Test Table", "seats": 4, "location": "Main Hall"},
+    )
+    table_id = response.json()["id"]
+    response = await client.post(
+        "/api/v1/reservations/",
+        json={
+            "customer_name": "Test User",
+            "table_id": table_id,
+            "reservation_time": "2030-01-01T12:00:00Z",
+            "duration_minutes": 60,
+        },
+    )
+    assert response.status_code == 200
+    return table_id
+
+
+@pytest.mark.asyncio
+async def test_events_written_with_changes(client, session, events_enabled):
+    table_id = await create_reservation(client)
+    reservation_id = (await outbox(session))[1][1]["id"]
+
+    response = await client.delete(f"/api/v1/reservations/{reservation_id}")
+    assert response.status_code == 204
+    response = await client.delete(f"/api/v1/tables/{table_id}")
+    assert response.status_code == 204
+
+    events = await outbox(session)
+    assert [event_type for event_type, _ in events] == [
+        "table.created",
+        "reservation.created",
+        "reservation.deleted",
+        "table.deleted",
+    ]
+    assert events[1][1] == {
+        "id": reservation_id,
+        "table_id": table_id,
+        "customer_name": "Test User",
+        "reservation_time": "2030-01-01T12:00:00+00:00",
+        "duration_minutes": 60,
+    }
+
+
+@pytest.mark.asyncio
+async def test_events_disabled(client, session):
+    await create_reservation(client)
+
+    assert await outbox(session) == []
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_drains_outbox(client, session, events_enabled):
+    await create_reservation(client)
+    transport = InMemoryTransport()
+    dispatcher = OutboxDispatcher(transport, batch_size=1)
+
+    assert await dispatcher.drain(session) == 1
+    assert await dispatcher.drain(session) == 1
+    assert await dispatcher.drain(session) == 0
+
+    assert [event.event_type for event in transport.events] == [
+        "table.created",
+        "reservation.created",
+    ]
+    assert await outbox(session) == []
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_keeps_events_on_failure(client, session, events_enabled):
+    await create_reservation(client)
+    dispatcher = OutboxDispatcher(FailingTransport())
+
+    with pytest.raises(ConnectionError):
+        await dispatcher.drain(session)
+
+    assert len(await outbox(session)) == 2
@@ -0,0 +1,117 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from models.models import Reservation, Table
+from services.collection_versions import TABLES, collection_versions
+
+
+async def create_table(session) -> int:
+    table = Table(name="Test Table", seats=4, location="Main Hall")
+    session.add(table)
+    await session.commit()
+    await session.refresh(table)
+    return table.id
+
+
+@pytest.mark.asyncio
+async def test_tables_not_modified_until_created(client, session):
+    response = await client.get("/api/v1/tables/")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert response.headers["Last-Modified"]
+
+    response = await client.get("/api/v1/tables/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    response = await client.post(
+        "/api/v1/tables/",
+        json={"name": "Test Table", "seats": 4, "location": "Main Hall"},
+    )
+    assert response.status_code == 200
+
+    response = await client.get("/api/v1/tables/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_table_cache_follows_version(client, session):
+    response = await client.get("/api/v1/tables/", params={"size": 100})
+    etag = response.headers["ETag"]
+
+    # изменение в другом процессе: версия увеличена, кэш каталога
+    # этого процесса не сброшен
+    table_id = await create_table(session)
+    await collection_versions.bump(session, TABLES)
+
+    response = await client.get("/api/v1/tables/", params={"size": 100})
+    assert response.headers["ETag"] != etag
+    assert table_id in [item["id"] for item in response.json()["items"]]
+
+
+@pytest.mark.asyncio
+async def test_if_modified_since(client, session):
+    response = await client.get("/api/v1/reservations/")
+    last_modified = response.headers["Last-Modified"]
+
+    response = await client.get(
+        "/api/v1/reservations/", headers={"If-Modified-Since": last_modified}
+    )
+    assert response.status_code == 304
+
+    response = await client.get(
+        "/api/v1/reservations/",
+        headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"},
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_detail_endpoints(client, session):
+    table_id = await create_table(session)
+    reservation = Reservation(
+        customer_name="Test User",
+        table_id=table_id,
+        reservation_time=datetime(2030, 5, 1, 19, tzinfo=timezone.utc),
+        duration_minutes=60,
+    )
+    session.add(reservation)
+    await session.commit()
+    await session.refresh(reservation)
+
+    response = await client.get(f"/api/v1/tables/{table_id}")
+    assert response.status_code == 200
+    assert response.json()["id"] == table_id
+    response = await client.get(
+        f"/api/v1/tables/{table_id}",
+        headers={"If-None-Match": response.headers["ETag"]},
+    )
+    assert response.status_code == 304
+
+    response = await client.get(f"/api/v1/reservations/{reservation.id}")
+    assert response.status_code == 200
+    assert response.json()["customer_name"] == "Test User"
+    etag = response.headers["ETag"]
+
+    response = await client.delete(f"/api/v1/reservations/{reservation.id}")
+    assert response.status_code == 204
+    response = await client.get(
+        f"/api/v1/reservations/{reservation.id}", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 404
+
+    response = await client.get("/api/v1/tables/999999")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_versions_disabled(client, session, monkeypatch):
+    monkeypatch.setattr(collection_versions, "enabled", False)
+
+    response = await client.get("/api/v1/tables/", headers={"If-None-Match": "*"})
+
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
@@ -0,0 +1,66 @@
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from integrations.db.session import create_engine
+from integrations.metrics import RequestStats, request_stats
+from settings import DatabaseSettings, settings
+
+
+@pytest.mark.asyncio
+async def test_engine_counts_queries_per_request():
+    engine = create_engine(settings.database_url, DatabaseSettings(pool_size=1))
+    waits_before = REGISTRY.get_sample_value("db_pool_checkout_wait_seconds_count")
+
+    stats = RequestStats()
+    token = request_stats.set(stats)
+    try:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+            await connection.execute(text("SELECT 2"))
+    finally:
+        request_stats.reset(token)
+    await engine.dispose()
+
+    assert stats.queries == 2
+    assert stats.db_time > 0
+    assert (
+        REGISTRY.get_sample_value("db_pool_checkout_wait_seconds_count") > waits_before
+    )
+
+
+@pytest.mark.asyncio
+async def test_failed_query_leaves_no_timing_state():
+    engine = create_engine(settings.database_url, DatabaseSettings(pool_size=1))
+
+    stats = RequestStats()
+    token = request_stats.set(stats)
+    try:
+        async with engine.connect() as connection:
+            info = dict((await connection.get_raw_connection()).info)
+            with pytest.raises(DBAPIError):
+                await connection.execute(text("SELECT 1 / 0"))
+            await connection.rollback()
+            await connection.execute(text("SELECT 1"))
+            assert (await connection.get_raw_connection()).info == info
+    finally:
+        request_stats.reset(token)
+    await engine.dispose()
+
+    assert stats.queries == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client, session):
+    response = await client.delete("/api/v1/tables/999999")
+    assert response.status_code == 404
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert (
+        'http_request_duration_seconds_count{method="DELETE",'
+        'route="/api/v1/tables/{table_id}",status="404"}' in response.text
+    )
+    assert 'api_errors_total{code="not_found"}' in response.text
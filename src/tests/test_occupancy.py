@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from models.models import Reservation, Table
+
+START = datetime(2030, 3, 1, 12, tzinfo=timezone.utc)
+
+
+async def create_table(session) -> int:
+    table = Table(name="Test Table", seats=4, location="Main Hall")
+    session.add(table)
+    await session.commit()
+    await session.refresh(table)
+    return table.id
+
+
+async def create_reservations(session, table_id: int, *slots) -> None:
+    session.add_all(
+        Reservation(
+            customer_name="Test User",
+            table_id=table_id,
+            reservation_time=START + timedelta(minutes=offset),
+            duration_minutes=duration,
+        )
+        for offset, duration in slots
+    )
+    await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_occupancy_by_table(client, session):
+    first = await create_table(session)
+    second = await create_table(session)
+    # второе бронирование первого столика выходит за конец интервала
+    await create_reservations(session, first, (0, 60), (150, 60))
+    await create_reservations(session, second, (30, 90))
+
+    response = await client.get(
+        "/api/v1/reservations/occupancy",
+        params={
+            "from": START.isoformat(),
+            "to": (START + timedelta(hours=3)).isoformat(),
+        },
+    )
+
+    assert response.status_code == 200
+    rows = {row["table_id"]: row for row in response.json()}
+    assert rows[first]["reservations"] == 2
+    assert rows[first]["booked_minutes"] == 90
+    assert rows[second]["reservations"] == 1
+    assert rows[second]["booked_minutes"] == 90
+
+
+@pytest.mark.asyncio
+async def test_occupancy_by_hour(client, session):
+    table_id = await create_table(session)
+    await create_reservations(session, table_id, (30, 60))
+
+    response = await client.get(
+        "/api/v1/reservations/occupancy",
+        params={
+            "from": START.isoformat(),
+            "to": (START + timedelta(hours=3)).isoformat(),
+            "group_by": "hour",
+            "table_id": table_id,
+        },
+    )
+
+    assert response.status_code == 200
+    assert [
+        (row["start"], row["reservations"], row["booked_minutes"])
+        for row in response.json()
+    ] == [
+        ("2030-03-01T12:00:00+00:00", 1, 30),
+        ("2030-03-01T13:00:00+00:00", 1, 30),
+        ("2030-03-01T14:00:00+00:00", 0, 0),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_occupancy_invalid_window(client, session):
+    response = await client.get(
+        "/api/v1/reservations/occupancy",
+        params={"from": START.isoformat(), "to": START.isoformat()},
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_table_reservations(client, session):
+    table_id = await create_table(session)
+    other = await create_table(session)
+    await create_reservations(session, table_id, (0, 60), (60, 60), (240, 60))
+    await create_reservations(session, other, (0, 60))
+
+    response = await client.get(
+        f"/api/v1/tables/{table_id}/reservations", params={"size": 2}
+    )
+    assert response.status_code == 200
+    page = response.json()
+    assert [item["table_id"] for item in page["items"]] == [table_id, table_id]
+    assert page["next_page"] is not None
+
+    response = await client.get(
+        f"/api/v1/tables/{table_id}/reservations",
+        params={"size": 2, "cursor": page["next_page"]},
+    )
+    assert len(response.json()["items"]) == 1
+
+    response = await client.get(
+        f"/api/v1/tables/{table_id}/reservations",
+        params={"to": (START + timedelta(hours=3)).isoformat()},
+    )
+    assert len(response.json()["items"]) == 2
+
+    response = await client.get("/api/v1/tables/999999/reservations")
+    assert response.status_code == 404
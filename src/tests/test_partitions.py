@@ -0,0 +1,181 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select, text
+
+from integrations.db.partitions import archive_partitions
+from models.models import Reservation, Table
+from repositories.reservation_repository import ReservationRepository
+
+
+async def create_table(session) -> int:
+    table = Table(name="Test Table", seats=4, location="Main Hall")
+    session.add(table)
+    await session.commit()
+    await session.refresh(table)
+    return table.id
+
+
+async def create_partition(session, month: str) -> None:
+    await session.execute(text(f"SELECT reservation_create_partition('{month}')"))
+
+
+async def partition_of(session, reservation_id: int) -> str:
+    result = await session.execute(
+        text("SELECT tableoid::regclass::text FROM reservation WHERE id = :id"),
+        {"id": reservation_id},
+    )
+    return result.scalar()
+
+
+@pytest.mark.asyncio
+async def test_create_partition_moves_default_rows(session):
+    table_id = await create_table(session)
+    reservation = Reservation(
+        customer_name="Test User",
+        table_id=table_id,
+        reservation_time=datetime(2031, 3, 10, 19, tzinfo=timezone.utc),
+        duration_minutes=60,
+    )
+    session.add(reservation)
+    await session.commit()
+    await session.refresh(reservation)
+    reservation_id = reservation.id
+    assert await partition_of(session, reservation_id) == "reservation_default"
+
+    await create_partition(session, "2031-03-01")
+
+    assert await partition_of(session, reservation_id) == "reservation_y2031m03"
+
+
+@pytest.mark.asyncio
+async def test_overlap_across_partitions(client, session):
+    table_id = await create_table(session)
+    await create_partition(session, "2031-01-01")
+    await create_partition(session, "2031-02-01")
+
+    response = await client.post(
+        "/api/v1/reservations/",
+        json={
+            "customer_name": "Test User",
+            "table_id": table_id,
+            "reservation_time": "2031-01-31T23:30:00Z",
+            "duration_minutes": 120,
+        },
+    )
+    assert response.status_code == 200
+
+    response = await client.post(
+        "/api/v1/reservations/",
+        json={
+            "customer_name": "Test User",
+            "table_id": table_id,
+            "reservation_time": "2031-02-01T00:30:00Z",
+            "duration_minutes": 60,
+        },
+    )
+    assert response.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_time_filter_prunes_partitions(session):
+    await create_partition(session, "2031-01-01")
+    await create_partition(session, "2031-02-01")
+
+    query = select(Reservation.id).where(
+        Reservation.reservation_time >= datetime(2031, 2, 1, tzinfo=timezone.utc),
+        Reservation.reservation_time < datetime(2031, 2, 2, tzinfo=timezone.utc),
+    )
+    compiled = query.compile(compile_kwargs={"literal_binds": True})
+    result = await session.execute(text(f"EXPLAIN {compiled}"))
+    plan = "\n".join(result.scalars())
+
+    assert "reservation_y2031m02" in plan
+    assert "reservation_y2031m01" not in plan
+    assert "reservation_default" not in plan
+
+
+@pytest.mark.asyncio
+async def test_archive_partitions(session):
+    table_id = await create_table(session)
+    await create_partition(session, "2001-01-01")
+    session.add(
+        Reservation(
+            customer_name="Test User",
+            table_id=table_id,
+            reservation_time=datetime(2001, 1, 10, 19, tzinfo=timezone.utc),
+            duration_minutes=60,
+        )
+    )
+    await session.commit()
+
+    archived = await archive_partitions(await session.connection(), retain=12)
+
+    assert archived == ["reservation_y2001m01"]
+    result = await session.execute(
+        select(Reservation).where(Reservation.table_id == table_id)
+    )
+    assert result.scalars().all() == []
+    result = await session.execute(
+        text("SELECT count(*) FROM archive.reservation_y2001m01")
+    )
+    assert result.scalar() == 1
+
+    # отсоединённая секция читается вместе с архивом
+    page = await ReservationRepository(session).get_page(
+        10, table_id=table_id, time_from=datetime(2001, 1, 1, tzinfo=timezone.utc)
+    )
+    assert [row["reservation_time"] for row in page] == [
+        datetime(2001, 1, 10, 19, tzinfo=timezone.utc)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_bulk_overlap_across_partitions(client, session):
+    first = await create_table(session)
+    second = await create_table(session)
+    await create_partition(session, "2031-04-01")
+    await create_partition(session, "2031-05-01")
+    session.add(
+        Reservation(
+            customer_name="Existing User",
+            table_id=first,
+            reservation_time=datetime(2031, 4, 30, 23, 30, tzinfo=timezone.utc),
+            duration_minutes=120,
+        )
+    )
+    await session.commit()
+
+    items = [
+        # пересекается с бронированием в секции апреля
+        (first, "2031-05-01T00:30:00Z", 60),
+        (second, "2031-04-30T23:00:00Z", 120),
+        # пересекается с предыдущей записью пачки из другой секции
+        (second, "2031-05-01T00:00:00Z", 60),
+        (second, "2031-05-01T01:00:00Z", 60),
+    ]
+    body = "\n".join(
+        json.dumps(
+            {
+                "customer_name": "Bulk User",
+                "table_id": table_id,
+                "reservation_time": start,
+                "duration_minutes": duration,
+            }
+        )
+        for table_id, start, duration in items
+    )
+    response = await client.post(
+        "/api/v1/reservations/bulk",
+        content=body + "\n",
+        headers={"content-type": "application/x-ndjson"},
+    )
+
+    assert response.status_code == 200
+    assert [item["status"] for item in response.json()["items"]] == [
+        "conflict",
+        "created",
+        "conflict",
+        "created",
+    ]
@@ -0,0 +1,104 @@
+import logging
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from integrations.db.profiling import explain_statement, wait_explains
+from integrations.db.session import create_engine
+from integrations.metrics import RequestStats, request_stats
+from integrations.profiling import ProfilingMiddleware
+from main import app
+from settings import DatabaseSettings, ProfilingSettings, settings
+
+
+def test_explain_statement():
+    assert explain_statement("SELECT 1").startswith("EXPLAIN (ANALYZE, BUFFERS) ")
+    assert explain_statement("SELECT * FROM t FOR UPDATE") == (
+        "EXPLAIN SELECT * FROM t FOR UPDATE"
+    )
+    assert explain_statement("INSERT INTO t VALUES (1)") == (
+        "EXPLAIN INSERT INTO t VALUES (1)"
+    )
+    assert explain_statement(
+        "WITH d AS (DELETE FROM t RETURNING id) SELECT * FROM d"
+    ).startswith("EXPLAIN WITH")
+    assert explain_statement(
+        "SELECT count(*) FROM reservation WHERE period && tstzrange($1, $2)"
+    ).startswith("EXPLAIN (ANALYZE, BUFFERS) ")
+    # функции с побочными эффектами не выполняются повторно
+    for statement in (
+        "SELECT pg_advisory_xact_lock(hashtext('reservation'), 1)",
+        "SELECT pg_notify('reservation', 'payload')",
+        "SELECT reservation_create_partition(CAST($1 AS date))",
+    ):
+        assert explain_statement(statement) == f"EXPLAIN {statement}"
+
+
+@pytest.mark.asyncio
+async def test_slow_query_logged_with_plan(caplog):
+    engine = create_engine(
+        settings.database_url,
+        DatabaseSettings(pool_size=1),
+        ProfilingSettings(slow_query_ms=0, log_parameters=True),
+    )
+    caplog.set_level(logging.WARNING, logger="integrations.db.profiling")
+
+    async with engine.connect() as connection:
+        await connection.execute(
+            text("SELECT CAST(:value AS integer) + 1"), {"value": 41}
+        )
+    await wait_explains(timeout=5)
+    await engine.dispose()
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert any(
+        message.startswith("Медленный SQL-запрос") and "(41,)" in message
+        for message in messages
+    )
+    assert any(
+        message.startswith("План медленного SQL-запроса") and "actual time" in message
+        for message in messages
+    )
+
+
+@pytest.mark.asyncio
+async def test_profiled_request_logs_queries(caplog):
+    engine = create_engine(
+        settings.database_url, DatabaseSettings(pool_size=1), ProfilingSettings()
+    )
+    caplog.set_level(logging.INFO, logger="integrations.db.profiling")
+
+    token = request_stats.set(RequestStats(profile=True))
+    try:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+    finally:
+        request_stats.reset(token)
+    await engine.dispose()
+
+    assert any(
+        record.getMessage().startswith("SQL-запрос") for record in caplog.records
+    )
+
+
+@pytest.mark.asyncio
+async def test_server_timing_header(client, session):
+    # без секрета профилирование по заголовку отключено
+    response = await client.get("/api/v1/tables/", headers={"X-Profile": "1"})
+    assert "Server-Timing" not in response.headers
+
+    profiled = ProfilingMiddleware(app, header="X-Profile", secret="secret")
+    async with AsyncClient(app=profiled, base_url=settings.base_url) as profiled_client:
+        response = await profiled_client.get(
+            "/api/v1/tables/", headers={"X-Profile": "secret"}
+        )
+        assert response.status_code == 200
+        timing = response.headers["Server-Timing"]
+        assert "db;dur=" in timing
+        assert 'db-queries;desc="' in timing
+        assert "serialize;dur=" in timing
+
+        for headers in ({"X-Profile": "1"}, {}):
+            response = await profiled_client.get("/api/v1/tables/", headers=headers)
+            assert "Server-Timing" not in response.headers
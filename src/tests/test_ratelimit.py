@@ -0,0 +1,144 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from integrations.metrics import DecayingAverage
+from integrations.ratelimit import (
+    LoadShedder,
+    LoadSheddingMiddleware,
+    MemoryBuckets,
+    RateLimitMiddleware,
+    RedisBuckets,
+)
+from settings import LoadSheddingSettings, RateLimitSettings, RouteLimit
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    @app.post("/items/")
+    async def create_item():
+        return {"id": 1}
+
+    return app
+
+
+def rate_limited(config: RateLimitSettings) -> FastAPI:
+    app = build_app()
+    app.add_middleware(
+        RateLimitMiddleware,
+        routes=app.router.routes,
+        buckets=MemoryBuckets(100),
+        config=config,
+    )
+    return app
+
+
+@pytest.mark.asyncio
+async def test_memory_buckets():
+    buckets = MemoryBuckets(max_buckets=2)
+
+    assert await buckets.acquire("a", rate=1, burst=2) == 0
+    assert await buckets.acquire("a", rate=1, burst=2) == 0
+    assert 0 < await buckets.acquire("a", rate=1, burst=2) <= 1
+
+    await buckets.acquire("b", rate=1, burst=2)
+    await buckets.acquire("c", rate=1, burst=2)
+    # вытеснена давно не использованная корзина: клиент получает полную
+    assert len(buckets) == 2
+    assert await buckets.acquire("a", rate=1, burst=2) == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_per_client_and_route():
+    config = RateLimitSettings(
+        rate=0.001, burst=2, routes={"POST /items/": RouteLimit(rate=0.001, burst=1)}
+    )
+    app = rate_limited(config)
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        # разные идентификаторы — один маршрут и одна корзина
+        assert (await client.get("/items/1")).status_code == 200
+        assert (await client.get("/items/2")).status_code == 200
+        response = await client.get("/items/3")
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "1000"
+        assert response.json() == {
+            "error": {
+                "code": "too_many_requests",
+                "description": "Слишком много запросов, повторите запрос позже.",
+            }
+        }
+
+        assert (await client.post("/items/")).status_code == 200
+        assert (await client.post("/items/")).status_code == 429
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        client.headers["X-Client"] = "other"
+        assert (await client.get("/items/1")).status_code == 429
+
+    config.client_header = "X-Client"
+    async with AsyncClient(app=rate_limited(config), base_url="http://test") as client:
+        assert (
+            await client.get("/items/1", headers={"X-Client": "a"})
+        ).status_code == 200
+        assert (
+            await client.get("/items/1", headers={"X-Client": "b"})
+        ).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_load_shedding_prefers_reads():
+    shedder = LoadShedder(
+        LoadSheddingSettings(max_in_flight=4, write_share=0.5, retry_after=2),
+        DecayingAverage(),
+    )
+    app = build_app()
+    app.add_middleware(LoadSheddingMiddleware, shedder=shedder)
+
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        assert (await client.post("/items/")).status_code == 200
+        assert shedder.in_flight == 0
+
+        shedder.in_flight = 2
+        response = await client.post("/items/")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "2"
+        assert response.json()["error"]["code"] == "service_unavailable"
+        assert (await client.get("/items/1")).status_code == 200
+
+        shedder.in_flight = 4
+        assert (await client.get("/items/1")).status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_load_shedding_by_pool_wait():
+    wait = DecayingAverage(half_life=1)
+    shedder = LoadShedder(
+        LoadSheddingSettings(max_pool_wait=0.1, max_read_pool_wait=0.5), wait
+    )
+
+    wait.add(1.0, now=0)
+    wait.alpha = 1
+    assert wait.value(now=0) == pytest.approx(0.2)
+    wait.add(1.0, now=0)
+    assert wait.value(now=1) == pytest.approx(0.5)
+
+    shedder.wait = DecayingAverage(alpha=1)
+    shedder.wait.add(0.2)
+    assert shedder.overloaded(write=True)
+    assert not shedder.overloaded(write=False)
+
+
+@pytest.mark.asyncio
+async def test_redis_buckets():
+    pytest.importorskip("lupa", reason="скрипты Lua в fakeredis требуют lupa")
+    from fakeredis import aioredis
+
+    buckets = RedisBuckets(aioredis.FakeRedis())
+    assert await buckets.acquire("a", rate=1, burst=1) == 0
+    assert 0 < await buckets.acquire("a", rate=1, burst=1) <= 1
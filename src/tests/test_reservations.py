@@ -1,8 +1,12 @@
-from datetime import datetime, timedelta
+import json
+from datetime import datetime, timedelta, timezone
 
 import pytest
+from sqlalchemy import select
 
-from models.models import Reservation, Table
+from models.models import IdempotencyKey, Reservation, Table
+from repositories.idempotency_repository import IdempotencyRepository
+from settings import settings
 
 
 @pytest.mark.asyncio
@@ -45,10 +49,119 @@ async def test_get_reservations(client, session):
 
     response = await client.get("/api/v1/reservations/")
     assert response.status_code == 200
-    reservations = response.json()
+    reservations = response.json()["items"]
     assert len(reservations) > 0
 
 
+@pytest.mark.asyncio
+async def test_get_reservations_paginated(client, session):
+    table = Table(name="Test Table", seats=4, location="Main Hall")
+    session.add(table)
+    await session.commit()
+    await session.refresh(table)
+    table_id = table.id
+
+    start_time = datetime.now()
+    for hour in range(3):
+        session.add(
+            Reservation(
+                customer_name=f"Test User {hour}",
+                table_id=table_id,
+                reservation_time=start_time + timedelta(hours=hour),
+                duration_minutes=60,
+            )
+        )
+    await session.commit()
+
+    params = {"table_id": table_id, "size": 2}
+    response = await client.get("/api/v1/reservations/", params=params)
+    assert response.status_code == 200
+    first_page = response.json()
+    assert [item["customer_name"] for item in first_page["items"]] == [
+        "Test User 0",
+        "Test User 1",
+    ]
+    assert first_page["next_page"]
+
+    params["cursor"] = first_page["next_page"]
+    response = await client.get("/api/v1/reservations/", params=params)
+    assert response.status_code == 200
+    second_page = response.json()
+    assert [item["customer_name"] for item in second_page["items"]] == ["Test User 2"]
+    assert second_page["next_page"] is None
+
+
+@pytest.mark.asyncio
+async def test_get_reservations_fast_json(client, session, monkeypatch):
+    table = Table(name="Test Table", seats=4, location="Main Hall")
+    session.add(table)
+    await session.commit()
+    await session.refresh(table)
+    table_id = table.id
+
+    session.add(
+        Reservation(
+            customer_name="Test User",
+            table_id=table_id,
+            reservation_time=datetime(2030, 5, 1, 19, 30, 15, 500, tzinfo=timezone.utc),
+            duration_minutes=60,
+        )
+    )
+    await session.commit()
+
+    params = {"table_id": table_id}
+    expected = await client.get("/api/v1/reservations/", params=params)
+    expected_stream = await client.get("/api/v1/reservations/stream", params=params)
+
+    monkeypatch.setattr(settings, "fast_json", True)
+    response = await client.get("/api/v1/reservations/", params=params)
+    stream = await client.get("/api/v1/reservations/stream", params=params)
+
+    # формат ответа не зависит от режима сериализации
+    assert response.status_code == 200
+    assert response.content == expected.content
+    assert json.loads(stream.content) == json.loads(expected_stream.content)
+
+
+@pytest.mark.asyncio
+async def test_get_reservations_invalid_cursor(client, session):
+    response = await client.get("/api/v1/reservations/", params={"cursor": "bad"})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_stream_reservations(client, session):
+    table = Table(name="Test Table", seats=4, location="Main Hall")
+    session.add(table)
+    await session.commit()
+    await session.refresh(table)
+    table_id = table.id
+
+    start_time = datetime.now()
+    for hour in range(3):
+        session.add(
+            Reservation(
+                customer_name=f"Test User {hour}",
+                table_id=table_id,
+                reservation_time=start_time + timedelta(hours=hour),
+                duration_minutes=60,
+            )
+        )
+    await session.commit()
+
+    response = await client.get(
+        "/api/v1/reservations/stream", params={"table_id": table_id}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["customer_name"] for line in lines] == [
+        "Test User 0",
+        "Test User 1",
+        "Test User 2",
+    ]
+
+
 @pytest.mark.asyncio
 async def test_delete_reservation(client, session):
     # Create a reservation to delete
@@ -79,17 +192,17 @@ async def test_delete_nonexistent_reservation(client):
 
 
 @pytest.mark.asyncio
-@pytest.mark.skip
 async def test_create_overlapping_reservation(client, session):
     # Create initial reservation
     table = Table(name="Test Table", seats=4, location="Main Hall")
     session.add(table)
     await session.commit()
     await session.refresh(table)
+    table_id = table.id
 
     reservation = Reservation(
         customer_name="Test User",
-        table_id=table.id,
+        table_id=table_id,
         reservation_time=datetime.now(),
         duration_minutes=60,
     )
@@ -102,7 +215,7 @@ async def test_create_overlapping_reservation(client, session):
         "/api/v1/reservations/",
         json={
             "customer_name": "Test User 2",
-            "table_id": table.id,
+            "table_id": table_id,
             "reservation_time": (start_time + timedelta(minutes=30)).isoformat(),
             "duration_minutes": 30,
         },
@@ -111,8 +224,37 @@ async def test_create_overlapping_reservation(client, session):
 
 
 @pytest.mark.asyncio
-@pytest.mark.skip
-async def test_create_reservation_with_nonexistent_table(client):
+async def test_create_adjacent_reservation(client, session):
+    table = Table(name="Test Table", seats=4, location="Main Hall")
+    session.add(table)
+    await session.commit()
+    await session.refresh(table)
+    table_id = table.id
+
+    start_time = datetime.now()
+    reservation = Reservation(
+        customer_name="Test User",
+        table_id=table_id,
+        reservation_time=start_time,
+        duration_minutes=60,
+    )
+    session.add(reservation)
+    await session.commit()
+
+    response = await client.post(
+        "/api/v1/reservations/",
+        json={
+            "customer_name": "Test User 2",
+            "table_id": table_id,
+            "reservation_time": (start_time + timedelta(minutes=60)).isoformat(),
+            "duration_minutes": 30,
+        },
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_create_reservation_with_nonexistent_table(client, session):
     response = await client.post(
         "/api/v1/reservations/",
         json={
@@ -123,3 +265,159 @@ async def test_create_reservation_with_nonexistent_table(client):
         },
     )
     assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_create_reservations_bulk_ndjson(client, session):
+    table = Table(name="Test Table", seats=4, location="Main Hall")
+    session.add(table)
+    await session.commit()
+    await session.refresh(table)
+    table_id = table.id
+
+    start_time = datetime(2030, 1, 1, 12, tzinfo=timezone.utc)
+    session.add(
+        Reservation(
+            customer_name="Existing User",
+            table_id=table_id,
+            reservation_time=start_time,
+            duration_minutes=60,
+        )
+    )
+    await session.commit()
+
+    items = [
+        # пересекается с существующим бронированием
+        {"table_id": table_id, "offset": 30},
+        {"table_id": table_id, "offset": 60},
+        # пересекается с предыдущей записью пачки
+        {"table_id": table_id, "offset": 90},
+        {"table_id": 99999, "offset": 0},
+        {"table_id": table_id, "offset": 120},
+    ]
+    body = "\n".join(
+        json.dumps(
+            {
+                "customer_name": "Bulk User",
+                "table_id": item["table_id"],
+                "reservation_time": (
+                    start_time + timedelta(minutes=item["offset"])
+                ).isoformat(),
+                "duration_minutes": 60,
+            }
+        )
+        for item in items
+    )
+    response = await client.post(
+        "/api/v1/reservations/bulk",
+        content=body + "\n",
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert [item["status"] for item in result["items"]] == [
+        "conflict",
+        "created",
+        "conflict",
+        "not_found",
+        "created",
+    ]
+    assert result["created"] == 2
+    assert result["failed"] == 3
+
+
+@pytest.mark.asyncio
+async def test_create_reservation_idempotent(client, session):
+    table = Table(name="Test Table", seats=4, location="Main Hall")
+    session.add(table)
+    await session.commit()
+    await session.refresh(table)
+    table_id = table.id
+
+    payload = {
+        "customer_name": "Test User",
+        "table_id": table_id,
+        "reservation_time": "2030-05-01T19:30:00Z",
+        "duration_minutes": 60,
+    }
+    headers = {"Idempotency-Key": "booking-1"}
+
+    response = await client.post("/api/v1/reservations/", json=payload, headers=headers)
+    assert response.status_code == 200
+
+    # повтор возвращает тот же ответ, а не ошибку пересечения
+    replay = await client.post("/api/v1/reservations/", json=payload, headers=headers)
+    assert replay.status_code == 200
+    assert replay.json() == response.json()
+    assert replay.headers["Idempotent-Replayed"] == "true"
+
+    result = await session.execute(
+        select(Reservation).where(Reservation.table_id == table_id)
+    )
+    assert len(result.scalars().all()) == 1
+
+    payload["duration_minutes"] = 90
+    response = await client.post("/api/v1/reservations/", json=payload, headers=headers)
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_reuse_expired_idempotency_key(client, session):
+    table = Table(name="Test Table", seats=4, location="Main Hall")
+    session.add(table)
+    # устаревший ключ ещё не удалён очисткой
+    session.add(
+        IdempotencyKey(
+            key="booking-expired",
+            request_hash="other",
+            status_code=200,
+            response={},
+            expires_at=datetime.now(timezone.utc) - timedelta(minutes=1),
+        )
+    )
+    await session.commit()
+    await session.refresh(table)
+
+    payload = {
+        "customer_name": "Test User",
+        "table_id": table.id,
+        "reservation_time": "2030-05-02T19:30:00Z",
+        "duration_minutes": 60,
+    }
+    headers = {"Idempotency-Key": "booking-expired"}
+
+    response = await client.post("/api/v1/reservations/", json=payload, headers=headers)
+    assert response.status_code == 200
+    replay = await client.post("/api/v1/reservations/", json=payload, headers=headers)
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.json() == response.json()
+
+
+@pytest.mark.asyncio
+async def test_delete_expired_idempotency_keys(session):
+    expired = datetime.now(timezone.utc) - timedelta(minutes=1)
+    for number in range(5):
+        session.add(
+            IdempotencyKey(
+                key=f"expired-{number}",
+                request_hash="hash",
+                status_code=200,
+                response={},
+                expires_at=expired,
+            )
+        )
+    session.add(
+        IdempotencyKey(
+            key="active",
+            request_hash="hash",
+            status_code=200,
+            response={},
+            expires_at=expired + timedelta(days=1),
+        )
+    )
+    await session.commit()
+
+    repository = IdempotencyRepository(session)
+    assert await repository.delete_expired(batch_size=2) == 5
+    assert await repository.get("active") is not None
+    assert await repository.get("expired-0") is None
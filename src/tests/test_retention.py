@@ -0,0 +1,157 @@
+import gzip
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import orjson
+import pytest
+from sqlalchemy import select
+
+from models.models import Reservation, ReservationArchive, Table
+from repositories.reservation_repository import ReservationRepository
+from services.retention import ReservationArchiver
+from settings import RetentionSettings
+
+OLD = datetime(2001, 1, 10, 19, tzinfo=timezone.utc)
+FUTURE = datetime(2030, 1, 10, 19, tzinfo=timezone.utc)
+
+CONFIG = RetentionSettings(horizon_days=365, batch_size=1, batch_pause=0)
+
+
+def archiver_for(session) -> ReservationArchiver:
+    @asynccontextmanager
+    async def session_factory():
+        yield session
+
+    return ReservationArchiver(CONFIG, session_factory)
+
+
+async def create_reservations(session) -> int:
+    table = Table(name="Test Table", seats=4, location="Main Hall")
+    session.add(table)
+    await session.commit()
+    await session.refresh(table)
+    table_id = table.id
+
+    session.add_all(
+        Reservation(
+            customer_name="Test User",
+            table_id=table_id,
+            reservation_time=start,
+            duration_minutes=60,
+        )
+        for start in (
+            OLD,
+            OLD + timedelta(days=1),
+            datetime.now(timezone.utc) - timedelta(days=1),
+            FUTURE,
+        )
+    )
+    await session.commit()
+    return table_id
+
+
+async def times(session, model, table_id: int):
+    result = await session.execute(
+        select(model.reservation_time)
+        .where(model.table_id == table_id)
+        .order_by(model.reservation_time)
+    )
+    return result.scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_archive_to_table(client, session):
+    table_id = await create_reservations(session)
+
+    assert await archiver_for(session).run() == 2
+
+    assert await times(session, ReservationArchive, table_id) == [
+        OLD,
+        OLD + timedelta(days=1),
+    ]
+    assert len(await times(session, Reservation, table_id)) == 2
+
+    # запросы за интервалы до границы архивации читают и архив
+    response = await client.get("/api/v1/reservations/", params={"table_id": table_id})
+    assert len(response.json()["items"]) == 4
+    repository = ReservationRepository(session, retention=CONFIG)
+    page = await repository.get_page(10, table_id=table_id, time_from=FUTURE)
+    assert [row["reservation_time"] for row in page] == [FUTURE]
+    occupancy = await repository.get_occupancy_by_table(
+        OLD - timedelta(days=1), OLD + timedelta(days=2), table_id
+    )
+    assert occupancy == [
+        {"table_id": table_id, "reservations": 2, "booked_minutes": 120}
+    ]
+
+    repository.retention = CONFIG.copy(update={"archive_reads": False})
+    assert len(await repository.get_page(10, table_id=table_id)) == 2
+
+    # бронирование по идентификатору читается и из архива
+    archived_id = await session.scalar(
+        select(ReservationArchive.id).where(ReservationArchive.table_id == table_id)
+    )
+    response = await client.get(f"/api/v1/reservations/{archived_id}")
+    assert response.status_code == 200
+    assert response.json()["id"] == archived_id
+
+
+@pytest.mark.asyncio
+async def test_archive_continues_after_short_batch(monkeypatch):
+    # неполная пачка (строки, заблокированные транзакциями приложения,
+    # пропущены) не завершает архивацию, её завершает пустая пачка
+    batches = [[(OLD, 1)], [(OLD, 2)], []]
+    calls = []
+
+    async def archive_batch(session, cutoff, after=None, output=None):
+        calls.append(after)
+        return batches[len(calls) - 1]
+
+    archiver = archiver_for(None)
+    archiver.config = CONFIG.copy(update={"batch_size": 2})
+    monkeypatch.setattr(archiver, "archive_batch", archive_batch)
+    assert await archiver.run() == 2
+    assert calls == [None, (OLD, 1), (OLD, 2)]
+
+
+@pytest.mark.asyncio
+async def test_archive_with_shorter_horizon(session):
+    table_id = await create_reservations(session)
+    recent = datetime.now(timezone.utc) - timedelta(days=10)
+    session.add(
+        Reservation(
+            customer_name="Test User",
+            table_id=table_id,
+            reservation_time=recent,
+            duration_minutes=60,
+        )
+    )
+    await session.commit()
+
+    archiver = archiver_for(session)
+    archiver.config = CONFIG.copy(update={"horizon_days": 5})
+    assert await archiver.run() == 3
+
+    # чтение определяется фактической границей архива, а не горизонтом настроек
+    repository = ReservationRepository(session, retention=CONFIG)
+    page = await repository.get_page(
+        10, table_id=table_id, time_from=recent - timedelta(days=1)
+    )
+    assert len(page) == 3
+    assert page[0]["reservation_time"] == recent
+
+
+@pytest.mark.asyncio
+async def test_archive_to_file(session, tmp_path):
+    table_id = await create_reservations(session)
+    path = tmp_path / "reservation.ndjson.gz"
+
+    with gzip.open(path, "wb") as output:
+        assert await archiver_for(session).run(output) == 2
+
+    with gzip.open(path, "rb") as archived:
+        rows = [orjson.loads(line) for line in archived]
+    assert [row["table_id"] for row in rows] == [table_id, table_id]
+    assert rows[0]["reservation_time"] == "2001-01-10T19:00:00+00:00"
+    assert await times(session, ReservationArchive, table_id) == []
+    assert len(await times(session, Reservation, table_id)) == 2
@@ -1,8 +1,8 @@
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 import pytest
 
-from models.models import Table
+from models.models import Reservation, Table
 
 
 @pytest.mark.asyncio
@@ -23,10 +23,41 @@ async def test_get_tables(client, session):
 
     response = await client.get("/api/v1/tables/")
     assert response.status_code == 200
-    tables = response.json()
+    tables = response.json()["items"]
     assert len(tables) > 0
 
 
+@pytest.mark.asyncio
+async def test_get_tables_paginated(client, session):
+    for number in range(3):
+        session.add(Table(name=f"Test Table {number}", seats=4, location="Main Hall"))
+    await session.commit()
+
+    response = await client.get("/api/v1/tables/", params={"size": 2})
+    assert response.status_code == 200
+    first_page = response.json()
+    assert len(first_page["items"]) == 2
+
+    response = await client.get(
+        "/api/v1/tables/", params={"size": 2, "cursor": first_page["next_page"]}
+    )
+    assert response.status_code == 200
+    second_page = response.json()
+    assert second_page["items"][0]["id"] > first_page["items"][-1]["id"]
+
+
+@pytest.mark.asyncio
+async def test_stream_tables(client, session):
+    table = Table(name="Test Table", seats=4, location="Main Hall")
+    session.add(table)
+    await session.commit()
+
+    response = await client.get("/api/v1/tables/stream")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert "Test Table" in response.text
+
+
 @pytest.mark.asyncio
 async def test_delete_table(client, session):
     table = Table(name="Test Table", seats=4, location="Main Hall")
@@ -38,8 +69,150 @@ async def test_delete_table(client, session):
     assert response.status_code == 204
 
 
+@pytest.mark.asyncio
+async def test_delete_table_with_reservations(client, session):
+    past_table = Table(name="Past Table", seats=4, location="Main Hall")
+    future_table = Table(name="Future Table", seats=4, location="Main Hall")
+    session.add_all([past_table, future_table])
+    await session.commit()
+    await session.refresh(past_table)
+    await session.refresh(future_table)
+    past_table_id, future_table_id = past_table.id, future_table.id
+
+    now = datetime.now(timezone.utc)
+    session.add_all(
+        [
+            Reservation(
+                customer_name="Past User",
+                table_id=past_table_id,
+                reservation_time=now - timedelta(days=1),
+                duration_minutes=60,
+            ),
+            Reservation(
+                customer_name="Future User",
+                table_id=future_table_id,
+                reservation_time=now + timedelta(days=1),
+                duration_minutes=60,
+            ),
+        ]
+    )
+    await session.commit()
+
+    # прошедшие бронирования не мешают удалению столика
+    response = await client.delete(f"/api/v1/tables/{past_table_id}")
+    assert response.status_code == 204
+
+    response = await client.delete(f"/api/v1/tables/{future_table_id}")
+    assert response.status_code == 409
+
+
 @pytest.mark.asyncio
 @pytest.mark.skip
 async def test_delete_nonexistent_table(client):
     response = await client.delete("/api/v1/tables/99999")
     assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_get_availability(client, session):
+    table = Table(name="Test Table", seats=4, location="Availability Hall")
+    session.add(table)
+    await session.commit()
+    await session.refresh(table)
+    table_id = table.id
+
+    start_time = datetime(2030, 1, 1, 12, tzinfo=timezone.utc)
+    session.add(
+        Reservation(
+            customer_name="Test User",
+            table_id=table_id,
+            reservation_time=start_time + timedelta(hours=1),
+            duration_minutes=60,
+        )
+    )
+    await session.commit()
+
+    params = {
+        "from": start_time.isoformat(),
+        "to": (start_time + timedelta(hours=4)).isoformat(),
+        "seats": 2,
+        "location": "Availability Hall",
+    }
+    response = await client.get("/api/v1/tables/availability", params=params)
+    assert response.status_code == 200
+    availability = response.json()
+    assert [item["id"] for item in availability] == [table_id]
+    assert availability[0]["free"] == [
+        {"start": "2030-01-01T12:00:00+00:00", "end": "2030-01-01T13:00:00+00:00"},
+        {"start": "2030-01-01T14:00:00+00:00", "end": "2030-01-01T16:00:00+00:00"},
+    ]
+
+    response = await client.post(
+        "/api/v1/reservations/",
+        json={
+            "customer_name": "Test User 2",
+            "table_id": table_id,
+            "reservation_time": start_time.isoformat(),
+            "duration_minutes": 60,
+        },
+    )
+    assert response.status_code == 200
+
+    response = await client.get("/api/v1/tables/availability", params=params)
+    assert response.json()[0]["free"] == [
+        {"start": "2030-01-01T14:00:00+00:00", "end": "2030-01-01T16:00:00+00:00"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_availability_invalid_window(client):
+    response = await client.get(
+        "/api/v1/tables/availability",
+        params={"from": "2030-01-02T00:00:00+00:00", "to": "2030-01-01T00:00:00+00:00"},
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_create_tables_bulk(client, session):
+    response = await client.post(
+        "/api/v1/tables/bulk",
+        json=[
+            {"name": "Bulk Table 1", "seats": 2, "location": "Main Hall"},
+            {"name": "Bulk Table 2", "seats": 0, "location": "Main Hall"},
+            {"name": "Bulk Table 3", "seats": 6, "location": "Terrace"},
+        ],
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["created"] == 2
+    assert result["failed"] == 1
+    assert [item["status"] for item in result["items"]] == [
+        "created",
+        "validation_error",
+        "created",
+    ]
+    assert result["items"][0]["id"] < result["items"][2]["id"]
+
+
+@pytest.mark.asyncio
+async def test_get_tables_cached_until_create(client, session):
+    response = await client.get("/api/v1/tables/", params={"size": 500})
+    assert response.status_code == 200
+    total = len(response.json()["items"])
+
+    response = await client.get("/api/v1/tables/cache-stats")
+    hits = response.json()["hits"]
+    response = await client.get("/api/v1/tables/", params={"size": 500})
+    assert len(response.json()["items"]) == total
+    response = await client.get("/api/v1/tables/cache-stats")
+    assert response.json()["hits"] == hits + 1
+
+    response = await client.post(
+        "/api/v1/tables/",
+        json={"name": "New Table", "seats": 4, "location": "Main Hall"},
+    )
+    assert response.status_code == 200
+
+    response = await client.get("/api/v1/tables/", params={"size": 500})
+    assert len(response.json()["items"]) == total + 1
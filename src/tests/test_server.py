@@ -0,0 +1,33 @@
+import socket
+
+import pytest
+from httpx import AsyncClient
+
+from benchmarks.workers import start_server, stop_server, wait_ready
+from server import default_workers
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_default_workers():
+    assert default_workers() >= 1
+
+
+@pytest.mark.asyncio
+async def test_workers_stop_gracefully():
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/api/v1/tables/?size=1"
+    process = start_server(2, port)
+    try:
+        await wait_ready(process, url)
+        async with AsyncClient() as client:
+            response = await client.get(url)
+    finally:
+        exit_code = stop_server(process, timeout=30)
+
+    assert response.status_code == 200
+    assert exit_code == 0
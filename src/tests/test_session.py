@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.pool import NullPool
+
+from integrations.db.session import create_engine, warm_up_engine
+from settings import DatabaseSettings, settings
+
+
+@pytest.mark.asyncio
+async def test_create_engine_pool_settings():
+    engine = create_engine(
+        settings.database_url, DatabaseSettings(pool_size=3, max_overflow=1)
+    )
+
+    assert engine.pool.size() == 3
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_create_engine_statement_timeout():
+    engine = create_engine(
+        settings.database_url, DatabaseSettings(statement_timeout=1500)
+    )
+
+    async with engine.connect() as connection:
+        result = await connection.execute(text("SHOW statement_timeout"))
+        assert result.scalar() == "1500ms"
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_create_engine_pgbouncer():
+    engine = create_engine(settings.database_url, DatabaseSettings(pgbouncer=True))
+
+    assert isinstance(engine.pool, NullPool)
+    async with engine.connect() as connection:
+        result = await connection.execute(text("SELECT 1"))
+        assert result.scalar() == 1
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_engine():
+    engine = create_engine(settings.database_url, DatabaseSettings(pool_size=2))
+
+    await warm_up_engine(engine, 2)
+
+    assert engine.pool.checkedin() == 2
+    await engine.dispose()
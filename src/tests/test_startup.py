@@ -0,0 +1,37 @@
+from benchmarks.startup import first_request, parse_importtime, profile_imports
+
+#: бюджет времени импорта приложения (собственное время всех модулей) в секундах
+IMPORT_BUDGET = 2.0
+#: бюджет времени от запуска процесса до ответа на первый запрос в секундах
+FIRST_REQUEST_BUDGET = 5.0
+
+
+def test_parse_importtime():
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |     settings\n"
+        "import time:      2000 |       2120 |   main\n"
+    )
+
+    records = parse_importtime(output)
+
+    assert [record.module for record in records] == ["settings", "main"]
+    assert records[1].self_time == 0.002
+    assert records[1].cumulative == 0.00212
+
+
+def test_import_budget():
+    records = profile_imports("main")
+    modules = {record.module for record in records}
+
+    # драйвер БД загружается при создании движка, клиент брокера — при отправке
+    assert "asyncpg" not in modules
+    assert "pika" not in modules
+    assert sum(record.self_time for record in records) < IMPORT_BUDGET
+
+
+def test_time_to_first_request_budget():
+    result = first_request("/api/v1/tables/?size=1")
+
+    assert result["status"] == 200
+    assert result["total"] < FIRST_REQUEST_BUDGET
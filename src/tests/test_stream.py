@@ -0,0 +1,208 @@
+import asyncio
+import json
+import multiprocessing
+
+import pytest
+
+from integrations.events.broadcaster import RESYNC, Broadcaster, Message, broadcaster
+from integrations.events.stream import (
+    PENDING_KEY,
+    StreamListener,
+    add_stream_events,
+    origin,
+)
+from settings import settings
+from transport.handlers.stream import SSE_PING, sse_events, stream_availability
+
+
+@pytest.fixture
+def stream_enabled(monkeypatch):
+    monkeypatch.setattr(settings.stream, "enabled", True)
+
+
+def reservation_message(table_id: int, location: str = "Main Hall") -> Message:
+    return Message(
+        "reservation.created", {"id": 1, "table_id": table_id, "location": location}
+    )
+
+
+@pytest.mark.asyncio
+async def test_broadcaster_filters():
+    target = Broadcaster(queue_size=10, max_subscribers=10)
+    everything = target.subscribe()
+    by_table = target.subscribe(table_id=1)
+    by_location = target.subscribe(location="Terrace")
+    both = target.subscribe(table_id=2, location="Main Hall")
+
+    target.publish(reservation_message(1))
+    target.publish(reservation_message(2, "Terrace"))
+    target.publish(Message("table.created", {"id": 3, "location": "Terrace"}))
+
+    assert [m.table_id for m in everything.queue] == [1, 2, 3]
+    assert [m.table_id for m in by_table.queue] == [1]
+    assert [m.table_id for m in by_location.queue] == [2, 3]
+    assert len(both.queue) == 0
+
+    target.publish(Message(RESYNC, {}))
+    assert all(
+        s.queue[-1].type == RESYNC for s in (everything, by_table, by_location, both)
+    )
+
+
+@pytest.mark.asyncio
+async def test_subscription_drops_oldest():
+    target = Broadcaster(queue_size=2, max_subscribers=10)
+    subscription = target.subscribe()
+    for table_id in range(1, 5):
+        target.publish(reservation_message(table_id))
+
+    message = await subscription.get()
+    assert message.type == RESYNC
+    assert json.loads(message.text)["data"] == {"dropped": 2}
+    assert [(await subscription.get()).table_id for _ in range(2)] == [3, 4]
+    assert await subscription.get(timeout=0.01) is None
+
+
+@pytest.mark.asyncio
+async def test_unsubscribe():
+    target = Broadcaster(queue_size=2, max_subscribers=2)
+    first = target.subscribe(table_id=1)
+    target.subscribe(location="Terrace")
+    assert target.is_full
+
+    target.unsubscribe(first)
+    target.unsubscribe(first)
+    assert len(target) == 1
+    assert 1 not in target._by_table
+
+
+@pytest.mark.asyncio
+async def test_changes_published_after_commit(client, session, stream_enabled):
+    main_hall = broadcaster.subscribe(location="Main Hall")
+    terrace = broadcaster.subscribe(location="Terrace")
+    try:
+        response = await client.post(
+            "/api/v1/tables/",
+            json={"name": "Test Table", "seats": 4, "location": "Main Hall"},
+        )
+        table_id = response.json()["id"]
+        response = await client.post(
+            "/api/v1/reservations/",
+            json={
+                "customer_name": "Test User",
+                "table_id": table_id,
+                "reservation_time": "2030-01-01T12:00:00Z",
+                "duration_minutes": 60,
+            },
+        )
+        reservation_id = response.json()["id"]
+        response = await client.delete(f"/api/v1/reservations/{reservation_id}")
+        assert response.status_code == 204
+
+        messages = [json.loads(m.text) for m in main_hall.queue]
+        assert [m["type"] for m in messages] == [
+            "table.created",
+            "reservation.created",
+            "reservation.deleted",
+        ]
+        assert messages[1]["data"]["location"] == "Main Hall"
+        assert messages[2]["data"]["id"] == reservation_id
+        assert len(terrace.queue) == 0
+    finally:
+        broadcaster.unsubscribe(main_hall)
+        broadcaster.unsubscribe(terrace)
+
+
+@pytest.mark.asyncio
+async def test_stream_disabled(client, session):
+    response = await client.get("/api/v1/stream/availability")
+    assert response.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_sse_events(monkeypatch, stream_enabled):
+    monkeypatch.setattr(settings.stream, "keepalive", 0.01)
+    events = sse_events(1, None)
+
+    assert await events.__anext__() == SSE_PING
+    assert len(broadcaster._by_table[1]) == 1
+    broadcaster.publish(reservation_message(1))
+    chunk = await events.__anext__()
+    assert chunk.startswith(b"event: reservation.created\ndata: {")
+
+    await events.aclose()
+    assert 1 not in broadcaster._by_table
+
+
+@pytest.mark.asyncio
+async def test_sse_response_not_started(stream_enabled):
+    # ответ, передача которого не началась (клиент отключился раньше),
+    # не оставляет подписку
+    subscribers = len(broadcaster)
+    response = await stream_availability(table_id=1, location=None)
+    assert len(broadcaster) == subscribers
+
+    await response.body_iterator.aclose()  # type: ignore
+    assert len(broadcaster) == subscribers
+
+
+@pytest.mark.asyncio
+async def test_listener_receives_other_processes():
+    target = Broadcaster(queue_size=10, max_subscribers=10)
+    subscription = target.subscribe()
+    listener = StreamListener(settings.database_url, "test_stream", target)
+    await listener.connect()
+    try:
+        for table_id in (1, 2):
+            payload = {
+                "origin": "other",
+                "type": "reservation.created",
+                "data": {"table_id": table_id},
+            }
+            await listener.connection.execute(
+                "SELECT pg_notify('test_stream', $1)", json.dumps(payload)
+            )
+        # свои уведомления процесс не рассылает повторно
+        await listener.connection.execute(
+            "SELECT pg_notify('test_stream', $1)",
+            json.dumps({"origin": origin(), "type": "table.created", "data": {}}),
+        )
+        message = await asyncio.wait_for(subscription.get(), 1)
+        assert message.table_id == 1
+        await asyncio.sleep(0.05)
+        assert [m.table_id for m in subscription.queue] == [2]
+    finally:
+        await listener.close()
+
+
+def test_origin_per_forked_process():
+    # рабочие процессы python -m server создаются fork после импорта
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(target=lambda: queue.put(origin()))
+    process.start()
+    child = queue.get(timeout=5)
+    process.join(timeout=5)
+
+    assert child != origin()
+    target = Broadcaster(queue_size=10, max_subscribers=10)
+    subscription = target.subscribe()
+    payload = {"origin": child, "type": "table.created", "data": {}}
+    StreamListener(settings.database_url, "test_stream", target).receive(
+        None, 0, "test_stream", json.dumps(payload)
+    )
+    assert len(subscription.queue) == 1
+
+
+@pytest.mark.asyncio
+async def test_changes_discarded_on_rollback(session, stream_enabled):
+    subscription = broadcaster.subscribe()
+    try:
+        add_stream_events(session.sync_session, "table.created", [{"id": 1}])
+        await session.rollback()
+        await session.commit()
+
+        assert len(subscription.queue) == 0
+        assert PENDING_KEY not in session.info
+    finally:
+        broadcaster.unsubscribe(subscription)
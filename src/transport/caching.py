@@ -0,0 +1,117 @@
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+from starlette.responses import Response
+
+from integrations.db.session import get_read_session
+from services.collection_versions import Version, collection_versions
+
+
+def cache_headers(name: str, version: Optional[Version]) -> Dict[str, str]:
+    """
+    Заголовки ETag и Last-Modified ответа по версии коллекции.
+
+    :param name: коллекция
+    :param version: версия коллекции (None — версии отключены)
+    :return:
+    """
+
+    if version is None:
+        return {}
+
+    headers = {
+        "ETag": f'W/"{name}-{version.number}"',
+        # ответ можно сохранить, но перед использованием нужно проверить
+        "Cache-Control": "no-cache",
+    }
+    if version.updated_at is not None:
+        headers["Last-Modified"] = format_datetime(
+            version.updated_at.astimezone(timezone.utc), usegmt=True
+        )
+    return headers
+
+
+def collection_headers(name: str) -> Callable[..., Awaitable[Dict[str, str]]]:
+    """
+    Зависимость обработчика: заголовки ETag и Last-Modified по текущей
+    версии коллекции.
+
+    Версия читается сессией чтения запроса (той же, что и данные) до вызова
+    обработчика, то есть до чтения данных.
+
+    :param name: коллекция
+    :return:
+    """
+
+    async def dependency(
+        session: AsyncSession = Depends(get_read_session),
+    ) -> Dict[str, str]:
+        return cache_headers(name, await collection_versions.get(session, name))
+
+    return dependency
+
+
+def is_not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    """
+    Проверка условий запроса If-None-Match и If-Modified-Since (RFC 9110):
+    If-Modified-Since учитывается, только если нет If-None-Match.
+
+    :param request: запрос
+    :param headers: заголовки ответа, полученные из :func:`cache_headers`
+    :return: True, если можно ответить 304
+    """
+
+    if not headers:
+        return False
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        etag = headers["ETag"].removeprefix("W/")
+        return any(
+            tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+        )
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or "Last-Modified" not in headers:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return parsedate_to_datetime(headers["Last-Modified"]) <= since
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    """
+    Ответ 304 без тела.
+
+    :param headers: заголовки ответа, полученные из :func:`cache_headers`
+    :return:
+    """
+
+    return Response(status_code=304, headers=headers)
+
+
+def with_headers(result: Any, response: Response, headers: Dict[str, str]) -> Any:
+    """
+    Добавление заголовков к результату обработчика: к готовому ответу
+    (см. :func:`transport.responses.fast_response`) или к ответу,
+    который FastAPI создаст из данных.
+
+    :param result: результат обработчика
+    :param response: ответ, переданный FastAPI в обработчик
+    :param headers: заголовки
+    :return: результат обработчика
+    """
+
+    target = result if isinstance(result, Response) else response
+    target.headers.update(headers)
+    return result
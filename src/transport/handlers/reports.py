@@ -0,0 +1,34 @@
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from integrations.db.session import get_read_session
+from integrations.profiling import ProfiledRoute
+from repositories.daily_occupancy_repository import DailyOccupancyRepository
+from schemas.schemas import DailyOccupancyRead
+from services.daily_occupancy import DailyOccupancyService
+
+tag_reports = {
+    "name": "Reports",
+    "description": "Отчёты по сводным таблицам",
+}
+
+router = APIRouter(route_class=ProfiledRoute)
+
+
+def get_daily_occupancy_service(
+    session: AsyncSession = Depends(get_read_session),
+) -> DailyOccupancyService:
+    return DailyOccupancyService(DailyOccupancyRepository(session))
+
+
+@router.get("/occupancy", response_model=list[DailyOccupancyRead])
+async def get_daily_occupancy(
+    day_from: date = Query(..., alias="from"),
+    day_to: date = Query(..., alias="to"),
+    location: Optional[str] = None,
+    service: DailyOccupancyService = Depends(get_daily_occupancy_service),
+) -> List[Dict[str, Any]]:
+    return await service.get(day_from, day_to, location)
@@ -1,44 +1,199 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import JSONResponse, Response, StreamingResponse
 
-from integrations.db.session import get_session
+from exceptions import ConflictException, ObjectNotFoundException
+from integrations.db.session import get_read_session, get_session
+from integrations.profiling import ProfiledRoute
 from models import Reservation
+from repositories.idempotency_repository import IdempotencyRepository
 from repositories.reservation_repository import ReservationRepository
 from repositories.table_repository import TableRepository
-from schemas.schemas import ReservationCreate, ReservationRead
+from schemas.pagination import CursorPage, CursorParams, decode_cursor, encode_cursor
+from schemas.schemas import BulkResult, Occupancy, ReservationCreate, ReservationRead
+from services.booking import booking_coordinator
+from services.bulk_import import bulk_import
+from services.collection_versions import RESERVATIONS
+from services.idempotency import IdempotencyService, request_fingerprint
+from services.occupancy import OccupancyGroup, OccupancyService
+from settings import settings
+from transport.caching import (
+    collection_headers,
+    is_not_modified,
+    not_modified,
+    with_headers,
+)
+from transport.responses import fast_response
+from transport.streaming import STREAM_CHUNK_SIZE, ndjson_response, read_items
 
 tag_reservations = {
     "name": "Reservations",
     "description": "Управление бронями столиков",
 }
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 def get_reservation_repository(session: AsyncSession = Depends(get_session)):
     return ReservationRepository(session)
 
 
+def get_reservation_read_repository(
+    session: AsyncSession = Depends(get_read_session),
+) -> ReservationRepository:
+    return ReservationRepository(session)
+
+
 def get_table_repository(session: AsyncSession = Depends(get_session)):
     return TableRepository(session)
 
 
-@router.get("/", response_model=list[ReservationRead])
+def get_idempotency_service(
+    session: AsyncSession = Depends(get_session),
+) -> IdempotencyService:
+    return IdempotencyService(IdempotencyRepository(session))
+
+
+@router.get("/", response_model=CursorPage[ReservationRead])
 async def get_reservations(
-    repository: ReservationRepository = Depends(get_reservation_repository),
+    request: Request,
+    response: Response,
+    table_id: Optional[int] = None,
+    time_from: Optional[datetime] = Query(None, alias="from"),
+    time_to: Optional[datetime] = Query(None, alias="to"),
+    params: CursorParams = Depends(),
+    headers: Dict[str, str] = Depends(collection_headers(RESERVATIONS)),
+    repository: ReservationRepository = Depends(get_reservation_read_repository),
 ):
-    return await repository.get_all()
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+
+    after = None
+    if params.cursor:
+        reservation_time, reservation_id = decode_cursor(
+            params.cursor, datetime.fromisoformat, int
+        )
+        after = (reservation_time, reservation_id)
+
+    items = await repository.get_page(
+        params.size + 1,
+        after=after,
+        table_id=table_id,
+        time_from=time_from,
+        time_to=time_to,
+    )
+    next_page = None
+    if len(items) > params.size:
+        items = items[: params.size]
+        next_page = encode_cursor(items[-1]["reservation_time"], items[-1]["id"])
+
+    return with_headers(
+        fast_response({"items": items, "next_page": next_page}), response, headers
+    )
+
+
+def get_occupancy_service(
+    session: AsyncSession = Depends(get_read_session),
+) -> OccupancyService:
+    return OccupancyService(ReservationRepository(session))
+
+
+@router.get("/occupancy", response_model=list[Occupancy])
+async def get_occupancy(
+    time_from: datetime = Query(..., alias="from"),
+    time_to: datetime = Query(..., alias="to"),
+    group_by: OccupancyGroup = OccupancyGroup.TABLE,
+    table_id: Optional[int] = None,
+    service: OccupancyService = Depends(get_occupancy_service),
+) -> List[Dict[str, Any]]:
+    return await service.get(time_from, time_to, group_by, table_id)
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_reservations(
+    table_id: Optional[int] = None,
+    time_from: Optional[datetime] = Query(None, alias="from"),
+    time_to: Optional[datetime] = Query(None, alias="to"),
+    repository: ReservationRepository = Depends(get_reservation_read_repository),
+) -> StreamingResponse:
+    chunks = repository.stream(
+        STREAM_CHUNK_SIZE, table_id=table_id, time_from=time_from, time_to=time_to
+    )
+    return ndjson_response(chunks, ReservationRead)
 
 
 @router.post("/", response_model=ReservationRead)
 async def create_reservation(
+    request: Request,
     reservation: ReservationCreate,
+    idempotency_key: Optional[str] = Header(None, min_length=1, max_length=255),
     repository: ReservationRepository = Depends(get_reservation_repository),
+    idempotency: IdempotencyService = Depends(get_idempotency_service),
 ):
-    try:
-        return await repository.create(Reservation(**reservation.dict()))
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    if idempotency_key is None:
+        if settings.booking.queue:
+            return await booking_coordinator.submit(reservation)
+        try:
+            return await repository.create(Reservation(**reservation.dict()))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    request_hash = request_fingerprint(request.url.path, reservation)
+    stored = await idempotency.lookup(idempotency_key, request_hash)
+    if stored is None:
+
+        async def remember(created: Reservation) -> None:
+            response = ReservationRead.parse_obj(
+                {field: getattr(created, field) for field in ReservationRead.__fields__}
+            )
+            await idempotency.remember(idempotency_key, request_hash, 200, response)
+
+        try:
+            return await repository.create(
+                Reservation(**reservation.dict()), before_commit=remember
+            )
+        except ConflictException:
+            # параллельный повтор того же запроса уже создал бронирование
+            stored = await idempotency.lookup(idempotency_key, request_hash)
+            if stored is None:
+                raise
+
+    return idempotency.replay(stored)
+
+
+@router.post("/bulk", response_model=BulkResult)
+async def create_reservations_bulk(
+    request: Request,
+    repository: ReservationRepository = Depends(get_reservation_repository),
+) -> JSONResponse:
+    result = await bulk_import(
+        read_items(request),
+        ReservationCreate,
+        repository.bulk_create,
+        settings.bulk_batch_size,
+    )
+    # ответ уже в формате BulkResult, повторная валидация не нужна
+    return JSONResponse(content=result)
+
+
+@router.get("/{reservation_id}", response_model=ReservationRead)
+async def get_reservation(
+    reservation_id: int,
+    request: Request,
+    response: Response,
+    headers: Dict[str, str] = Depends(collection_headers(RESERVATIONS)),
+    repository: ReservationRepository = Depends(get_reservation_read_repository),
+) -> Any:
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+
+    reservation = await repository.get_by_id(reservation_id)
+    if reservation is None:
+        raise ObjectNotFoundException(detail="Бронирование не найдено")
+    return with_headers(reservation, response, headers)
 
 
 @router.delete("/{reservation_id}", status_code=204)
@@ -0,0 +1,108 @@
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+from starlette.responses import StreamingResponse
+
+from exceptions import ServiceUnavailableException
+from integrations.events.broadcaster import Subscription, broadcaster
+from settings import settings
+
+tag_stream = {
+    "name": "Stream",
+    "description": "Поток изменений бронирований (SSE и WebSocket)",
+}
+
+router = APIRouter()
+
+#: тип содержимого Server-Sent Events
+SSE_MEDIA_TYPE = "text/event-stream"
+#: комментарий SSE для поддержания неактивного соединения
+SSE_PING = b": ping\n\n"
+#: сообщение WebSocket для поддержания неактивного соединения
+WS_PING = '{"type": "ping"}'
+
+
+def check_available() -> None:
+    if not settings.stream.enabled:
+        raise ServiceUnavailableException(detail="Поток изменений отключён")
+    if broadcaster.is_full:
+        raise ServiceUnavailableException(detail="Превышено количество подписчиков")
+
+
+def subscribe(table_id: Optional[int], location: Optional[str]) -> Subscription:
+    check_available()
+    return broadcaster.subscribe(table_id, location)
+
+
+async def sse_events(
+    table_id: Optional[int], location: Optional[str]
+) -> AsyncIterator[bytes]:
+    """
+    События в формате Server-Sent Events.
+
+    Подписка создаётся при первой итерации генератора и отменяется при его
+    завершении (отключении клиента), поэтому ответ, передача которого
+    не началась, не оставляет подписку.
+
+    :param table_id: только события столика
+    :param location: только события столиков в этом расположении
+    :return:
+    """
+
+    subscription = broadcaster.subscribe(table_id, location)
+    try:
+        while True:
+            message = await subscription.get(timeout=settings.stream.keepalive)
+            yield SSE_PING if message is None else message.sse
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+@router.get(
+    "/availability",
+    response_class=StreamingResponse,
+    responses={200: {"content": {SSE_MEDIA_TYPE: {}}}},
+)
+async def stream_availability(
+    table_id: Optional[int] = Query(default=None, description="Только этот столик"),
+    location: Optional[str] = Query(
+        default=None, description="Только это расположение"
+    ),
+) -> StreamingResponse:
+    """
+    Поток создания и удаления бронирований (Server-Sent Events).
+
+    Событие ``resync`` означает, что часть изменений пропущена
+    (клиент не успевал их получать) и данные нужно перечитать.
+    """
+
+    check_available()
+    return StreamingResponse(
+        sse_events(table_id, location),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/availability")
+async def stream_availability_ws(
+    websocket: WebSocket,
+    table_id: Optional[int] = Query(default=None),
+    location: Optional[str] = Query(default=None),
+) -> None:
+    try:
+        subscription = subscribe(table_id, location)
+    except ServiceUnavailableException as exc:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason=exc.detail)
+        return
+
+    try:
+        await websocket.accept()
+        while True:
+            message = await subscription.get(timeout=settings.stream.keepalive)
+            # отправка служебного сообщения обнаруживает закрытые соединения
+            await websocket.send_text(WS_PING if message is None else message.text)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        broadcaster.unsubscribe(subscription)
@@ -1,23 +1,182 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import JSONResponse, Response, StreamingResponse
 
-from integrations.db.session import get_session
+from exceptions import ObjectNotFoundException
+from integrations.db.session import get_read_session, get_session
+from integrations.profiling import ProfiledRoute
 from models import Table
+from repositories.reservation_repository import ReservationRepository
 from repositories.table_repository import TableRepository
-from schemas.schemas import TableCreate, TableRead
+from schemas.pagination import CursorPage, CursorParams, decode_cursor, encode_cursor
+from schemas.schemas import (
+    BulkResult,
+    ReservationRead,
+    TableAvailability,
+    TableCreate,
+    TableRead,
+)
+from services.availability import AvailabilityService
+from services.bulk_import import bulk_import
+from services.collection_versions import RESERVATIONS, TABLES
+from services.table_cache import table_cache
+from settings import settings
+from transport.caching import (
+    collection_headers,
+    is_not_modified,
+    not_modified,
+    with_headers,
+)
+from transport.responses import fast_response
+from transport.streaming import STREAM_CHUNK_SIZE, ndjson_response, read_items
 
 tag_tables = {"name": "Tables", "description": "Управление столиками в ресторане"}
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 def get_table_repository(session: AsyncSession = Depends(get_session)):
     return TableRepository(session)
 
 
-@router.get("/", response_model=list[TableRead])
-async def get_tables(repository: TableRepository = Depends(get_table_repository)):
-    return await repository.get_all()
+def get_table_read_repository(
+    session: AsyncSession = Depends(get_read_session),
+) -> TableRepository:
+    return TableRepository(session)
+
+
+@router.get("/", response_model=CursorPage[TableRead])
+async def get_tables(
+    request: Request,
+    response: Response,
+    params: CursorParams = Depends(),
+    headers: Dict[str, str] = Depends(collection_headers(TABLES)),
+    repository: TableRepository = Depends(get_table_read_repository),
+) -> Any:
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+
+    after = None
+    if params.cursor:
+        (after,) = decode_cursor(params.cursor, int)
+
+    items = await repository.get_page(params.size + 1, after=after)
+    next_page = None
+    if len(items) > params.size:
+        items = items[: params.size]
+        next_page = encode_cursor(items[-1]["id"])
+
+    return with_headers(
+        fast_response({"items": items, "next_page": next_page}), response, headers
+    )
+
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_tables(
+    repository: TableRepository = Depends(get_table_read_repository),
+) -> StreamingResponse:
+    return ndjson_response(repository.stream(STREAM_CHUNK_SIZE), TableRead)
+
+
+def get_availability_service(
+    session: AsyncSession = Depends(get_read_session),
+) -> AvailabilityService:
+    return AvailabilityService(TableRepository(session), ReservationRepository(session))
+
+
+@router.get("/availability", response_model=list[TableAvailability])
+async def get_availability(
+    time_from: datetime = Query(..., alias="from"),
+    time_to: datetime = Query(..., alias="to"),
+    seats: Optional[int] = Query(None, ge=1),
+    location: Optional[str] = None,
+    service: AvailabilityService = Depends(get_availability_service),
+) -> List[Dict[str, Any]]:
+    availability = await service.search(time_from, time_to, seats, location)
+    return [
+        {
+            "id": table.id,
+            "name": table.name,
+            "seats": table.seats,
+            "location": table.location,
+            "free": [{"start": start, "end": end} for start, end in free],
+        }
+        for table, free in availability
+    ]
+
+
+@router.get("/cache-stats", response_model=dict[str, int])
+async def get_cache_stats() -> Dict[str, int]:
+    return table_cache.stats()
+
+
+def get_reservation_read_repository(
+    session: AsyncSession = Depends(get_read_session),
+) -> ReservationRepository:
+    return ReservationRepository(session)
+
+
+@router.get("/{table_id}", response_model=TableRead)
+async def get_table(
+    table_id: int,
+    request: Request,
+    response: Response,
+    headers: Dict[str, str] = Depends(collection_headers(TABLES)),
+    repository: TableRepository = Depends(get_table_read_repository),
+) -> Any:
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+
+    table = await repository.get_by_id(table_id)
+    if table is None:
+        raise ObjectNotFoundException(detail="Столик не найден")
+    return with_headers(table, response, headers)
+
+
+@router.get("/{table_id}/reservations", response_model=CursorPage[ReservationRead])
+async def get_table_reservations(
+    table_id: int,
+    request: Request,
+    response: Response,
+    time_from: Optional[datetime] = Query(None, alias="from"),
+    time_to: Optional[datetime] = Query(None, alias="to"),
+    params: CursorParams = Depends(),
+    headers: Dict[str, str] = Depends(collection_headers(RESERVATIONS)),
+    repository: ReservationRepository = Depends(get_reservation_read_repository),
+    table_repository: TableRepository = Depends(get_table_read_repository),
+) -> Any:
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+
+    after = None
+    if params.cursor:
+        reservation_time, reservation_id = decode_cursor(
+            params.cursor, datetime.fromisoformat, int
+        )
+        after = (reservation_time, reservation_id)
+
+    items = await repository.get_page(
+        params.size + 1,
+        after=after,
+        table_id=table_id,
+        time_from=time_from,
+        time_to=time_to,
+    )
+    # существование столика проверяется, только если бронирований нет
+    if not items and await table_repository.get_by_id(table_id) is None:
+        raise ObjectNotFoundException(detail="Столик не найден")
+
+    next_page = None
+    if len(items) > params.size:
+        items = items[: params.size]
+        next_page = encode_cursor(items[-1]["reservation_time"], items[-1]["id"])
+
+    return with_headers(
+        fast_response({"items": items, "next_page": next_page}), response, headers
+    )
 
 
 @router.post("/", response_model=TableRead)
@@ -27,6 +186,20 @@ async def create_table(
     return await repository.create(Table(**table.dict()))
 
 
+@router.post("/bulk", response_model=BulkResult)
+async def create_tables_bulk(
+    request: Request, repository: TableRepository = Depends(get_table_repository)
+) -> JSONResponse:
+    result = await bulk_import(
+        read_items(request),
+        TableCreate,
+        repository.bulk_create,
+        settings.bulk_batch_size,
+    )
+    # ответ уже в формате BulkResult, повторная валидация не нужна
+    return JSONResponse(content=result)
+
+
 @router.delete("/{table_id}", status_code=204)
 async def delete_table(
     table_id: int, repository: TableRepository = Depends(get_table_repository)
@@ -0,0 +1,25 @@
+from typing import Any
+
+from fastapi.responses import ORJSONResponse
+
+from integrations.profiling import measure_serialization
+from settings import settings
+
+
+def fast_response(content: Any) -> Any:
+    """
+    Ответ обработчика из уже подготовленных данных.
+
+    В режиме быстрой сериализации (``settings.fast_json``) данные сразу
+    кодируются orjson, и FastAPI не проверяет их повторно по response_model.
+    Данные должны совпадать со схемой ответа: формат ответа в обоих режимах
+    одинаковый.
+
+    :param content: данные ответа
+    :return:
+    """
+
+    if settings.fast_json:
+        with measure_serialization():
+            return ORJSONResponse(content)
+    return content
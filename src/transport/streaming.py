@@ -0,0 +1,75 @@
+import json
+from typing import Any, AsyncIterator, Dict, Sequence, Type
+
+import orjson
+from fastapi import Request
+from pydantic import BaseModel
+from starlette.responses import StreamingResponse
+
+from exceptions import ValidationErrorException
+from settings import settings
+
+#: тип содержимого для потоковой выдачи записей (JSON по строкам)
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+#: количество записей, читаемых из БД за одну порцию
+STREAM_CHUNK_SIZE = 1000
+
+
+def ndjson_response(
+    chunks: AsyncIterator[Sequence[Dict[str, Any]]], schema: Type[BaseModel]
+) -> StreamingResponse:
+    """
+    Потоковый ответ в формате NDJSON.
+
+    Записи сериализуются и отправляются клиенту порциями по мере чтения из БД,
+    поэтому объём памяти не зависит от общего количества записей.
+    В режиме быстрой сериализации записи кодируются orjson без проверки схемой.
+
+    :param chunks: порции записей
+    :param schema: схема сериализации записи
+    :return:
+    """
+
+    async def lines() -> AsyncIterator[bytes]:
+        async for chunk in chunks:
+            if settings.fast_json:
+                yield b"".join(orjson.dumps(row) + b"\n" for row in chunk)
+            else:
+                yield "".join(
+                    schema.parse_obj(row).json() + "\n" for row in chunk
+                ).encode()
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+async def read_items(request: Request) -> AsyncIterator[Any]:
+    """
+    Чтение записей из тела запроса: JSON-массива или NDJSON.
+
+    NDJSON разбирается по мере поступления данных, не дожидаясь
+    получения всего тела запроса.
+
+    :param request:
+    :return:
+    """
+
+    try:
+        if request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+            buffer = b""
+            async for chunk in request.stream():
+                *lines, buffer = (buffer + chunk).split(b"\n")
+                for line in lines:
+                    if line.strip():
+                        yield json.loads(line)
+            if buffer.strip():
+                yield json.loads(buffer)
+            return
+
+        body = await request.json()
+    except ValueError as exc:
+        raise ValidationErrorException(detail="Некорректный JSON") from exc
+
+    if not isinstance(body, list):
+        raise ValidationErrorException(detail="Ожидается массив записей")
+    for item in body:
+        yield item